@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the app modules are flat modules at the root of the app, imported as top level modules by SOAR
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
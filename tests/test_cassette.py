@@ -0,0 +1,102 @@
+import gzip
+import json
+import zlib
+
+from trackme_cassette import CassettePlayer, CassetteRecorder
+
+TOKEN = "sEcReTtOkEn"
+URLS = ["https://sh1.example.com:8089"]
+
+
+class Response(object):
+    def __init__(self, text, status_code=200):
+        self.status_code = status_code
+        self.headers = {"Content-Type": "application/json"}
+        self.text = text
+
+
+def _record(path, interactions):
+    recorder = CassetteRecorder(str(path), TOKEN, URLS)
+    for method, endpoint, params, body, text in interactions:
+        recorder.record(method, endpoint, params, body, Response(text), 0.01)
+    recorder.close()
+
+
+def _read(path):
+    with gzip.open(str(path), "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_recording_is_a_single_gzip_stream(tmp_path):
+    path = tmp_path / "cassette.ndjson.gz"
+    _record(
+        path,
+        [
+            ("get", "/services/trackme/v2/endpoint", {"index": i}, None, "{}")
+            for i in range(50)
+        ],
+    )
+
+    decompressor = zlib.decompressobj(wbits=31)
+    decompressor.decompress(path.read_bytes())
+    assert decompressor.eof and decompressor.unused_data == b""
+    assert len(_read(path)) == 50
+
+
+def test_nothing_recorded_before_close(tmp_path):
+    path = tmp_path / "cassette.ndjson.gz"
+    recorder = CassetteRecorder(str(path), TOKEN, URLS)
+    recorder.record("get", "/endpoint", None, None, Response("{}"), 0.01)
+
+    assert not path.exists()
+    recorder.close()
+    assert len(_read(path)) == 1
+
+
+def test_secrets_are_scrubbed(tmp_path):
+    path = tmp_path / "cassette.ndjson.gz"
+    body = json.dumps(
+        {"account": "remote1", "password": "hunter2", "nested": {"api_token": "abc"}}
+    )
+    _record(
+        path,
+        [
+            (
+                "post",
+                "/services/trackme/v2/configuration/test_remote_account",
+                {"auth_token": "abc", "target": "https://sh1.example.com:8089"},
+                body.encode("utf-8"),
+                json.dumps({"status": "ok", "secret": "xyz", "bearer": TOKEN}),
+            )
+        ],
+    )
+
+    recorded = path.read_bytes()
+    content = gzip.decompress(recorded).decode("utf-8")
+    for secret in ("hunter2", "abc", "xyz", TOKEN, "sh1.example.com"):
+        assert secret not in content
+
+    (interaction,) = _read(path)
+    assert interaction["params"]["target"] == "https://scrubbed-host-0:8089"
+    assert json.loads(interaction["body"])["account"] == "remote1"
+
+
+def test_replay_matches_scrubbed_requests(tmp_path):
+    path = tmp_path / "cassette.ndjson.gz"
+    body = json.dumps({"account": "remote1", "password": "hunter2"})
+    endpoint = "/services/trackme/v2/configuration/test_remote_account"
+    _record(
+        path,
+        [
+            ("post", endpoint, None, body, '{"status": "first"}'),
+            ("post", endpoint, None, body, '{"status": "second"}'),
+        ],
+    )
+
+    player = CassettePlayer(str(path), time_scale=0, token=TOKEN, urls=URLS)
+
+    assert player.play("post", endpoint, None, body).json() == {"status": "first"}
+    assert player.play("post", endpoint, None, body).json() == {"status": "second"}
+    # the last interaction is reused once exhausted
+    assert player.play("post", endpoint, None, body).json() == {"status": "second"}
+    assert player.play("get", endpoint, None, None) is None
@@ -0,0 +1,116 @@
+import threading
+import time
+
+from trackme_concurrency import AdaptiveConcurrencyLimiter
+from trackme_consts import TRACKME_ENDPOINT_CLASS_ML, TRACKME_ENDPOINT_CLASS_READ
+
+
+def test_disabled_unless_max_limit_above_one():
+    assert not AdaptiveConcurrencyLimiter({}, max_limit=1).is_enabled()
+    assert AdaptiveConcurrencyLimiter({}, max_limit=4).is_enabled()
+
+
+def test_limit_restored_from_state_and_bounded():
+    state = {"limit": 12.0, "baseline_latencies": {TRACKME_ENDPOINT_CLASS_READ: 0.1}}
+    limiter = AdaptiveConcurrencyLimiter(state, max_limit=8)
+
+    assert limiter.limit == 8
+
+
+def test_additive_increase_only_when_the_limit_is_used():
+    state = {}
+    limiter = AdaptiveConcurrencyLimiter(state, max_limit=8)
+
+    # idle limit: nothing in flight, the limit does not grow
+    limiter.observe(time.time(), 0.1, 200, TRACKME_ENDPOINT_CLASS_READ)
+    limiter.observe(time.time(), 0.1, 200, TRACKME_ENDPOINT_CLASS_READ)
+    assert state["limit"] == 1.0
+
+    limiter._in_flight = 1
+    limiter.observe(time.time(), 0.1, 200, TRACKME_ENDPOINT_CLASS_READ)
+    assert state["limit"] == 2.0
+
+
+def test_multiplicative_decrease_once_per_round():
+    state = {"limit": 8.0, "baseline_latencies": {TRACKME_ENDPOINT_CLASS_READ: 0.1}}
+    limiter = AdaptiveConcurrencyLimiter(state, max_limit=8)
+
+    round_start = time.time()
+    time.sleep(0.01)
+    limiter.observe(round_start + 0.001, 0.1, 503, TRACKME_ENDPOINT_CLASS_READ)
+    assert state["limit"] == 4.0
+
+    # requests sent before the decrease belong to the same round
+    limiter.observe(round_start + 0.002, 0.1, None, TRACKME_ENDPOINT_CLASS_READ)
+    assert state["limit"] == 4.0
+
+    limiter.observe(time.time(), 0.1, 429, TRACKME_ENDPOINT_CLASS_READ)
+    assert state["limit"] == 2.0
+
+
+def test_slow_responses_are_pressure():
+    state = {"limit": 4.0, "baseline_latencies": {TRACKME_ENDPOINT_CLASS_READ: 0.1}}
+    limiter = AdaptiveConcurrencyLimiter(state, max_limit=8)
+
+    limiter.observe(time.time(), 1.0, 200, TRACKME_ENDPOINT_CLASS_READ)
+    assert state["limit"] == 2.0
+
+
+def test_baseline_per_endpoint_class():
+    state = {"limit": 4.0, "baseline_latencies": {TRACKME_ENDPOINT_CLASS_READ: 0.1}}
+    limiter = AdaptiveConcurrencyLimiter(state, max_limit=8)
+
+    # the first ML response sets the ML baseline, it is not compared to the reads
+    limiter.observe(time.time(), 2.0, 200, TRACKME_ENDPOINT_CLASS_ML)
+    assert state["limit"] == 4.0
+    assert state["baseline_latencies"] == {
+        TRACKME_ENDPOINT_CLASS_READ: 0.1,
+        TRACKME_ENDPOINT_CLASS_ML: 2.0,
+    }
+
+    # slow ML responses do not shrink the read baseline, fast reads are not pressure
+    limiter.observe(time.time(), 2.5, 200, TRACKME_ENDPOINT_CLASS_ML)
+    limiter.observe(time.time(), 0.15, 200, TRACKME_ENDPOINT_CLASS_READ)
+    assert state["limit"] == 4.0
+
+
+def test_single_baseline_of_previous_versions_is_dropped():
+    state = {"limit": 2.0, "baseline_latency": 0.1}
+    AdaptiveConcurrencyLimiter(state, max_limit=8)
+
+    assert state == {"limit": 2.0, "baseline_latencies": {}}
+
+
+def test_imap_keeps_the_order_and_the_limit():
+    state = {"limit": 3.0, "baseline_latencies": {}}
+    limiter = AdaptiveConcurrencyLimiter(state, max_limit=3)
+    lock = threading.Lock()
+    in_flight = [0, 0]
+
+    def func(item):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight[1], in_flight[0])
+        time.sleep(0.01 * (item % 3))
+        with lock:
+            in_flight[0] -= 1
+        return item * 2
+
+    assert list(limiter.imap(func, range(20))) == [item * 2 for item in range(20)]
+    assert 1 < in_flight[1] <= 3
+
+
+def test_imap_stopped_early_does_not_run_queued_items():
+    limiter = AdaptiveConcurrencyLimiter({"limit": 1.0}, max_limit=2)
+    called = []
+
+    def func(item):
+        called.append(item)
+        time.sleep(0.01)
+        return item
+
+    results = limiter.imap(func, range(100))
+    assert next(results) == 0
+    results.close()
+
+    assert len(called) < 100
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+import trackme_json
+from trackme_json import json_decode, json_decode_items, json_encode, json_encode_text
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(trackme_json, "orjson", None)
+    elif trackme_json.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+def test_round_trip(backend):
+    obj = {"tenant_id": "mytenant", "objects": ["a", "b"], "count": 2, "ratio": 0.5}
+    encoded = json_encode(obj)
+    assert isinstance(encoded, bytes)
+    assert json_decode(encoded) == obj
+    assert json_decode(encoded.decode("utf-8")) == obj
+
+
+def test_encode_large_integers(backend):
+    assert json_decode(json_encode({"value": 2**70})) == {"value": 2**70}
+
+
+def test_decode_nan_and_infinity(backend):
+    decoded = json_decode(b'{"value": NaN, "max": Infinity}')
+    assert decoded["value"] != decoded["value"]
+    assert decoded["max"] == float("inf")
+
+
+def test_decode_invalid(backend):
+    with pytest.raises(ValueError):
+        json_decode(b"{not json")
+
+
+def test_encode_text_keeps_the_summary_format(backend):
+    obj = {"action": "enable", "objects": ["a", "b"]}
+    assert json_encode_text(obj) == json.dumps(obj)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"data": [{"a": 1}, {"a": [2, {"b": "]"}]}, 3], "count": 3}',
+        ' { "count" : 3 ,\n "data" : [ {"a": 1} , {"a": [2, {"b": "]"}]} , 3 ] } ',
+    ],
+)
+def test_decode_items(text):
+    items = []
+
+    obj = json_decode_items(text.encode("utf-8"), "data", items.append)
+
+    assert obj == {"count": 3}
+    assert items == [{"a": 1}, {"a": [2, {"b": "]"}]}, 3]
+
+
+def test_decode_items_empty_and_missing():
+    items = []
+
+    assert json_decode_items(b'{"data": []}', "data", items.append) == {}
+    assert json_decode_items(b"{}", "data", items.append) == {}
+    assert json_decode_items(b'{"data": null}', "data", items.append) == {"data": None}
+    assert json_decode_items(b"null", "data", items.append) is None
+    assert items == []
+
+
+def test_decode_items_array():
+    items = []
+
+    assert json_decode_items(b' [{"a": 1}, {"b": [2]}] ', None, items.append) == []
+    assert json_decode_items(b"[]", None, items.append) == []
+    assert items == [{"a": 1}, {"b": [2]}]
+
+
+@pytest.mark.parametrize(
+    "text",
+    ['{"data": [1, 2}', '{"data": [1] "a": 1}', '{"data": []} x', "{1: 2}", "[1] 2"],
+)
+def test_decode_items_invalid(text):
+    with pytest.raises(ValueError):
+        json_decode_items(text, "data", lambda item: None)
@@ -0,0 +1,37 @@
+from trackme_logging import LazyDebugLogger
+
+
+class Payload(object):
+    formatted = 0
+
+    def __repr__(self):
+        Payload.formatted += 1
+        return "payload"
+
+
+def test_enabled_by_default():
+    messages = []
+    LazyDebugLogger(messages.append).debug("response: {0}", {"a": 1})
+
+    assert messages == ["response: {'a': 1}"]
+
+
+def test_disabled_skips_formatting():
+    messages = []
+    LazyDebugLogger(messages.append, enabled=False).debug("response: {0}", Payload())
+
+    assert messages == []
+    assert Payload.formatted == 0
+
+
+def test_truncation_and_sampling():
+    messages = []
+    logger = LazyDebugLogger(messages.append, max_payload=10, sample_every=3)
+
+    for _ in range(4):
+        logger.debug("response: {0}", "x" * 25)
+
+    assert messages == [
+        "response: xxxxxxxxxx... (15 chars truncated)",
+        "response: xxxxxxxxxx... (15 chars truncated) (repeated 3 times)",
+    ]
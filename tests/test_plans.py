@@ -0,0 +1,47 @@
+import os
+import uuid
+
+import pytest
+
+from trackme_plans import PlanStore
+
+
+def test_save_load_delete(tmp_path):
+    store = PlanStore(str(tmp_path), "asset1")
+    plan = {"action": "ack_manage", "requests": [{"endpoint": "/e", "body": "{}"}]}
+
+    plan_id = store.save(plan)
+
+    assert uuid.UUID(plan_id)
+    loaded = store.load(plan_id)
+    assert loaded["plan_id"] == plan_id
+    assert loaded["requests"] == plan["requests"]
+    assert "created" in loaded
+
+    store.delete(plan_id)
+    with pytest.raises(OSError):
+        store.load(plan_id)
+    # deleting twice is not an error
+    store.delete(plan_id)
+
+
+def test_plans_are_stored_per_asset(tmp_path):
+    plan_id = PlanStore(str(tmp_path), "asset1").save({"action": "ack_manage"})
+
+    with pytest.raises(OSError):
+        PlanStore(str(tmp_path), "asset2").load(plan_id)
+
+
+def test_no_temporary_file_left(tmp_path):
+    store = PlanStore(str(tmp_path), "asset1")
+    store.save({"action": "ack_manage"})
+
+    assert not [name for name in os.listdir(store._dir) if name.endswith(".tmp")]
+
+
+@pytest.mark.parametrize("plan_id", ["../../etc/passwd", "not-a-plan", ""])
+def test_invalid_plan_ids_are_rejected(tmp_path, plan_id):
+    store = PlanStore(str(tmp_path), "asset1")
+
+    with pytest.raises(ValueError):
+        store.load(plan_id)
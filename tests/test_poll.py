@@ -0,0 +1,143 @@
+import pytest
+
+from trackme_poll import PollContainers, spooled_alerts
+
+
+class FailingSave(object):
+    """save_batch failing from the batch number fail_at (0 based)"""
+
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.batches = []
+
+    def __call__(self, batch):
+        if self.fail_at is not None and len(self.batches) >= self.fail_at:
+            return False, "save_containers failed"
+        self.batches.append(batch)
+        return True, None
+
+
+def _containers(ingested, count, batch_size=2):
+    containers = PollContainers(batch_size)
+    for index in range(count):
+        containers.add_entity(
+            {"name": "entity{0}".format(index)},
+            ingested,
+            "dsm:key{0}".format(index),
+            "red",
+        )
+    return containers
+
+
+def test_all_batches_saved_update_the_checkpoint():
+    ingested = {}
+    containers = _containers(ingested, 5)
+    progress = []
+
+    success, message = containers.save(
+        FailingSave(), lambda saved, total: progress.append((saved, total))
+    )
+
+    assert success and message is None
+    assert containers.saved_count == 5
+    assert ingested == {"dsm:key{0}".format(index): "red" for index in range(5)}
+    assert progress == [(2, 5), (4, 5), (5, 5)]
+
+
+def test_failed_batch_leaves_its_entities_out_of_the_checkpoint():
+    ingested = {}
+    containers = _containers(ingested, 5)
+
+    success, message = containers.save(FailingSave(fail_at=1))
+
+    assert not success and message == "save_containers failed"
+    assert containers.saved_count == 2
+    # only the first batch was saved, the next poll ingests the others again
+    assert ingested == {"dsm:key0": "red", "dsm:key1": "red"}
+    assert len(containers) == 5
+
+
+def test_unsaved_webhook_alerts_are_returned_for_requeue():
+    ingested = {}
+    containers = PollContainers(2)
+    alerts = [{"tenant_id": "t1", "component": "dsm", "_key": str(i)} for i in range(3)]
+    for alert in alerts:
+        containers.add_alert({"name": alert["_key"]}, alert)
+    containers.add_entity({"name": "entity"}, ingested, "dsm:key", "red")
+
+    success, _ = containers.save(FailingSave(fail_at=1))
+
+    assert not success
+    assert containers.unsaved_alerts(alerts) == alerts[2:]
+    assert ingested == {}
+
+
+def test_nothing_to_save():
+    containers = PollContainers(2)
+
+    assert containers.save(FailingSave(fail_at=0)) == (True, None)
+    assert containers.unsaved_alerts([]) == []
+
+
+class FakeSpool(object):
+    def __init__(self, alerts):
+        self.alerts = list(alerts)
+
+    def drain(self):
+        alerts, self.alerts = self.alerts, []
+        return alerts
+
+    def requeue(self, alerts):
+        self.alerts.extend(alerts)
+
+
+def _alerts(count):
+    return [
+        {"tenant_id": "t1", "component": "dsm", "_key": str(index)}
+        for index in range(count)
+    ]
+
+
+def test_spooled_alerts_saved_are_not_requeued():
+    spool = FakeSpool(_alerts(3))
+    containers = PollContainers(2)
+
+    with spooled_alerts(spool, containers) as alerts:
+        for alert in alerts:
+            containers.add_alert({"name": alert["_key"]}, alert)
+        assert containers.save(FailingSave()) == (True, None)
+
+    assert spool.alerts == []
+
+
+def test_spooled_alerts_unsaved_are_requeued():
+    spool = FakeSpool(_alerts(3))
+    containers = PollContainers(2)
+
+    with spooled_alerts(spool, containers) as alerts:
+        for alert in alerts:
+            containers.add_alert({"name": alert["_key"]}, alert)
+        success, _ = containers.save(FailingSave(fail_at=1))
+
+    assert not success
+    assert spool.alerts == _alerts(3)[2:]
+
+
+def test_spooled_alerts_are_requeued_on_errors():
+    spool = FakeSpool(_alerts(3))
+    containers = PollContainers(2)
+
+    # an error while building the containers, before any of them was added or saved
+    with pytest.raises(KeyError):
+        with spooled_alerts(spool, containers) as alerts:
+            containers.add_alert({"name": alerts[0]["_key"]}, alerts[0])
+            alerts[1]["object_state"]
+
+    assert spool.alerts == _alerts(3)
+
+
+def test_no_spool():
+    containers = PollContainers(2)
+
+    with spooled_alerts(None, containers) as alerts:
+        assert alerts == []
@@ -0,0 +1,61 @@
+import threading
+import time
+
+from trackme_profiling import ActionProfiler
+
+
+def _worker_function():
+    return sum(range(1000))
+
+
+def _allocate_and_free():
+    # a large allocation released before the end of the run
+    buffer = [bytearray(1024) for _ in range(5000)]
+    time.sleep(0.3)
+    return len(buffer)
+
+
+def test_worker_threads_are_profiled():
+    profiler = ActionProfiler(top_n=200, sample_interval=0.01)
+    profiler.start()
+    try:
+        worker = threading.Thread(target=_worker_function)
+        worker.start()
+        worker.join()
+    finally:
+        profiler.stop()
+
+    report = profiler.report()
+    assert report["threads_profiled"] >= 2
+    assert any(
+        "_worker_function" in function["function"]
+        for function in report["top_functions"]
+    )
+
+
+def test_peak_allocations_include_freed_allocations():
+    profiler = ActionProfiler(top_n=10, sample_interval=0.01)
+    profiler.start()
+    try:
+        _allocate_and_free()
+    finally:
+        profiler.stop()
+
+    report = profiler.report()
+    assert report["peak_snapshot_kb"] >= 4000
+    assert report["peak_memory_kb"] >= report["peak_snapshot_kb"]
+    assert "test_profiling.py" in report["peak_allocations"][0]["site"]
+    assert not any(
+        allocation["size_kb"] >= 4000 for allocation in report["retained_allocations"]
+    )
+
+
+def test_dump_stats(tmp_path):
+    profiler = ActionProfiler()
+    profiler.start()
+    _worker_function()
+    profiler.stop()
+
+    file_path = tmp_path / "run.pstats"
+    profiler.dump_stats(str(file_path))
+    assert file_path.stat().st_size > 0
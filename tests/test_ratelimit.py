@@ -0,0 +1,111 @@
+import pytest
+
+import trackme_ratelimit
+from trackme_consts import (
+    TRACKME_ENDPOINT_CLASS_ML,
+    TRACKME_ENDPOINT_CLASS_READ,
+    TRACKME_ENDPOINT_CLASS_WRITE,
+    TRACKME_RATE_LIMIT_POLICY_FAIL_FAST,
+)
+from trackme_ratelimit import TokenBucketRateLimiter, get_endpoint_class
+
+
+@pytest.mark.parametrize(
+    "endpoint, endpoint_class",
+    [
+        ("/services/trackme/v2/component/load_component_data", "read"),
+        ("/services/trackme/v2/splk_outliers_engine/outliers_get_rules", "read"),
+        ("/services/trackme/v2/splk_dsm/write/ds_monitoring", "write"),
+        ("/services/trackme/v2/ack/ack_manage", "write"),
+        (
+            "/services/trackme/v2/splk_outliers_engine/write/outliers_train_models",
+            "ml",
+        ),
+    ],
+)
+def test_get_endpoint_class(endpoint, endpoint_class):
+    assert get_endpoint_class(endpoint) == endpoint_class
+
+
+class Clock(object):
+    """time.time and time.sleep of the rate limiter, sleeping advances the clock"""
+
+    def __init__(self, monkeypatch):
+        self.now = 1000.0
+        self.sleeps = []
+        monkeypatch.setattr(trackme_ratelimit.time, "time", lambda: self.now)
+        monkeypatch.setattr(trackme_ratelimit.time, "sleep", self.sleep)
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _limiter(tmp_path, rates, **kwargs):
+    return TokenBucketRateLimiter(str(tmp_path), "asset1", rates, **kwargs)
+
+
+def test_burst_then_refill(tmp_path, monkeypatch):
+    clock = Clock(monkeypatch)
+    limiter = _limiter(tmp_path, {TRACKME_ENDPOINT_CLASS_READ: 2})
+
+    # the bucket holds one second worth of requests
+    assert limiter.acquire(TRACKME_ENDPOINT_CLASS_READ)
+    assert limiter.acquire(TRACKME_ENDPOINT_CLASS_READ)
+    assert clock.sleeps == []
+
+    # the next token is refilled after 1 / rate seconds
+    assert limiter.acquire(TRACKME_ENDPOINT_CLASS_READ)
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+    clock.now += 10
+    assert limiter.acquire(TRACKME_ENDPOINT_CLASS_READ)
+    assert limiter.acquire(TRACKME_ENDPOINT_CLASS_READ)
+    assert len(clock.sleeps) == 1
+
+
+def test_classes_without_rate_are_not_limited(tmp_path, monkeypatch):
+    clock = Clock(monkeypatch)
+    limiter = _limiter(
+        tmp_path, {TRACKME_ENDPOINT_CLASS_READ: 1, TRACKME_ENDPOINT_CLASS_WRITE: 0}
+    )
+
+    for _ in range(5):
+        assert limiter.acquire(TRACKME_ENDPOINT_CLASS_WRITE)
+        assert limiter.acquire(TRACKME_ENDPOINT_CLASS_ML)
+    assert clock.sleeps == []
+    assert limiter.is_enabled()
+    assert not _limiter(tmp_path, {TRACKME_ENDPOINT_CLASS_READ: 0}).is_enabled()
+
+
+def test_fail_fast(tmp_path, monkeypatch):
+    clock = Clock(monkeypatch)
+    limiter = _limiter(
+        tmp_path,
+        {TRACKME_ENDPOINT_CLASS_READ: 1},
+        policy=TRACKME_RATE_LIMIT_POLICY_FAIL_FAST,
+    )
+
+    assert limiter.acquire(TRACKME_ENDPOINT_CLASS_READ)
+    assert not limiter.acquire(TRACKME_ENDPOINT_CLASS_READ)
+    assert clock.sleeps == []
+
+
+def test_max_wait(tmp_path, monkeypatch):
+    clock = Clock(monkeypatch)
+    limiter = _limiter(tmp_path, {TRACKME_ENDPOINT_CLASS_READ: 0.1}, max_wait=5)
+
+    # a token every 10 seconds, more than max_wait
+    assert limiter.acquire(TRACKME_ENDPOINT_CLASS_READ)
+    assert not limiter.acquire(TRACKME_ENDPOINT_CLASS_READ)
+    assert clock.sleeps == []
+
+
+def test_budget_is_shared_across_limiters(tmp_path, monkeypatch):
+    Clock(monkeypatch)
+    rates = {TRACKME_ENDPOINT_CLASS_READ: 1}
+    first = _limiter(tmp_path, rates, policy=TRACKME_RATE_LIMIT_POLICY_FAIL_FAST)
+    second = _limiter(tmp_path, rates, policy=TRACKME_RATE_LIMIT_POLICY_FAIL_FAST)
+
+    assert first.acquire(TRACKME_ENDPOINT_CLASS_READ)
+    assert not second.acquire(TRACKME_ENDPOINT_CLASS_READ)
@@ -0,0 +1,66 @@
+from trackme_records import EntityRecord, EntityStateIndex, GroupRecord
+
+
+def test_entity_record_round_trip():
+    record = EntityRecord.from_dict(
+        {
+            "object": "entity1",
+            "keyid": "k1",
+            "object_state": "red",
+            "priority": "high",
+            "monitored_state": "enabled",
+            "tags_manual": "a,b",
+            "unused": "x",
+        },
+        extra_fields=("tags_manual",),
+    )
+
+    assert record.get("_key") == record.get("keyid") == "k1"
+    assert record.get("tags_manual") == "a,b"
+    assert record.get("unused", "default") == "default"
+    assert record.to_dict() == {
+        "object": "entity1",
+        "_key": "k1",
+        "object_state": "red",
+        "priority": "high",
+        "monitored_state": "enabled",
+        "tags_manual": "a,b",
+    }
+
+
+def test_group_record_with_a_single_member_string():
+    group = GroupRecord.from_dict(
+        {"_key": "g1", "object_group_name": "grp", "object_group_members": "entity1"}
+    )
+
+    assert group.object_group_members == ("entity1",)
+    assert group.to_dict()["object_group_key"] == "g1"
+
+
+def test_entity_state_index_keeps_each_component():
+    index = EntityStateIndex()
+    index.add("dsm", {"object": "host1", "object_state": "red"})
+    index.add("dhm", {"object": "host1", "object_state": "green"})
+
+    assert index.get("dsm", "host1") == "red"
+    assert index.get("dhm", "host1") == "green"
+
+
+def test_member_resolved_by_group_binding():
+    index = EntityStateIndex()
+    index.add("dsm", {"object": "host1", "object_state": "red"})
+    index.add(
+        "dhm", {"object": "host1", "object_state": "green", "object_group_key": "g1"}
+    )
+
+    assert index.member_state("g1", "host1") == ("green", False)
+    # not bound to this group, and found in two components
+    assert index.member_state("g2", "host1") == (None, True)
+
+
+def test_member_in_a_single_component_or_unknown():
+    index = EntityStateIndex()
+    index.add("dhm", {"object": "host1", "object_state": "green"})
+
+    assert index.member_state("g1", "host1") == ("green", False)
+    assert index.member_state("g1", "host2") == (None, False)
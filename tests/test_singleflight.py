@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+import time
+
+from trackme_singleflight import SingleFlight
+
+
+def _flight(tmp_path, **kwargs):
+    return SingleFlight(str(tmp_path), "asset1", **kwargs)
+
+
+def test_waiter_reuses_the_result_of_the_flight_it_joined(tmp_path):
+    leader = _flight(tmp_path)
+    waiter = _flight(tmp_path)
+    key = leader.fingerprint("get", "/services/trackme/v2/vtenants/show_tenants")
+
+    assert leader.join(key) == (False, None)
+    results = []
+    thread = threading.Thread(target=lambda: results.append(waiter.join(key)))
+    thread.start()
+    time.sleep(0.2)
+    leader.publish(key, {"data": [1, 2]})
+    thread.join(5)
+
+    assert results == [(True, {"data": [1, 2]})]
+    assert not os.path.exists(leader._pending_path(key))
+
+
+def test_published_result_is_not_served_to_later_callers(tmp_path):
+    flight = _flight(tmp_path)
+    key = flight.fingerprint("get", "/endpoint")
+
+    assert flight.join(key) == (False, None)
+    flight.publish(key, {"data": [1, 2]})
+
+    # the request is performed again, a read following a write is never served stale data
+    assert flight.join(key) == (False, None)
+
+
+def test_abandon_only_releases_the_own_flight(tmp_path):
+    first = _flight(tmp_path)
+    second = _flight(tmp_path)
+    key = first.fingerprint("get", "/endpoint")
+
+    assert first.join(key) == (False, None)
+    first.publish(key, {})
+    assert second.join(key) == (False, None)
+
+    # releasing the first flight again leaves the marker of the second one
+    first.abandon(key)
+    assert os.path.exists(second._pending_path(key))
+    second.abandon(key)
+    assert not os.path.exists(second._pending_path(key))
+
+
+def test_pending_marker_is_complete_once_visible(tmp_path):
+    flight = _flight(tmp_path)
+    key = flight.fingerprint("get", "/endpoint")
+
+    assert flight.join(key) == (False, None)
+    with open(flight._pending_path(key)) as f:
+        assert json.load(f)["pid"] == os.getpid()
+    assert not [name for name in os.listdir(flight._dir) if name.endswith(".tmp")]
+
+
+def test_second_leader_is_refused(tmp_path):
+    flight = _flight(tmp_path)
+    key = flight.fingerprint("get", "/endpoint")
+
+    assert flight._create_pending(key)
+    assert not flight._create_pending(key)
+
+
+def test_live_leader_is_not_stale(tmp_path):
+    flight = _flight(tmp_path)
+    key = flight.fingerprint("get", "/endpoint")
+    flight._create_pending(key)
+
+    assert not flight._is_stale(key)
+
+
+def test_marker_of_dead_process_is_stale(tmp_path):
+    flight = _flight(tmp_path)
+    key = flight.fingerprint("get", "/endpoint")
+    with open(flight._pending_path(key), "w") as f:
+        json.dump({"pid": 2**22 + 1, "ts": time.time()}, f)
+
+    assert flight._is_stale(key)
+
+
+def test_old_marker_is_stale(tmp_path):
+    flight = _flight(tmp_path, wait_timeout=1)
+    key = flight.fingerprint("get", "/endpoint")
+    with open(flight._pending_path(key), "w") as f:
+        json.dump({"pid": os.getpid(), "ts": time.time() - 10}, f)
+
+    assert flight._is_stale(key)
+
+
+def test_unparsable_recent_marker_is_live(tmp_path):
+    flight = _flight(tmp_path, wait_timeout=60)
+    key = flight.fingerprint("get", "/endpoint")
+    open(flight._pending_path(key), "w").close()
+
+    assert not flight._is_stale(key)
+
+
+def test_unparsable_old_marker_is_stale(tmp_path):
+    flight = _flight(tmp_path, wait_timeout=60)
+    key = flight.fingerprint("get", "/endpoint")
+    pending_path = flight._pending_path(key)
+    open(pending_path, "w").close()
+    old = time.time() - 120
+    os.utime(pending_path, (old, old))
+
+    assert flight._is_stale(key)
+
+
+def test_released_marker_is_not_stale(tmp_path):
+    flight = _flight(tmp_path)
+    key = flight.fingerprint("get", "/endpoint")
+
+    assert not flight._is_stale(key)
+
+
+def test_waiter_gives_up_after_timeout(tmp_path):
+    flight = _flight(tmp_path, wait_timeout=0.2)
+    key = flight.fingerprint("get", "/endpoint")
+    flight._create_pending(key)
+
+    started = time.time()
+    assert flight.join(key) == (False, None)
+    assert time.time() - started >= 0.2
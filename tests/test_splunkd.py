@@ -0,0 +1,69 @@
+import threading
+
+from trackme_consts import TRACKME_ENDPOINT_CLASS_READ, TRACKME_ENDPOINT_CLASS_WRITE
+from trackme_splunkd import SplunkdPool
+
+URLS = ["https://sh1:8089", "https://sh2:8089", "https://sh3:8089"]
+
+
+def test_no_member_has_no_candidate():
+    pool = SplunkdPool([], {})
+
+    assert pool.candidates(TRACKME_ENDPOINT_CLASS_READ) == []
+    assert pool.status() == []
+
+
+def test_writes_are_sticky():
+    state = {}
+    pool = SplunkdPool(URLS, state)
+
+    first = pool.candidates(TRACKME_ENDPOINT_CLASS_WRITE)[0]
+    for _ in range(10):
+        assert pool.candidates(TRACKME_ENDPOINT_CLASS_WRITE)[0] == first
+    assert state["write_node"] == first
+
+
+def test_unhealthy_members_are_tried_last():
+    pool = SplunkdPool(URLS, {})
+    pool.mark_failure(URLS[0])
+
+    for endpoint_class in (TRACKME_ENDPOINT_CLASS_READ, TRACKME_ENDPOINT_CLASS_WRITE):
+        candidates = pool.candidates(endpoint_class)
+        assert sorted(candidates) == sorted(URLS)
+        assert candidates[-1] == URLS[0]
+
+
+def test_members_no_longer_configured_are_dropped():
+    state = {}
+    SplunkdPool(URLS, state)
+    pool = SplunkdPool(URLS[:1], state)
+
+    assert list(state["nodes"]) == URLS[:1]
+    assert pool.status() == [{"url": URLS[0], "healthy": True, "latency": None}]
+
+
+def test_due_for_probe_after_retry_delay():
+    pool = SplunkdPool(URLS, {}, retry_after=0)
+    pool.mark_probe_failure(URLS[1])
+
+    assert pool.due_for_probe() == [URLS[1]]
+
+    pool.mark_success(URLS[1], 0.05)
+    assert pool.due_for_probe() == []
+    assert pool.is_healthy(URLS[1])
+
+
+def test_state_writes_hold_the_shared_lock():
+    lock = threading.Lock()
+    pool = SplunkdPool(URLS, {}, lock=lock)
+
+    with lock:
+        # a save of the state in progress, the pool waits for it before changing the state
+        thread = threading.Thread(target=pool.mark_failure, args=(URLS[0],))
+        thread.start()
+        thread.join(0.2)
+        assert thread.is_alive()
+        assert pool.is_healthy(URLS[0])
+    thread.join(5)
+
+    assert not pool.is_healthy(URLS[0])
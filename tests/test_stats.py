@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from trackme_stats import EntityStatsAggregator
+
+
+def _nearest_rank(values, percentile):
+    ordered = sorted(values)
+    rank = max(int(-(-percentile * len(ordered) // 100)), 1)
+    return ordered[rank - 1]
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 10, 101, 1000])
+def test_percentiles_match_the_sorted_nearest_rank(count):
+    rng = random.Random(count)
+    lags = [rng.choice([rng.uniform(0, 3600), 60.0, 0.0]) for _ in range(count)]
+    records = [{"data_last_lag_seen": lag} for lag in lags]
+
+    stats = EntityStatsAggregator().add_all(records).results()["lag"]
+    lag_stats = stats["data_last_lag_seen"]
+
+    assert lag_stats["count"] == count
+    assert lag_stats["min"] == min(lags)
+    assert lag_stats["max"] == max(lags)
+    assert lag_stats["avg"] == round(sum(lags) / count, 3)
+    for percentile in (50, 90, 95, 99):
+        assert lag_stats["p{0}".format(percentile)] == _nearest_rank(lags, percentile)
+
+
+def test_percentiles_in_any_order():
+    values = list(range(1, 101))
+    random.Random(1).shuffle(values)
+    aggregator = EntityStatsAggregator(
+        count_fields=(), lag_fields=("lag",), percentiles=(99, 10, 50)
+    )
+
+    stats = aggregator.add_all({"lag": value} for value in values).results()
+
+    assert stats["lag"]["lag"]["p10"] == 10
+    assert stats["lag"]["lag"]["p50"] == 50
+    assert stats["lag"]["lag"]["p99"] == 99
+
+
+def test_counts_and_invalid_lags():
+    records = [
+        {"object_state": "red", "priority": "high", "data_last_lag_seen": "12.5"},
+        {"object_state": "green", "priority": "high", "data_last_lag_seen": ""},
+        {"object_state": "red", "data_last_lag_seen": "n/a"},
+    ]
+
+    stats = EntityStatsAggregator().add_all(records).results()
+
+    assert stats["entity_count"] == 3
+    assert stats["object_state"] == {"red": 2, "green": 1}
+    assert stats["priority"] == {"high": 2, "None": 1}
+    assert stats["lag"]["data_last_lag_seen"]["count"] == 1
+    assert stats["lag"]["data_last_ingestion_lag_seen"] == {"count": 0}
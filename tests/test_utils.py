@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from trackme_utils import (
+    apply_parameter_spec,
+    chunked,
+    locked_json_file,
+    request_fingerprint,
+)
+
+
+def test_chunked():
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(chunked([], 3)) == []
+    assert list(chunked("abc", 5)) == [["a", "b", "c"]]
+
+
+def test_chunked_is_lazy():
+    consumed = []
+
+    def items():
+        for index in range(10):
+            consumed.append(index)
+            yield index
+
+    chunks = chunked(items(), 3)
+    assert next(chunks) == [0, 1, 2]
+    assert consumed == [0, 1, 2]
+
+
+@pytest.mark.parametrize("size", [0, -1])
+def test_chunked_rejects_invalid_sizes(size):
+    with pytest.raises(ValueError):
+        list(chunked(range(5), size))
+
+
+def test_request_fingerprint_ignores_body_encoding_and_key_order():
+    fingerprint = request_fingerprint("POST", "/endpoint", None, {"a": 1, "b": 2})
+
+    assert fingerprint == request_fingerprint("post", "/endpoint", {}, '{"b":2,"a":1}')
+    assert fingerprint == request_fingerprint(
+        "post", "/endpoint", {}, b'{"a": 1, "b": 2}'
+    )
+    assert fingerprint != request_fingerprint("post", "/endpoint", {}, {"a": 2})
+
+
+def test_locked_json_file(tmp_path):
+    file_path = str(tmp_path / "state.json")
+
+    with locked_json_file(file_path) as content:
+        assert content == {}
+        content["count"] = 1
+
+    with locked_json_file(file_path) as content:
+        content["count"] += 1
+
+    with open(file_path) as f:
+        assert json.load(f) == {"count": 2}
+
+
+def test_apply_parameter_spec():
+    parameters = {
+        "tenant_id": {"required": True, "default": ""},
+        "ack_period": {"required": False, "default": 86400},
+        "comment": {"required": False, "default": ""},
+    }
+
+    params, missing = apply_parameter_spec(parameters, {"tenant_id": "mytenant"})
+    assert params == {"tenant_id": "mytenant", "ack_period": 86400}
+    assert missing == []
+
+    params, missing = apply_parameter_spec(parameters, {"ack_period": 3600})
+    assert params == {"ack_period": 3600}
+    assert missing == ["tenant_id"]
@@ -0,0 +1,66 @@
+import gzip
+import json
+
+from trackme_vault import NdjsonVaultWriter, iter_vault_objects
+
+
+def _write(tmp_path, name, content):
+    file_path = tmp_path / name
+    file_path.write_text(content, encoding="utf-8")
+    return str(file_path)
+
+
+def test_csv_with_header(tmp_path):
+    file_path = _write(
+        tmp_path, "entities.csv", "priority,object\nhigh,entity1\nlow, entity2 \nlow,\n"
+    )
+
+    assert list(iter_vault_objects(file_path)) == ["entity1", "entity2"]
+
+
+def test_csv_without_header_uses_the_first_column(tmp_path):
+    file_path = _write(tmp_path, "entities.csv", "entity1,high\nentity2,low\n\n")
+
+    assert list(iter_vault_objects(file_path)) == ["entity1", "entity2"]
+
+
+def test_ndjson_objects_and_strings(tmp_path):
+    file_path = _write(
+        tmp_path,
+        "entities.ndjson",
+        '{"object": "entity1"}\n\n"entity2"\n{"other": "x"}\n{"object": " "}\n',
+    )
+
+    assert list(iter_vault_objects(file_path)) == ["entity1", "entity2"]
+
+
+def test_custom_field(tmp_path):
+    file_path = _write(tmp_path, "entities.csv", "_key,object\nk1,entity1\n")
+
+    assert list(iter_vault_objects(file_path, field="_key")) == ["k1"]
+
+
+def test_empty_file(tmp_path):
+    file_path = _write(tmp_path, "entities.csv", "")
+
+    assert list(iter_vault_objects(file_path)) == []
+
+
+def test_ndjson_writer(tmp_path):
+    file_path = str(tmp_path / "records.ndjson.gz")
+    records = [
+        {"object": "entity1", "object_state": "red"},
+        {"object": "entity2", "object_state": "green"},
+        {"object": "entity3", "object_state": "red"},
+    ]
+
+    with NdjsonVaultWriter(file_path, ("object_state",)) as writer:
+        for record in records:
+            writer.write(record)
+
+    with gzip.open(file_path, "rt", encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == records
+    assert writer.summary() == {
+        "record_count": 3,
+        "aggregates": {"object_state": {"red": 2, "green": 1}},
+    }
@@ -0,0 +1,171 @@
+import json
+import os
+
+import pytest
+
+import trackme_webhook
+from trackme_webhook import AlertSpool, deliver_alerts
+
+
+def _alert(key, object_state="red", latest_flip_time=1000):
+    return {
+        "tenant_id": "mytenant",
+        "component": "dsm",
+        "_key": key,
+        "object_state": object_state,
+        "latest_flip_time": latest_flip_time,
+    }
+
+
+def _counts(spool, alerts):
+    fresh, duplicates = spool.deduplicate(alerts)
+    return len(fresh), duplicates
+
+
+@pytest.fixture
+def spool(tmp_path):
+    return AlertSpool("asset1", str(tmp_path))
+
+
+def test_duplicates_are_dropped(spool):
+    assert spool.deduplicate([_alert("a"), _alert("b")]) == (
+        [_alert("a"), _alert("b")],
+        0,
+    )
+    assert spool.deduplicate([_alert("a")]) == ([], 1)
+
+
+def test_append_and_drain(spool):
+    spool.append([_alert("a"), _alert("b")])
+
+    assert spool.drain() == [_alert("a"), _alert("b")]
+    assert spool.drain() == []
+
+
+def test_state_changes_are_spooled(spool):
+    assert _counts(spool, [_alert("a")]) == (1, 0)
+    assert _counts(spool, [_alert("a", "green", 2000)]) == (1, 0)
+    # red again after a recovery
+    assert _counts(spool, [_alert("a", "red", 3000)]) == (1, 0)
+    # red again, the recovery was not pushed
+    assert _counts(spool, [_alert("a", "red", 4000)]) == (1, 0)
+
+
+def test_dedup_entries_expire(tmp_path, monkeypatch):
+    spool = AlertSpool("asset1", str(tmp_path), dedup_ttl=60)
+    now = [10000.0]
+    monkeypatch.setattr(trackme_webhook.time, "time", lambda: now[0])
+
+    assert _counts(spool, [_alert("a"), _alert("b")]) == (2, 0)
+    now[0] += 30
+    assert _counts(spool, [_alert("a")]) == (0, 1)
+    now[0] += 30
+    assert _counts(spool, [_alert("a")]) == (1, 0)
+
+    # the entry of b expired and was pruned
+    with open(os.path.join(str(tmp_path), "asset1_state.json")) as f:
+        assert '"mytenant:dsm:b"' not in f.read()
+
+
+def test_duplicates_do_not_rewrite_the_state(spool, tmp_path):
+    _counts(spool, [_alert("a")])
+    state_path = os.path.join(str(tmp_path), "asset1_state.json")
+    os.utime(state_path, (0, 0))
+
+    _counts(spool, [_alert("a")])
+
+    assert os.stat(state_path).st_mtime == 0
+
+
+def test_requeue(spool):
+    spool.append([_alert("a"), _alert("b")])
+    alerts = spool.drain()
+    spool.append([_alert("c")])
+    spool.requeue(alerts[1:])
+
+    assert spool.drain() == [_alert("c"), _alert("b")]
+
+
+def test_token(spool):
+    assert not spool.is_enabled()
+    assert not spool.check_token("secret")
+
+    spool.configure("secret")
+    assert spool.is_enabled()
+    assert spool.check_token("secret")
+    assert not spool.check_token("other")
+    assert not spool.check_token("")
+
+    spool.configure("")
+    assert not spool.is_enabled()
+
+
+def test_invalid_asset_id(tmp_path):
+    with pytest.raises(ValueError):
+        AlertSpool("../asset", str(tmp_path))
+
+
+def test_webhook_dir(monkeypatch):
+    assert trackme_webhook.webhook_dir("/state") == "/state/webhook"
+
+    # the REST handler resolves the state directory of the app
+    monkeypatch.setenv("PHANTOM_HOME", "/opt/soar")
+    assert trackme_webhook.webhook_dir() == os.path.join(
+        "/opt/soar/local_data/app_states", trackme_webhook.TRACKME_APP_ID, "webhook"
+    )
+
+
+class Response(object):
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+
+class Platform(object):
+    """post of the platform REST API, failing from the request number fail_at (0 based)"""
+
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.containers = []
+
+    def __call__(self, url, data, headers, verify, timeout):
+        assert url == "https://soar/rest/container"
+        assert headers == {"ph-auth-token": "apitoken"}
+        if self.fail_at is not None and len(self.containers) >= self.fail_at:
+            return Response(503, b"unavailable")
+        self.containers.append(json.loads(data))
+        return Response(200, b'{"success": true, "id": 1}')
+
+
+DELIVERY = {
+    "base_url": "https://soar/",
+    "auth_token": "apitoken",
+    "asset_id": 7,
+    "container_label": "trackme",
+}
+
+
+def test_deliver_alerts():
+    platform = Platform()
+
+    assert deliver_alerts([_alert("a"), _alert("b")], DELIVERY, platform) == []
+    assert [container["asset_id"] for container in platform.containers] == [7, 7]
+    assert platform.containers[0]["label"] == "trackme"
+    assert platform.containers[0]["artifacts"][0]["cef"]["keyid"] == "a"
+
+
+def test_undelivered_alerts_are_returned():
+    platform = Platform(fail_at=1)
+    alerts = [_alert("a"), _alert("b"), _alert("c")]
+
+    assert deliver_alerts(alerts, DELIVERY, platform) == alerts[1:]
+    assert len(platform.containers) == 1
+
+
+def test_delivery_is_configured_with_the_token(spool):
+    spool.configure("secret")
+    assert spool.delivery() is None
+
+    spool.configure("secret", DELIVERY)
+    assert spool.delivery() == DELIVERY
+    assert spool.check_token("secret")
@@ -0,0 +1,125 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Python 3 Compatibility imports
+from __future__ import print_function, unicode_literals
+
+__author__ = "TrackMe Limited"
+__copyright__ = "Copyright 2024, TrackMe Limited, U.K."
+__credits__ = "TrackMe Limited, U.K."
+__license__ = "TrackMe Limited, all rights reserved"
+__version__ = "0.1.0"
+__maintainer__ = "TrackMe Limited, U.K."
+__email__ = "support@trackme-solutions.com"
+__status__ = "PRODUCTION"
+
+# Benchmark of the JSON codecs on recorded TrackMe payloads: the request bodies and the JSON
+# responses of cassette files recorded with cassette_mode=record, usage:
+#
+#   python tools/trackme_json_benchmark.py cassette.ndjson.gz [cassette.ndjson.gz ...] [--repeat 20]
+#
+# The tools directory is not part of the release package.
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+# the codecs are imported from the connector, one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import trackme_json  # noqa: E402
+
+
+def load_payloads(file_paths):
+    """
+    Return the JSON payloads of the cassettes as bytes, request bodies and response texts
+    """
+
+    payloads = []
+    for file_path in file_paths:
+        with gzip.open(file_path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                interaction = json.loads(line)
+                if interaction.get("body"):
+                    payloads.append(interaction["body"].encode("utf-8"))
+                if "json" in interaction.get("content_type", "") and interaction.get(
+                    "text"
+                ):
+                    payloads.append(interaction["text"].encode("utf-8"))
+    return payloads
+
+
+def run(name, decode, encode, payloads, repeat):
+    objects = [decode(payload) for payload in payloads]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for payload in payloads:
+            decode(payload)
+    decode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for obj in objects:
+            encode(obj)
+    encode_time = time.perf_counter() - start
+
+    print(
+        "{0:<8} decode: {1:9.3f} ms  encode: {2:9.3f} ms".format(
+            name, decode_time * 1000 / repeat, encode_time * 1000 / repeat
+        )
+    )
+    return decode_time + encode_time
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("cassettes", nargs="+", help="Cassette files")
+    argparser.add_argument(
+        "--repeat", type=int, default=20, help="Number of passes over the payloads"
+    )
+    args = argparser.parse_args()
+
+    payloads = load_payloads(args.cassettes)
+    print(
+        "{0} payloads, {1} bytes, times per pass".format(
+            len(payloads), sum(len(payload) for payload in payloads)
+        )
+    )
+
+    # the codec functions of the connector are measured with each backend
+    orjson = trackme_json.orjson
+    try:
+        trackme_json.orjson = None
+        stdlib_time = run(
+            "json",
+            trackme_json.json_decode,
+            trackme_json.json_encode,
+            payloads,
+            args.repeat,
+        )
+
+        if not orjson:
+            print("orjson is not installed, only the standard library was measured")
+            return
+
+        trackme_json.orjson = orjson
+        orjson_time = run(
+            "orjson",
+            trackme_json.json_decode,
+            trackme_json.json_encode,
+            payloads,
+            args.repeat,
+        )
+    finally:
+        trackme_json.orjson = orjson
+    print("orjson speedup: {0:.1f}x".format(stdlib_time / orjson_time))
+
+
+if __name__ == "__main__":
+    main()
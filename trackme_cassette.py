@@ -0,0 +1,208 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Python 3 Compatibility imports
+from __future__ import print_function, unicode_literals
+
+__author__ = "TrackMe Limited"
+__copyright__ = "Copyright 2024, TrackMe Limited, U.K."
+__credits__ = "TrackMe Limited, U.K."
+__license__ = "TrackMe Limited, all rights reserved"
+__version__ = "0.1.0"
+__maintainer__ = "TrackMe Limited, U.K."
+__email__ = "support@trackme-solutions.com"
+__status__ = "PRODUCTION"
+
+import collections
+import gzip
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+from trackme_consts import *
+from trackme_utils import request_fingerprint
+
+
+class CassetteScrubber(object):
+    """
+    Scrub the secrets of the HTTP interactions recorded into a cassette: the bearer token and
+    the splunkd hosts are replaced wherever they appear, and the values of the params and JSON
+    fields named like a secret (see TRACKME_CASSETTE_SCRUBBED_FIELDS) are replaced as well.
+
+    The player scrubs the requests it replays the same way, so that they match the recording.
+    """
+
+    def __init__(self, token, urls):
+        self._replacements = []
+        if token:
+            self._replacements.append((token, TRACKME_CASSETTE_SCRUBBED_TOKEN))
+        for i, url in enumerate(urls):
+            host = urlparse(url).hostname
+            if host:
+                self._replacements.append(
+                    (host, TRACKME_CASSETTE_SCRUBBED_HOST.format(i))
+                )
+
+    def text(self, value):
+        if value is None:
+            return None
+        if not isinstance(value, str):
+            value = json.dumps(value)
+        for secret, placeholder in self._replacements:
+            value = value.replace(secret, placeholder)
+        return value
+
+    def _fields(self, value):
+        if isinstance(value, dict):
+            return {
+                key: (
+                    TRACKME_CASSETTE_SCRUBBED_VALUE
+                    if _is_secret_field(key)
+                    else self._fields(item)
+                )
+                for key, item in value.items()
+            }
+        if isinstance(value, list):
+            return [self._fields(item) for item in value]
+        if isinstance(value, str):
+            return self.text(value)
+        return value
+
+    def params(self, params):
+        if not params:
+            return params
+        return self._fields(dict(params))
+
+    def body(self, body):
+        """
+        Scrub a request body or a response text, the fields of JSON documents are scrubbed
+        """
+
+        if isinstance(body, bytes):
+            body = body.decode("utf-8")
+        if not body:
+            return body
+        if isinstance(body, str):
+            try:
+                document = json.loads(body)
+            except ValueError:
+                return self.text(body)
+        else:
+            document = body
+        return json.dumps(self._fields(document))
+
+
+def _is_secret_field(name):
+    name = str(name).lower()
+    return any(word in name for word in TRACKME_CASSETTE_SCRUBBED_FIELDS)
+
+
+class CassetteRecorder(object):
+    """
+    Record the HTTP interactions with splunkd into a cassette file.
+
+    A cassette is a gzip compressed NDJSON file, one interaction per line, the secrets are
+    scrubbed from everything which is recorded (see CassetteScrubber). Interactions are
+    buffered and written as a single gzip stream when the recorder is closed, at the end of
+    the action run, the recordings of successive action runs are appended to the cassette.
+    """
+
+    def __init__(self, file_path, token, urls):
+        self._file_path = file_path
+        self._lock = threading.Lock()
+        self._scrubber = CassetteScrubber(token, urls)
+        self._lines = []
+
+    def record(self, method, endpoint, params, body, response, elapsed):
+        interaction = {
+            "method": method.lower(),
+            "endpoint": endpoint,
+            "params": self._scrubber.params(params),
+            "body": self._scrubber.body(body),
+            "status_code": response.status_code,
+            "content_type": response.headers.get("Content-Type", ""),
+            "text": self._scrubber.body(response.text),
+            "elapsed": round(elapsed, 6),
+        }
+
+        line = json.dumps(interaction, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._lines.append(line)
+
+    def close(self):
+        with self._lock:
+            lines, self._lines = self._lines, []
+        if lines:
+            with gzip.open(self._file_path, "at", encoding="utf-8") as f:
+                f.writelines(lines)
+
+
+class CassetteResponse(object):
+    """
+    Replayed response, exposes the subset of requests.Response used by the connector
+    """
+
+    def __init__(self, interaction):
+        self.status_code = interaction["status_code"]
+        self.headers = {"Content-Type": interaction["content_type"]}
+        self.text = interaction["text"] or ""
+
+    @property
+    def content(self):
+        return self.text.encode("utf-8")
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class CassettePlayer(object):
+    """
+    Replay the HTTP interactions of a cassette, without any network access.
+
+    Interactions are matched on their method, endpoint, parameters and body, identical
+    requests are replayed in the order they were recorded (the last one is reused once
+    exhausted). The recorded timing is reproduced, multiplied by time_scale (0 disables it).
+    token and urls scrub the requests the same way as when they were recorded.
+    """
+
+    def __init__(self, file_path, time_scale=1.0, token=None, urls=()):
+        self._time_scale = time_scale
+        self._scrubber = CassetteScrubber(token, urls)
+        self._lock = threading.Lock()
+        self._interactions = collections.defaultdict(collections.deque)
+
+        with gzip.open(file_path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                interaction = json.loads(line)
+                key = request_fingerprint(
+                    interaction["method"],
+                    interaction["endpoint"],
+                    interaction["params"],
+                    interaction["body"],
+                )
+                self._interactions[key].append(interaction)
+
+    def play(self, method, endpoint, params, body):
+        """
+        Return the recorded response for this request, None if it was not recorded
+        """
+
+        key = request_fingerprint(
+            method, endpoint, self._scrubber.params(params), self._scrubber.body(body)
+        )
+        with self._lock:
+            interactions = self._interactions.get(key)
+            if not interactions:
+                return None
+            if len(interactions) > 1:
+                interaction = interactions.popleft()
+            else:
+                interaction = interactions[0]
+
+        if self._time_scale > 0:
+            time.sleep(interaction["elapsed"] * self._time_scale)
+
+        return CassetteResponse(interaction)
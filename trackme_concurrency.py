@@ -0,0 +1,148 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Python 3 Compatibility imports
+from __future__ import print_function, unicode_literals
+
+__author__ = "TrackMe Limited"
+__copyright__ = "Copyright 2024, TrackMe Limited, U.K."
+__credits__ = "TrackMe Limited, U.K."
+__license__ = "TrackMe Limited, all rights reserved"
+__version__ = "0.1.0"
+__maintainer__ = "TrackMe Limited, U.K."
+__email__ = "support@trackme-solutions.com"
+__status__ = "PRODUCTION"
+
+import collections
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from trackme_consts import *
+
+
+class AdaptiveConcurrencyLimiter(object):
+    """
+    Adaptive concurrency limit of fan-out operations, using additive increase / multiplicative
+    decrease (AIMD):
+
+    - while the requests succeed within TRACKME_CONCURRENCY_LATENCY_TOLERANCE times the baseline
+      latency of their endpoint class, and the limit is fully used, the limit grows by TRACKME_CONCURRENCY_INCREASE per
+      round of requests
+    - a throttled or failed request, or a request much slower than the baseline, cuts the limit
+      by TRACKME_CONCURRENCY_DECREASE, at most once per round of requests
+
+    The baseline latency is learned per endpoint class (see get_endpoint_class), so that the slow
+    ML endpoints do not make the fast reads look slow, or the other way around.
+
+    The learned limit and the baseline latencies are kept in the connector state, so that the next
+    action runs start from the last known limit.
+    """
+
+    def __init__(self, state, max_limit, min_limit=TRACKME_CONCURRENCY_MIN):
+        self._min_limit = min_limit
+        self._max_limit = max(max_limit, min_limit)
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._last_decrease = 0
+
+        # state is the dictionary persisted in the connector state
+        self._state = state
+        self._state.setdefault("limit", float(self._min_limit))
+        self._state.setdefault("baseline_latencies", {})
+        # single baseline of all endpoints, kept by the previous versions
+        self._state.pop("baseline_latency", None)
+        self._state["limit"] = min(
+            max(self._state["limit"], self._min_limit), self._max_limit
+        )
+
+    @property
+    def limit(self):
+        return int(self._state["limit"])
+
+    def is_enabled(self):
+        return self._max_limit > 1
+
+    def _under_pressure(self, latency, status_code, endpoint_class):
+        if (
+            status_code is None
+            or status_code in TRACKME_CONCURRENCY_PRESSURE_STATUS_CODES
+        ):
+            return True
+
+        baselines = self._state["baseline_latencies"]
+        baseline = baselines.get(endpoint_class)
+        if baseline is None:
+            baselines[endpoint_class] = latency
+            return False
+
+        # the baseline follows the fastest responses, and drifts up slowly so that a single
+        # very fast response does not make every later response look slow
+        baselines[endpoint_class] = min(
+            latency, baseline * (1 + TRACKME_CONCURRENCY_BASELINE_DRIFT)
+        )
+        return latency > baseline * TRACKME_CONCURRENCY_LATENCY_TOLERANCE
+
+    def observe(self, request_start, latency, status_code, endpoint_class):
+        """
+        Adjust the limit from the outcome of a request to an endpoint of endpoint_class,
+        status_code is None if the request failed to be sent
+        """
+
+        with self._condition:
+            limit = self._state["limit"]
+
+            if self._under_pressure(latency, status_code, endpoint_class):
+                # requests sent before the last decrease belong to the same round, they were
+                # already accounted for
+                if request_start > self._last_decrease:
+                    self._state["limit"] = max(
+                        self._min_limit, limit * TRACKME_CONCURRENCY_DECREASE
+                    )
+                    self._last_decrease = time.time()
+
+            # only grow while the current limit is fully used, an idle limit says nothing
+            elif self._in_flight >= int(limit):
+                self._state["limit"] = min(
+                    self._max_limit, limit + TRACKME_CONCURRENCY_INCREASE / limit
+                )
+
+            self._condition.notify_all()
+
+    def _acquire(self):
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def _release(self, future):
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def imap(self, func, items):
+        """
+        Call func for each item with at most limit calls in flight, the items are consumed lazily
+        and the results are yielded in the order of the items
+        """
+
+        pending = collections.deque()
+        executor = ThreadPoolExecutor(max_workers=self._max_limit)
+        try:
+            for item in items:
+                self._acquire()
+                future = executor.submit(func, item)
+                future.add_done_callback(self._release)
+                pending.append(future)
+
+                while pending and pending[0].done():
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+
+        finally:
+            # the caller stopped early, do not start the calls which are still queued
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
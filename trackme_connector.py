@@ -15,14 +15,39 @@ __status__ = "PRODUCTION"
 
 # Phantom App imports
 import phantom.app as phantom
+import phantom.rules as ph_rules
 from phantom.base_connector import BaseConnector
 from phantom.action_result import ActionResult
+from phantom.vault import Vault
 
 # Usage of the consts file is recommended
-# from trackme_consts import *
+from trackme_consts import *
 import requests
+import copy
+import heapq
 import json
+import os
+import threading
+import time
+import uuid
 from bs4 import BeautifulSoup
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from trackme_cassette import CassettePlayer, CassetteRecorder
+from trackme_concurrency import AdaptiveConcurrencyLimiter
+from trackme_json import json_decode, json_decode_items, json_encode, json_encode_text
+from trackme_logging import LazyDebugLogger
+from trackme_plans import PlanStore
+from trackme_poll import PollContainers, alert_container, poll_container, spooled_alerts
+from trackme_profiling import ActionProfiler
+from trackme_ratelimit import TokenBucketRateLimiter, get_endpoint_class
+from trackme_records import EntityRecord, EntityStateIndex, GroupRecord
+from trackme_singleflight import SingleFlight
+from trackme_splunkd import SplunkdPool
+from trackme_stats import EntityStatsAggregator
+from trackme_utils import apply_parameter_spec, chunked
+from trackme_vault import NdjsonVaultWriter, iter_vault_objects
+from trackme_webhook import AlertSpool, webhook_dir
 
 
 class RetVal(tuple):
@@ -48,6 +73,48 @@ class TrackmeConnector(BaseConnector):
         self._verify_ssl = None
         self._headers = dict()
 
+        # Pool of splunkd members, with health information kept in the connector state
+        self._splunkd_pool = None
+
+        # Record/replay of the HTTP interactions with splunkd
+        self._cassette_recorder = None
+        self._cassette_player = None
+
+        # Lazy debug logging, messages are only formatted when debug logging is enabled
+        self._debug_logger = LazyDebugLogger(self.debug_print)
+
+        # HTTP sessions, connections to splunkd are reused by the requests of the action run,
+        # requests.Session is not thread-safe: each thread has its own session
+        self._sessions = threading.local()
+        self._all_sessions = []
+        self._sessions_lock = threading.Lock()
+
+        # batch_execute: action identifier and action results of the sub-operation run by the thread
+        self._batch_context = threading.local()
+        self._action_parameters = None
+
+        # Plan mode: write requests are captured here instead of being sent
+        self._planned_requests = None
+
+        # Adaptive concurrency of fan-out operations, disabled unless max_concurrency > 1
+        self._concurrency = None
+
+        # Push mode: spool of the alerts received by the app REST handler
+        self._alert_spool = None
+
+        # Protects the connector state updated while requests are in flight
+        self._state_lock = threading.Lock()
+
+        # Rate limiter toward splunkd, shared across connector processes
+        self._rate_limiter = None
+
+        # Coalescing of identical in-flight reads across connector processes
+        self._single_flight = None
+
+    def _debug(self, template, *args):
+        # template is formatted with args only if debug logging is enabled, large payloads are truncated
+        self._debug_logger.debug(template, *args)
+
     def _process_empty_response(self, response, action_result):
         if response.status_code == 200:
             return RetVal(phantom.APP_SUCCESS, {})
@@ -79,10 +146,14 @@ class TrackmeConnector(BaseConnector):
         message = message.replace("{", "{{").replace("}", "}}")
         return RetVal(action_result.set_status(phantom.APP_ERROR, message), None)
 
-    def _process_json_response(self, r, action_result):
-        # Try a json parse
+    def _process_json_response(self, r, action_result, records=None):
+        # Try a json parse, straight from the response bytes, the records of a successful
+        # response are passed to records one at a time when it is set
         try:
-            resp_json = r.json()
+            if records is not None and 200 <= r.status_code < 399:
+                resp_json = json_decode_items(r.content, "data", records)
+            else:
+                resp_json = json_decode(r.content)
         except Exception as e:
             return RetVal(
                 action_result.set_status(
@@ -103,7 +174,7 @@ class TrackmeConnector(BaseConnector):
 
         return RetVal(action_result.set_status(phantom.APP_ERROR, message), None)
 
-    def _process_response(self, r, action_result):
+    def _process_response(self, r, action_result, records=None):
         # store the r_text in debug data, it will get dumped in the logs if the action fails
         if hasattr(action_result, "add_debug_data"):
             action_result.add_debug_data({"r_status_code": r.status_code})
@@ -114,7 +185,7 @@ class TrackmeConnector(BaseConnector):
 
         # Process a json response
         if "json" in r.headers.get("Content-Type", ""):
-            return self._process_json_response(r, action_result)
+            return self._process_json_response(r, action_result, records)
 
         # Process an HTML response, Do this no matter what the api talks.
         # There is a high chance of a PROXY in between phantom and the rest of
@@ -142,11 +213,73 @@ class TrackmeConnector(BaseConnector):
         body=None,
         headers=None,
         method="get",
+        records=None,
         **kwargs,
     ):
         # **kwargs can be any additional parameters that requests.request accepts
+        # records, if set, is called with each record of the data of the response, or of the
+        # response itself when it is an array, instead of returning them (see json_decode_items)
+
+        # Plan mode: writes are captured into the plan instead of being sent, reads are performed
+        if (
+            self._planned_requests is not None
+            and get_endpoint_class(endpoint) != TRACKME_ENDPOINT_CLASS_READ
+        ):
+            return RetVal(
+                phantom.APP_SUCCESS, self._plan_request(endpoint, method, params, body)
+            )
 
-        config = self.get_config()
+        # Coalesce identical in-flight reads across concurrent action runs, the first caller
+        # performs the request and the others reuse its result
+        coalesce_key = None
+        if (
+            self._single_flight
+            and records is None
+            and get_endpoint_class(endpoint) == TRACKME_ENDPOINT_CLASS_READ
+        ):
+            coalesce_key = self._single_flight.fingerprint(
+                method, endpoint, params, body
+            )
+            found, resp_json = self._single_flight.join(coalesce_key)
+            if found:
+                self._debug("coalesced read for endpoint={0}", endpoint)
+                return RetVal(phantom.APP_SUCCESS, resp_json)
+
+        # the leader always releases the flight, so that the waiters do not wait for it if the
+        # request fails or raises
+        try:
+            ret_val, resp_json = self._send_rest_call(
+                endpoint,
+                action_result,
+                params=params,
+                body=body,
+                headers=headers,
+                method=method,
+                records=records,
+                **kwargs,
+            )
+            if coalesce_key and phantom.is_success(ret_val):
+                self._single_flight.publish(coalesce_key, resp_json)
+        finally:
+            if coalesce_key:
+                self._single_flight.abandon(coalesce_key)
+
+        return RetVal(ret_val, resp_json)
+
+    def _send_rest_call(
+        self,
+        endpoint,
+        action_result,
+        params=None,
+        body=None,
+        headers=None,
+        method="get",
+        records=None,
+        **kwargs,
+    ):
+        # **kwargs can be any additional parameters that requests.request accepts
+        # records, if set, is called with each record of the data of the response, or of the
+        # response itself when it is an array, instead of returning them (see json_decode_items)
 
         if headers is None:
             headers = self._headers
@@ -154,7 +287,7 @@ class TrackmeConnector(BaseConnector):
         resp_json = None
 
         try:
-            request_func = getattr(requests, method)
+            request_func = getattr(self._get_session(), method)
         except AttributeError:
             return RetVal(
                 action_result.set_status(
@@ -163,39 +296,225 @@ class TrackmeConnector(BaseConnector):
                 resp_json,
             )
 
-        # Create a URL to connect to
-        url = self._splunk_url + endpoint
+        endpoint_class = get_endpoint_class(endpoint)
+
+        # Apply the rate limit of the endpoint class, this blocks or fails fast depending on the policy
+        if self._rate_limiter:
+            if not self._rate_limiter.acquire(endpoint_class):
+                return RetVal(
+                    action_result.set_status(
+                        phantom.APP_ERROR,
+                        "Rate limit exceeded for endpoint class={0}, endpoint={1}".format(
+                            endpoint_class, endpoint
+                        ),
+                    ),
+                    resp_json,
+                )
 
-        """ for debug purposes
-        self.debug_print("url : " + url)
-        self.debug_print(headers)
-        self.debug_print(f"verify: {self._verify_ssl}")
-        """
+        # Replay mode: serve the recorded interaction, without any network access
+        if self._cassette_player:
+            r = self._cassette_player.play(method, endpoint, params, body)
+            if r is None:
+                return RetVal(
+                    action_result.set_status(
+                        phantom.APP_ERROR,
+                        "No recorded interaction in the cassette for method={0}, endpoint={1}".format(
+                            method, endpoint
+                        ),
+                    ),
+                    resp_json,
+                )
+            return self._process_response(r, action_result, records)
 
-        try:
-            r = request_func(
-                url,
-                data=body,
-                params=params,
-                headers=headers,
-                verify=self._verify_ssl,
-                **kwargs,
-            )
-        except Exception as e:
+        # Try the splunkd members in order of preference, fail over to the next member if one
+        # cannot be reached, writes only fail over if the request could not be sent at all
+        nodes = self._splunkd_pool.candidates(endpoint_class)
+        if not nodes:
             return RetVal(
                 action_result.set_status(
-                    phantom.APP_ERROR,
-                    "Error Connecting to server. Details: {0}".format(str(e)),
+                    phantom.APP_ERROR, "No splunkd member is configured in splunk_url"
                 ),
                 resp_json,
             )
 
-        return self._process_response(r, action_result)
+        for node in nodes:
+
+            # Create a URL to connect to
+            url = node + endpoint
+
+            """ for debug purposes
+            self.debug_print("url : " + url)
+            self.debug_print(headers)
+            self.debug_print(f"verify: {self._verify_ssl}")
+            """
+
+            request_start = time.time()
+            try:
+                r = request_func(
+                    url,
+                    data=body,
+                    params=params,
+                    headers=headers,
+                    verify=self._verify_ssl,
+                    **kwargs,
+                )
+            except Exception as e:
+                self._splunkd_pool.mark_failure(node)
+                self._observe_concurrency(endpoint_class, request_start, None)
+                if node != nodes[-1] and (
+                    endpoint_class == TRACKME_ENDPOINT_CLASS_READ
+                    or isinstance(e, requests.exceptions.ConnectionError)
+                ):
+                    self._debug("failing over from splunkd member={0}: {1}", node, e)
+                    continue
+
+                return RetVal(
+                    action_result.set_status(
+                        phantom.APP_ERROR,
+                        "Error Connecting to server. Details: {0}".format(str(e)),
+                    ),
+                    resp_json,
+                )
+
+            self._observe_concurrency(endpoint_class, request_start, r.status_code)
+
+            if (
+                r.status_code in TRACKME_FAILOVER_STATUS_CODES
+                and endpoint_class == TRACKME_ENDPOINT_CLASS_READ
+                and node != nodes[-1]
+            ):
+                self._splunkd_pool.mark_failure(node)
+                self._debug(
+                    "failing over from splunkd member={0}, status_code={1}",
+                    node,
+                    r.status_code,
+                )
+                continue
+
+            # a server error is not a sign of health, the member is only marked as failed for
+            # the statuses which trigger a fail over
+            if r.status_code < 500:
+                self._splunkd_pool.mark_success(node, time.time() - request_start)
+            elif r.status_code in TRACKME_FAILOVER_STATUS_CODES:
+                self._splunkd_pool.mark_failure(node)
+            self._record_latency(endpoint, time.time() - request_start)
+            break
+
+        # Record mode: capture the interaction into the cassette
+        if self._cassette_recorder:
+            self._cassette_recorder.record(
+                method, endpoint, params, body, r, time.time() - request_start
+            )
+
+        return self._process_response(r, action_result, records)
+
+    def _get_session(self):
+        # session of the calling thread, created on its first request
+        session = getattr(self._sessions, "session", None)
+        if session is None:
+            session = requests.Session()
+            self._sessions.session = session
+            with self._sessions_lock:
+                self._all_sessions.append(session)
+        return session
+
+    def _observe_concurrency(self, endpoint_class, request_start, status_code):
+        # feed the outcome of the request to the adaptive concurrency limit
+        if self._concurrency:
+            self._concurrency.observe(
+                request_start, time.time() - request_start, status_code, endpoint_class
+            )
+
+    def _fan_out(self, func, items, default_concurrency=1):
+        """
+        Call func for each item, concurrently within the adaptive concurrency limit if enabled,
+        or with at most default_concurrency calls in flight otherwise, the results are returned
+        in the order of the items.
+
+        func may run in worker threads: it must use its own ActionResult for its requests, the
+        outcome and the debug data are reported on the action result by the calling thread (see
+        _fan_out_merge and _fan_out_failure).
+        """
+
+        # planned writes must be captured in order, plans are always computed sequentially, and
+        # the sub-operations of batch_execute already run concurrently
+        if self._planned_requests is not None or getattr(
+            self._batch_context, "action_id", None
+        ):
+            return map(func, items)
+
+        if self._concurrency:
+            return self._concurrency.imap(func, items)
+
+        if default_concurrency > 1:
+            with ThreadPoolExecutor(max_workers=default_concurrency) as executor:
+                return list(executor.map(func, items))
+
+        return map(func, items)
+
+    def _fan_out_merge(self, action_result, worker_result):
+        # add the debug data of a fan-out call, made with its own action result, to the action
+        for debug_data in worker_result.get_debug_data():
+            action_result.add_debug_data(debug_data)
+
+    def _fan_out_failure(self, action_result, worker_result):
+        # report the failure of a fan-out call, made with its own action result, on the action
+        return action_result.set_status(phantom.APP_ERROR, worker_result.get_message())
+
+    def _record_latency(self, endpoint, elapsed):
+        # latency statistics per endpoint, kept in the connector state and used to estimate plans
+        with self._state_lock:
+            latency_stats = self._state.setdefault("latency_stats", {})
+            stats = latency_stats.get(endpoint)
+            if stats is None:
+                latency_stats[endpoint] = {"count": 1, "avg": elapsed, "max": elapsed}
+            else:
+                stats["count"] += 1
+                stats["avg"] = (
+                    TRACKME_LATENCY_STATS_ALPHA * elapsed
+                    + (1 - TRACKME_LATENCY_STATS_ALPHA) * stats["avg"]
+                )
+                stats["max"] = max(stats["max"], elapsed)
+
+    def _probe_splunkd_node(self, url):
+        """
+        Probe the health of a splunkd member and record the result in the pool
+        """
+
+        request_start = time.time()
+        try:
+            r = self._get_session().get(
+                url + TRACKME_HEALTH_ENDPOINT,
+                headers=self._headers,
+                verify=self._verify_ssl,
+                timeout=TRACKME_HEALTH_PROBE_TIMEOUT,
+            )
+            healthy = r.status_code == 200
+        except Exception as e:
+            self._debug("health probe failed for splunkd member={0}: {1}", url, e)
+            healthy = False
+
+        if healthy:
+            self._splunkd_pool.mark_success(url, time.time() - request_start)
+        else:
+            self._splunkd_pool.mark_probe_failure(url)
+
+        return healthy
 
     def _handle_test_connectivity(self, param):
         # Add an action result object to self (BaseConnector) to represent the action for this param
         action_result = self.add_action_result(ActionResult(dict(param)))
 
+        # Probe every splunkd member when several members are configured
+        if len(self._splunkd_pool.urls) > 1 and not self._cassette_player:
+            for url in self._splunkd_pool.urls:
+                healthy = self._probe_splunkd_node(url)
+                self.save_progress(
+                    "splunkd member {0} is {1}".format(
+                        url, "healthy" if healthy else "unhealthy"
+                    )
+                )
+
         self.save_progress("Connecting to endpoint")
         # make rest call
         ret_val, response = self._make_rest_call(
@@ -208,10 +527,275 @@ class TrackmeConnector(BaseConnector):
         if phantom.is_fail(ret_val):
             return action_result.get_status()
 
+        # health and latency of the splunkd members, as recorded by the pool
+        action_result.update_summary({"splunkd_members": self._splunkd_pool.status()})
+
         # Return success
         self.save_progress("Test Connectivity Passed")
         return action_result.set_status(phantom.APP_SUCCESS)
 
+    def _start_job(self, job_id, job_params):
+        """
+        Return the checkpoint of a bulk job, resumed from the state if the job is known, or None
+        if the job is known but was started with different parameters.
+        """
+
+        now = time.time()
+        with self._state_lock:
+            jobs = self._state.setdefault("jobs", {})
+
+            # purge the checkpoints of the jobs which were never resumed
+            for known_job_id in list(jobs):
+                if now - jobs[known_job_id]["updated"] > TRACKME_JOB_MAX_AGE:
+                    del jobs[known_job_id]
+
+            job = jobs.get(job_id)
+            if job is None:
+                job = dict(job_params, completed_chunks=[], created=now, updated=now)
+                jobs[job_id] = job
+            elif any(job.get(key) != value for key, value in job_params.items()):
+                return None
+
+        return job
+
+    def _checkpoint_job(self, job, offset):
+        # the state is saved right away, so that the progress survives the action being killed
+        with self._state_lock:
+            job["completed_chunks"].append(offset)
+            job["updated"] = time.time()
+            self.save_state(self._state)
+
+    def _finish_job(self, job_id):
+        with self._state_lock:
+            self._state.get("jobs", {}).pop(job_id, None)
+            self.save_state(self._state)
+
+    def _get_vault_file_path(self, action_result, vault_id):
+        try:
+            success, message, vault_info = ph_rules.vault_info(vault_id=vault_id)
+            file_path = list(vault_info)[0]["path"]
+        except Exception as e:
+            return RetVal(
+                action_result.set_status(
+                    phantom.APP_ERROR,
+                    "Unable to find the vault file vault_id={0}. Details: {1}".format(
+                        vault_id, str(e)
+                    ),
+                ),
+                None,
+            )
+
+        return RetVal(phantom.APP_SUCCESS, file_path)
+
+    def _get_chunk_size(self, action_result, param):
+        try:
+            chunk_size = int(
+                param.get("chunk_size") or TRACKME_VAULT_DEFAULT_CHUNK_SIZE
+            )
+        except (TypeError, ValueError):
+            chunk_size = 0
+
+        if chunk_size < 1:
+            return RetVal(
+                action_result.set_status(
+                    phantom.APP_ERROR,
+                    "Invalid chunk_size={0}, it must be a positive integer".format(
+                        param.get("chunk_size")
+                    ),
+                ),
+                None,
+            )
+
+        return RetVal(phantom.APP_SUCCESS, chunk_size)
+
+    def _run_vault_chunks(
+        self, action_result, vault_id, chunk_size, process_chunk, job_id=None
+    ):
+        """
+        Stream the entities of a vault file (CSV or NDJSON) and process them by chunks.
+
+        process_chunk is called with an ActionResult of its own and each list of entities, and
+        returns a RetVal of the TrackMe response, responses are added to the action data and their
+        counters are summed. Chunks may be processed concurrently, the first failure is reported
+        on action_result.
+
+        The completed chunks are checkpointed in the state under job_id (generated if not
+        provided), a run with the same job_id resumes after the chunks already completed.
+        """
+
+        ret_val, file_path = self._get_vault_file_path(action_result, vault_id)
+        if phantom.is_fail(ret_val):
+            return RetVal(ret_val, None)
+
+        # planned writes are not sent, there is nothing to checkpoint
+        job = None
+        if self._planned_requests is None:
+            job_id = job_id or str(uuid.uuid4())
+            job = self._start_job(
+                job_id,
+                {
+                    "action": self.get_action_identifier(),
+                    "vault_id": vault_id,
+                    "chunk_size": chunk_size,
+                },
+            )
+            if job is None:
+                return RetVal(
+                    action_result.set_status(
+                        phantom.APP_ERROR,
+                        "The job job_id={0} was started with a different action, vault_id or chunk_size".format(
+                            job_id
+                        ),
+                    ),
+                    None,
+                )
+            action_result.update_summary({"job_id": job_id})
+
+        completed_chunks = set(job["completed_chunks"]) if job else set()
+        totals = {"chunks_processed": 0, "entities_processed": 0, "chunks_skipped": 0}
+
+        def _process(indexed_chunk):
+            offset, chunk = indexed_chunk
+            if offset in completed_chunks:
+                return chunk, None, None
+
+            chunk_result = ActionResult()
+            ret_val, response = process_chunk(chunk_result, chunk)
+            if job and not phantom.is_fail(ret_val):
+                self._checkpoint_job(job, offset)
+            return chunk, RetVal(ret_val, response), chunk_result
+
+        try:
+            indexed_chunks = (
+                (index * chunk_size, chunk)
+                for index, chunk in enumerate(
+                    chunked(iter_vault_objects(file_path), chunk_size)
+                )
+            )
+            for chunk, result, chunk_result in self._fan_out(_process, indexed_chunks):
+
+                # chunk completed by a previous run of the job
+                if result is None:
+                    totals["chunks_skipped"] += 1
+                    continue
+
+                self._fan_out_merge(action_result, chunk_result)
+                ret_val, response = result
+                if phantom.is_fail(ret_val):
+                    return RetVal(
+                        self._fan_out_failure(action_result, chunk_result), totals
+                    )
+
+                totals["chunks_processed"] += 1
+                totals["entities_processed"] += len(chunk)
+
+                if isinstance(response, list):
+                    for item in response:
+                        action_result.add_data(item)
+                elif response is not None:
+                    action_result.add_data(response)
+                    if isinstance(response, dict):
+                        for field in (
+                            "process_count",
+                            "success_count",
+                            "failures_count",
+                        ):
+                            if isinstance(response.get(field), int):
+                                totals[field] = totals.get(field, 0) + response[field]
+
+                self.save_progress(
+                    "Processed {0} entities from vault file".format(
+                        totals["entities_processed"]
+                    )
+                )
+
+        except (OSError, ValueError) as e:
+            return RetVal(
+                action_result.set_status(
+                    phantom.APP_ERROR,
+                    "Unable to read the vault file vault_id={0}. Details: {1}".format(
+                        vault_id, str(e)
+                    ),
+                ),
+                totals,
+            )
+
+        if job:
+            self._finish_job(job_id)
+
+        return RetVal(phantom.APP_SUCCESS, totals)
+
+    def _spill_to_vault(self, action_result, records, name):
+        """
+        Stream records into a gzip compressed NDJSON file added to the vault of the container,
+        returns the vault id, the record count and a small aggregate summary of the records.
+        """
+
+        container_id = self.get_container_id()
+        if not container_id:
+            return RetVal(
+                action_result.set_status(
+                    phantom.APP_ERROR,
+                    "output_mode=vault requires the action to run against a container",
+                ),
+                None,
+            )
+
+        file_name = "trackme_{0}_{1}.ndjson.gz".format(name, int(time.time() * 1000))
+        file_path = os.path.join(Vault.get_vault_tmp_dir(), file_name)
+
+        try:
+            with NdjsonVaultWriter(file_path, TRACKME_SPILL_SUMMARY_FIELDS) as writer:
+                for record in records:
+                    writer.write(record)
+
+            success, message, vault_id = ph_rules.vault_add(
+                container=container_id, file_location=file_path, file_name=file_name
+            )
+        except Exception as e:
+            return RetVal(
+                action_result.set_status(
+                    phantom.APP_ERROR,
+                    "Unable to write the results to the vault. Details: {0}".format(
+                        str(e)
+                    ),
+                ),
+                None,
+            )
+
+        if not success:
+            return RetVal(
+                action_result.set_status(
+                    phantom.APP_ERROR,
+                    "Unable to add the results file to the vault. Details: {0}".format(
+                        message
+                    ),
+                ),
+                None,
+            )
+
+        spill = {"vault_id": vault_id, "file_name": file_name}
+        spill.update(writer.summary())
+        return RetVal(phantom.APP_SUCCESS, spill)
+
+    def _add_records(self, action_result, records, output_mode, name):
+        """
+        Add records to the action data, or spill them to a vault file if output_mode=vault,
+        returns the summary of the vault file in this case.
+        """
+
+        if output_mode != TRACKME_OUTPUT_MODE_VAULT:
+            for item in records:
+                action_result.add_data(item)
+            return RetVal(phantom.APP_SUCCESS, None)
+
+        ret_val, spill = self._spill_to_vault(action_result, records, name)
+        if phantom.is_fail(ret_val):
+            return RetVal(ret_val, None)
+
+        action_result.add_data(spill)
+        return RetVal(phantom.APP_SUCCESS, spill)
+
     def _handle_ack_get(self, param):
         self.save_progress(
             "In action handler for: {0}".format(self.get_action_identifier())
@@ -237,7 +821,7 @@ class TrackmeConnector(BaseConnector):
             "/services/trackme/v2/ack/get_ack_for_object",
             action_result,
             method="post",
-            body=json.dumps(body),
+            body=json_encode(body),
             params=None,
             headers=None,
         )
@@ -267,8 +851,8 @@ class TrackmeConnector(BaseConnector):
                 "object_category": object_category,
             }
 
-        summary["trackme_response"] = json.dumps(ack_response)
-        self.debug_print(f"ack_response: {ack_response}")
+        summary["trackme_response"] = json_encode_text(ack_response)
+        self._debug("ack_response: {0}", ack_response)
 
         # add data
         action_result.add_data(ack_response)
@@ -276,6 +860,158 @@ class TrackmeConnector(BaseConnector):
         self.save_progress("Ack get successful")
         return action_result.set_status(phantom.APP_SUCCESS)
 
+    def _handle_ack_renew_expiring(self, param):
+        self.save_progress(
+            "In action handler for: {0}".format(self.get_action_identifier())
+        )
+
+        # Add an action result object to self (BaseConnector) to represent the action for this param
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        # Parameters
+        tenant_id = param["tenant_id"]
+        object_category = param["object_category"]
+        window = int(param.get("window") or TRACKME_ACK_RENEW_DEFAULT_WINDOW)
+        ack_period = int(param.get("ack_period") or TRACKME_ACK_RENEW_DEFAULT_PERIOD)
+        ack_comment = param.get("ack_comment") or TRACKME_ACK_RENEW_DEFAULT_COMMENT
+        dry_run = param.get("dry_run", False)
+
+        ret_val, chunk_size = self._get_chunk_size(action_result, param)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # retrieve the acknowledgements of all entities at once
+        ret_val, response = self._make_rest_call(
+            "/services/trackme/v2/ack/get_ack_for_object",
+            action_result,
+            method="post",
+            body=json_encode(
+                {
+                    "tenant_id": tenant_id,
+                    "object_category": object_category,
+                    "object_list": "*",
+                }
+            ),
+            params=None,
+            headers=None,
+        )
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # heap of the active acknowledgements ordered by expiration, the index breaks the ties
+        # so that the objects and ack types are never compared
+        expirations = []
+        for ack in response or []:
+            if ack.get("ack_state") != "active" or not ack.get("object"):
+                continue
+            try:
+                ack_expiration = float(ack.get("ack_expiration"))
+            except (TypeError, ValueError):
+                continue
+            expirations.append(
+                (
+                    ack_expiration,
+                    len(expirations),
+                    ack.get("object"),
+                    ack.get("ack_type"),
+                )
+            )
+        acks_count = len(expirations)
+        heapq.heapify(expirations)
+
+        # pop the acknowledgements expiring within the window, soonest first
+        deadline = time.time() + window
+        expiring = []
+        while expirations and expirations[0][0] <= deadline:
+            expiring.append(heapq.heappop(expirations))
+
+        renewals = [
+            {
+                "object": object_value,
+                "previous_ack_expiration": ack_expiration,
+                "new_ack_expiration": None,
+                "ack_type": ack_type,
+                "ack_period": ack_period,
+                "status": "planned" if dry_run else "pending",
+            }
+            for ack_expiration, _, object_value, ack_type in expiring
+        ]
+
+        if not dry_run and renewals:
+
+            # renew by chunks, the ack type of each entity is preserved
+            chunks = []
+            renewals_by_type = {}
+            for renewal in renewals:
+                renewals_by_type.setdefault(renewal["ack_type"], []).append(renewal)
+            for ack_type, type_renewals in renewals_by_type.items():
+                for chunk in chunked(type_renewals, chunk_size):
+                    chunks.append((ack_type, chunk))
+
+            def _renew(typed_chunk):
+                ack_type, chunk = typed_chunk
+                body = {
+                    "tenant_id": tenant_id,
+                    "object_category": object_category,
+                    "object_list": ",".join(renewal["object"] for renewal in chunk),
+                    "action": "enable",
+                    "ack_period": ack_period,
+                    "ack_comment": ack_comment,
+                }
+                if ack_type:
+                    body["ack_type"] = ack_type
+
+                renew_result = ActionResult()
+                renewed_at = time.time()
+                ret_val, _ = self._make_rest_call(
+                    "/services/trackme/v2/ack/ack_manage",
+                    renew_result,
+                    method="post",
+                    body=json_encode(body),
+                    params=None,
+                    headers=None,
+                )
+                if phantom.is_fail(ret_val):
+                    return "failure", renew_result.get_message(), None
+                # the acknowledgements now expire ack_period seconds after their renewal
+                return "renewed", None, renewed_at + ack_period
+
+            for (ack_type, chunk), (status, message, new_ack_expiration) in zip(
+                chunks, self._fan_out(_renew, chunks)
+            ):
+                for renewal in chunk:
+                    renewal["status"] = status
+                    renewal["new_ack_expiration"] = new_ack_expiration
+                    if message:
+                        renewal["message"] = message
+
+        # add data
+        for renewal in renewals:
+            action_result.add_data(renewal)
+
+        # Add a dictionary that is made up of the most important values from data into the summary
+        summary = action_result.update_summary({})
+        summary["acks_count"] = acks_count
+        summary["expiring_count"] = len(renewals)
+        summary["renewed_count"] = len(
+            [renewal for renewal in renewals if renewal["status"] == "renewed"]
+        )
+        summary["failures_count"] = len(
+            [renewal for renewal in renewals if renewal["status"] == "failure"]
+        )
+
+        if summary["failures_count"]:
+            return action_result.set_status(
+                phantom.APP_ERROR,
+                "{0} acknowledgements could not be renewed, see the action results for details".format(
+                    summary["failures_count"]
+                ),
+            )
+
+        self.save_progress("Ack renew expiring successful")
+        return action_result.set_status(phantom.APP_SUCCESS)
+
     def _handle_ack_manage(self, param):
         # Implement the handler here
         # use self.save_progress(...) to send progress messages back to the platform
@@ -289,7 +1025,7 @@ class TrackmeConnector(BaseConnector):
         # Parameters
         tenant_id = param["tenant_id"]
         object_category = param["object_category"]
-        object_list = param["object_list"]
+        object_list = param.get("object_list", None)
         action = param["action"]
 
         # Optional parameters
@@ -297,6 +1033,22 @@ class TrackmeConnector(BaseConnector):
         ack_period = param.get("ack_period", None)
         ack_type = param.get("ack_type", None)
         update_comment = param.get("update_comment", None)
+        vault_id = param.get("vault_id", None)
+
+        ret_val, chunk_size = self._get_chunk_size(action_result, param)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # show retrieves all the Ack records if no entity is specified
+        if not object_list and not vault_id:
+            if action != "show":
+                return action_result.set_status(
+                    phantom.APP_ERROR,
+                    "Either object_list or vault_id must be provided for action={0}".format(
+                        action
+                    ),
+                )
+            object_list = "*"
 
         # body
         body = {
@@ -315,12 +1067,42 @@ class TrackmeConnector(BaseConnector):
         if update_comment:
             body["update_comment"] = update_comment
 
+        # entities read from a vault file are processed by chunks
+        if vault_id:
+
+            def process_chunk(chunk_result, chunk):
+                return self._make_rest_call(
+                    "/services/trackme/v2/ack/ack_manage",
+                    chunk_result,
+                    method="post",
+                    body=json_encode(dict(body, object_list=",".join(chunk))),
+                    params=None,
+                    headers=None,
+                )
+
+            ret_val, totals = self._run_vault_chunks(
+                action_result,
+                vault_id,
+                chunk_size,
+                process_chunk,
+                job_id=param.get("job_id"),
+            )
+
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+            summary = action_result.update_summary(totals)
+            summary["trackme_response"] = json_encode_text(totals)
+
+            self.save_progress("Ack manage successful")
+            return action_result.set_status(phantom.APP_SUCCESS)
+
         # make rest call
         ret_val, response = self._make_rest_call(
             "/services/trackme/v2/ack/ack_manage",
             action_result,
             method="post",
-            body=json.dumps(body),
+            body=json_encode(body),
             params=None,
             headers=None,
         )
@@ -334,12 +1116,12 @@ class TrackmeConnector(BaseConnector):
         summary = action_result.update_summary({})
 
         # resp_data
-        self.debug_print(f"response: {response}")
+        self._debug("response: {0}", response)
         process_count = response.get("process_count")
         success_count = response.get("success_count")
         failures_count = response.get("failures_count")
 
-        summary["trackme_response"] = json.dumps(response)
+        summary["trackme_response"] = json_encode_text(response)
         # self.debug_print(f'ack_response: {ack_response}')
 
         # add data
@@ -377,8 +1159,8 @@ class TrackmeConnector(BaseConnector):
         summary = action_result.update_summary({})
 
         # resp_data
-        self.debug_print(f"response: {response}")
-        summary["trackme_response"] = json.dumps(response)
+        self._debug("response: {0}", response)
+        summary["trackme_response"] = json_encode_text(response)
 
         # add data
         action_result.add_data(response)
@@ -425,7 +1207,7 @@ class TrackmeConnector(BaseConnector):
             "/services/trackme/v2/maintenance/global_maintenance_enable",
             action_result,
             method="post",
-            body=json.dumps(body),
+            body=json_encode(body),
             params=None,
             headers=None,
         )
@@ -439,9 +1221,9 @@ class TrackmeConnector(BaseConnector):
         summary = action_result.update_summary({})
 
         # resp_data
-        self.debug_print(f"response: {response}")
+        self._debug("response: {0}", response)
 
-        summary["trackme_response"] = json.dumps(response)
+        summary["trackme_response"] = json_encode_text(response)
         # self.debug_print(f'ack_response: {ack_response}')
 
         # add data
@@ -474,7 +1256,7 @@ class TrackmeConnector(BaseConnector):
             "/services/trackme/v2/maintenance/maintenance_disable",
             action_result,
             method="post",
-            body=json.dumps(body),
+            body=json_encode(body),
             params=None,
             headers=None,
         )
@@ -488,10 +1270,10 @@ class TrackmeConnector(BaseConnector):
         summary = action_result.update_summary({})
 
         # resp_data
-        self.debug_print(f"response: {response}")
+        self._debug("response: {0}", response)
 
-        summary["trackme_response"] = json.dumps(response)
-        self.debug_print(f"maintenance_response: {response}")
+        summary["trackme_response"] = json_encode_text(response)
+        self._debug("maintenance_response: {0}", response)
 
         # add data
         action_result.add_data(response)
@@ -509,6 +1291,7 @@ class TrackmeConnector(BaseConnector):
 
         # Parameters
         tenant_id = param.get("tenant_id", None)
+        output_mode = param.get("output_mode", TRACKME_OUTPUT_MODE_DATA)
 
         # body
         body = {}
@@ -534,13 +1317,20 @@ class TrackmeConnector(BaseConnector):
         # Add a dictionary that is made up of the most important values from data into the summary
         summary = action_result.update_summary({})
 
+        # add data (response is a list), or spill it to the vault
+        ret_val, spill = self._add_records(
+            action_result, response, output_mode, "tenants_ops_status"
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
         # resp_data
         # self.debug_print(f'response: {response}')
-        summary["trackme_response"] = json.dumps(response)
-
-        # add data (response is a list)
-        for item in response:
-            action_result.add_data(item)
+        if spill:
+            summary["record_count"] = spill["record_count"]
+            summary["vault_id"] = spill["vault_id"]
+        else:
+            summary["trackme_response"] = json_encode_text(response)
 
         self.save_progress("Get TrackMe Tenants Ops status successful")
         return action_result.set_status(phantom.APP_SUCCESS)
@@ -590,25 +1380,30 @@ class TrackmeConnector(BaseConnector):
                 "No remote accounts configured were found on this TrackMe instance."
             )
 
-        # Iterate over the accounts and check connectivity
-        for remote_account in remote_accounts_list:
-            body["account"] = remote_account
+        def _check_account(remote_account):
+            account_result = ActionResult()
             ret_val, response = self._make_rest_call(
                 "/services/trackme/v2/configuration/test_remote_account",
-                action_result,
+                account_result,
                 method="post",
-                body=json.dumps(body),
+                body=json_encode(dict(body, account=remote_account)),
                 params=None,
                 headers=None,
             )
+            return ret_val, response, account_result
 
+        # Iterate over the accounts and check connectivity, concurrently if enabled
+        for remote_account, (ret_val, response, account_result) in zip(
+            remote_accounts_list, self._fan_out(_check_account, remote_accounts_list)
+        ):
+            self._fan_out_merge(action_result, account_result)
             if phantom.is_fail(ret_val):
-                return action_result.get_status()
+                return self._fan_out_failure(action_result, account_result)
 
             # add data
             action_result.add_data(
                 {
-                    "account": account,
+                    "account": remote_account,
                     "host": response.get("host"),
                     "message": response.get("message"),
                     "status": response.get("status"),
@@ -646,7 +1441,7 @@ class TrackmeConnector(BaseConnector):
             "/services/trackme/v2/splk_outliers_engine/write/outliers_train_models",
             action_result,
             method="post",
-            body=json.dumps(body),
+            body=json_encode(body),
             params=None,
             headers=None,
         )
@@ -661,7 +1456,7 @@ class TrackmeConnector(BaseConnector):
 
         # resp_data
         # self.debug_print(f'response: {response}')
-        summary["trackme_response"] = json.dumps(response)
+        summary["trackme_response"] = json_encode_text(response)
 
         # add data
         action_result.add_data(response)
@@ -695,7 +1490,7 @@ class TrackmeConnector(BaseConnector):
             "/services/trackme/v2/splk_outliers_engine/write/outliers_mlmonitor_models",
             action_result,
             method="post",
-            body=json.dumps(body),
+            body=json_encode(body),
             params=None,
             headers=None,
         )
@@ -710,7 +1505,7 @@ class TrackmeConnector(BaseConnector):
 
         # resp_data
         # self.debug_print(f'response: {response}')
-        summary["trackme_response"] = json.dumps(response)
+        summary["trackme_response"] = json_encode_text(response)
 
         # add data
         action_result.add_data(response)
@@ -744,7 +1539,7 @@ class TrackmeConnector(BaseConnector):
             "/services/trackme/v2/splk_outliers_engine/write/outliers_reset_models",
             action_result,
             method="post",
-            body=json.dumps(body),
+            body=json_encode(body),
             params=None,
             headers=None,
         )
@@ -759,7 +1554,7 @@ class TrackmeConnector(BaseConnector):
 
         # resp_data
         # self.debug_print(f'response: {response}')
-        summary["trackme_response"] = json.dumps(response)
+        summary["trackme_response"] = json_encode_text(response)
 
         # add data
         action_result.add_data(response)
@@ -780,6 +1575,7 @@ class TrackmeConnector(BaseConnector):
         tenant_id = param["tenant_id"]
         component = param["component"]
         object_value = param["object"]
+        output_mode = param.get("output_mode", TRACKME_OUTPUT_MODE_DATA)
 
         # body
         body = {
@@ -793,7 +1589,7 @@ class TrackmeConnector(BaseConnector):
             "/services/trackme/v2/splk_outliers_engine/outliers_get_rules",
             action_result,
             method="post",
-            body=json.dumps(body),
+            body=json_encode(body),
             params=None,
             headers=None,
         )
@@ -806,13 +1602,20 @@ class TrackmeConnector(BaseConnector):
         # Add a dictionary that is made up of the most important values from data into the summary
         summary = action_result.update_summary({})
 
+        # add data (response is a list), or spill it to the vault
+        ret_val, spill = self._add_records(
+            action_result, response, output_mode, "ml_outliers_get_models"
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
         # resp_data
         # self.debug_print(f'response: {response}')
-        summary["trackme_response"] = json.dumps(response)
-
-        # add data (response is a list)
-        for item in response:
-            action_result.add_data(item)
+        if spill:
+            summary["record_count"] = spill["record_count"]
+            summary["vault_id"] = spill["vault_id"]
+        else:
+            summary["trackme_response"] = json_encode_text(response)
 
         self.save_progress("Machine Leaning Outliers get successful")
         return action_result.set_status(phantom.APP_SUCCESS)
@@ -850,7 +1653,7 @@ class TrackmeConnector(BaseConnector):
             "/services/trackme/v2/splk_outliers_engine/write/outliers_manage_model_period_exclusion",
             action_result,
             method="post",
-            body=json.dumps(body),
+            body=json_encode(body),
             params=None,
             headers=None,
         )
@@ -865,7 +1668,7 @@ class TrackmeConnector(BaseConnector):
 
         # resp_data
         # self.debug_print(f'response: {response}')
-        summary["trackme_response"] = json.dumps(response)
+        summary["trackme_response"] = json_encode_text(response)
 
         # add data
         action_result.add_data(response)
@@ -873,7 +1676,371 @@ class TrackmeConnector(BaseConnector):
         self.save_progress("Machine Leaning Outliers add exclusion period successful")
         return action_result.set_status(phantom.APP_SUCCESS)
 
-    def _handle_component_get_entity(self, param):
+    def _get_ml_model_ids(self, tenant_id, component, object_value):
+        """
+        Return the ML model ids of an entity and the error message if the lookup failed, the
+        model ids are cached in the state for TRACKME_ML_MODELS_CACHE_TTL seconds
+        """
+
+        cache_key = "{0}:{1}:{2}".format(tenant_id, component, object_value)
+        with self._state_lock:
+            cached = self._state.setdefault("ml_models_cache", {}).get(cache_key)
+        if cached and time.time() - cached["updated"] < TRACKME_ML_MODELS_CACHE_TTL:
+            return cached["model_ids"], None
+
+        lookup_result = ActionResult()
+        ret_val, response = self._make_rest_call(
+            "/services/trackme/v2/splk_outliers_engine/outliers_get_rules",
+            lookup_result,
+            method="post",
+            body=json_encode(
+                {"tenant_id": tenant_id, "component": component, "object": object_value}
+            ),
+            params=None,
+            headers=None,
+        )
+
+        if phantom.is_fail(ret_val):
+            return [], lookup_result.get_message()
+
+        model_ids = [rule["model_id"] for rule in response if rule.get("model_id")]
+        with self._state_lock:
+            self._state["ml_models_cache"][cache_key] = {
+                "updated": time.time(),
+                "model_ids": model_ids,
+            }
+        return model_ids, None
+
+    def _handle_ml_outliers_bulk_add_period_exclusion(self, param):
+
+        self.save_progress(
+            "In action handler for: {0}".format(self.get_action_identifier())
+        )
+
+        # Add an action result object to self (BaseConnector) to represent the action for this param
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        # Parameters
+        tenant_id = param["tenant_id"]
+        component = param["component"]
+        earliest = param["earliest"]
+        latest = param["latest"]
+        object_list = param.get("object_list", None)
+        vault_id = param.get("vault_id", None)
+        model_ids_filter = [
+            item.strip()
+            for item in param.get("model_ids", "").split(",")
+            if item.strip()
+        ]
+
+        if not object_list and not vault_id:
+            return action_result.set_status(
+                phantom.APP_ERROR, "Either object_list or vault_id must be provided"
+            )
+
+        # entities, from the parameter or from a vault file
+        if vault_id:
+            ret_val, file_path = self._get_vault_file_path(action_result, vault_id)
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+            try:
+                objects = list(iter_vault_objects(file_path))
+            except (OSError, ValueError) as e:
+                return action_result.set_status(
+                    phantom.APP_ERROR,
+                    "Unable to read the vault file vault_id={0}. Details: {1}".format(
+                        vault_id, str(e)
+                    ),
+                )
+        else:
+            objects = [item.strip() for item in object_list.split(",") if item.strip()]
+
+        # purge the expired model ids from the cache
+        now = time.time()
+        models_cache = self._state.setdefault("ml_models_cache", {})
+        for cache_key in list(models_cache):
+            if now - models_cache[cache_key]["updated"] >= TRACKME_ML_MODELS_CACHE_TTL:
+                del models_cache[cache_key]
+
+        # list the models of the entities concurrently
+        def _list_models(object_value):
+            return self._get_ml_model_ids(tenant_id, component, object_value)
+
+        results = []
+        exclusions = []
+        for object_value, (model_ids, error) in zip(
+            objects,
+            self._fan_out(
+                _list_models,
+                objects,
+                default_concurrency=TRACKME_ML_BULK_DEFAULT_CONCURRENCY,
+            ),
+        ):
+            if error:
+                results.append(
+                    {
+                        "object": object_value,
+                        "model_id": None,
+                        "status": "failure",
+                        "message": error,
+                    }
+                )
+                continue
+
+            for model_id in model_ids:
+                if not model_ids_filter or model_id in model_ids_filter:
+                    exclusions.append((object_value, model_id))
+
+        # submit the exclusions with bounded parallelism
+        def _add_exclusion(exclusion):
+            object_value, model_id = exclusion
+            exclusion_result = ActionResult()
+            ret_val, response = self._make_rest_call(
+                "/services/trackme/v2/splk_outliers_engine/write/outliers_manage_model_period_exclusion",
+                exclusion_result,
+                method="post",
+                body=json_encode(
+                    {
+                        "tenant_id": tenant_id,
+                        "component": component,
+                        "object": object_value,
+                        "action": "add",
+                        "model_id": model_id,
+                        "earliest": earliest,
+                        "latest": latest,
+                    }
+                ),
+                params=None,
+                headers=None,
+            )
+            if phantom.is_fail(ret_val):
+                return "failure", exclusion_result.get_message()
+            return "success", response
+
+        for (object_value, model_id), (status, message) in zip(
+            exclusions,
+            self._fan_out(
+                _add_exclusion,
+                exclusions,
+                default_concurrency=TRACKME_ML_BULK_DEFAULT_CONCURRENCY,
+            ),
+        ):
+            results.append(
+                {
+                    "object": object_value,
+                    "model_id": model_id,
+                    "status": status,
+                    "message": message,
+                }
+            )
+
+        # add data
+        for result in results:
+            action_result.add_data(result)
+
+        # Add a dictionary that is made up of the most important values from data into the summary
+        summary = action_result.update_summary({})
+        summary["objects_count"] = len(objects)
+        summary["models_count"] = len(exclusions)
+        summary["success_count"] = len(
+            [result for result in results if result["status"] == "success"]
+        )
+        summary["failures_count"] = len(results) - summary["success_count"]
+
+        if results and not summary["success_count"]:
+            return action_result.set_status(
+                phantom.APP_ERROR,
+                "All the period exclusions failed, see the action results for details",
+            )
+
+        self.save_progress(
+            "Machine Leaning Outliers bulk add exclusion period successful"
+        )
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _ml_outliers_call(
+        self, action_result, endpoint, tenant_id, component, object_value
+    ):
+        return self._make_rest_call(
+            "/services/trackme/v2/splk_outliers_engine/" + endpoint,
+            action_result,
+            method="post",
+            body=json_encode(
+                {"tenant_id": tenant_id, "component": component, "object": object_value}
+            ),
+            params=None,
+            headers=None,
+        )
+
+    def _wait_ml_training(
+        self, action_result, tenant_id, component, object_value, previous_runs, timeout
+    ):
+        """
+        Poll the model rules of an entity with an exponential backoff, until every model was
+        executed again since previous_runs (model_id to last_exec before the training)
+        """
+
+        delay = TRACKME_ML_POLL_INITIAL_DELAY
+        deadline = time.time() + timeout
+        while True:
+            ret_val, rules = self._ml_outliers_call(
+                action_result, "outliers_get_rules", tenant_id, component, object_value
+            )
+            if phantom.is_fail(ret_val):
+                return RetVal(ret_val, None)
+
+            if rules and all(
+                rule.get("last_exec")
+                and rule.get("last_exec") != previous_runs.get(rule.get("model_id"))
+                for rule in rules
+            ):
+                return RetVal(phantom.APP_SUCCESS, rules)
+
+            if time.time() + delay > deadline:
+                return RetVal(
+                    action_result.set_status(
+                        phantom.APP_ERROR,
+                        "The training of the models did not complete within {0} seconds".format(
+                            timeout
+                        ),
+                    ),
+                    None,
+                )
+
+            time.sleep(delay)
+            delay = min(delay * 2, TRACKME_ML_POLL_MAX_DELAY)
+
+    def _run_ml_pipeline(self, tenant_id, component, object_value, reset, timeout):
+        """
+        Run the reset, train, monitor sequence for an entity, returns its result record
+        """
+
+        # each entity has its own action result, a failure does not stop the other entities
+        pipeline_result = ActionResult()
+        result = {"object": object_value, "status": "failure", "steps": []}
+
+        if reset:
+            ret_val, _ = self._ml_outliers_call(
+                pipeline_result,
+                "write/outliers_reset_models",
+                tenant_id,
+                component,
+                object_value,
+            )
+            if phantom.is_fail(ret_val):
+                result["message"] = pipeline_result.get_message()
+                return result
+            result["steps"].append("reset")
+
+        # last execution of the models before the training
+        ret_val, rules = self._ml_outliers_call(
+            pipeline_result, "outliers_get_rules", tenant_id, component, object_value
+        )
+        if phantom.is_fail(ret_val):
+            result["message"] = pipeline_result.get_message()
+            return result
+        previous_runs = {rule.get("model_id"): rule.get("last_exec") for rule in rules}
+
+        ret_val, _ = self._ml_outliers_call(
+            pipeline_result,
+            "write/outliers_train_models",
+            tenant_id,
+            component,
+            object_value,
+        )
+        if phantom.is_fail(ret_val):
+            result["message"] = pipeline_result.get_message()
+            return result
+        result["steps"].append("train")
+
+        ret_val, _ = self._wait_ml_training(
+            pipeline_result, tenant_id, component, object_value, previous_runs, timeout
+        )
+        if phantom.is_fail(ret_val):
+            result["message"] = pipeline_result.get_message()
+            return result
+        result["steps"].append("trained")
+
+        ret_val, _ = self._ml_outliers_call(
+            pipeline_result,
+            "write/outliers_mlmonitor_models",
+            tenant_id,
+            component,
+            object_value,
+        )
+        if phantom.is_fail(ret_val):
+            result["message"] = pipeline_result.get_message()
+            return result
+        result["steps"].append("monitor")
+
+        # final model rules, after the monitoring
+        ret_val, rules = self._ml_outliers_call(
+            pipeline_result, "outliers_get_rules", tenant_id, component, object_value
+        )
+        if phantom.is_fail(ret_val):
+            result["message"] = pipeline_result.get_message()
+            return result
+
+        result["status"] = "success"
+        result["models"] = rules
+        return result
+
+    def _handle_ml_outliers_pipeline(self, param):
+
+        self.save_progress(
+            "In action handler for: {0}".format(self.get_action_identifier())
+        )
+
+        # Add an action result object to self (BaseConnector) to represent the action for this param
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        # Parameters
+        tenant_id = param["tenant_id"]
+        component = param["component"]
+        objects = [item.strip() for item in param["object"].split(",") if item.strip()]
+        reset = param.get("reset_models", True)
+        timeout = int(param.get("timeout", TRACKME_ML_PIPELINE_DEFAULT_TIMEOUT))
+
+        def _pipeline(object_value):
+            return self._run_ml_pipeline(
+                tenant_id, component, object_value, reset, timeout
+            )
+
+        results = list(
+            self._fan_out(
+                _pipeline,
+                objects,
+                default_concurrency=TRACKME_ML_BULK_DEFAULT_CONCURRENCY,
+            )
+        )
+
+        # add data
+        for result in results:
+            action_result.add_data(result)
+
+        # Add a dictionary that is made up of the most important values from data into the summary
+        summary = action_result.update_summary({})
+        summary["objects_count"] = len(results)
+        summary["success_count"] = len(
+            [result for result in results if result["status"] == "success"]
+        )
+        summary["failures_count"] = len(results) - summary["success_count"]
+
+        if not summary["success_count"]:
+            return action_result.set_status(
+                phantom.APP_ERROR,
+                "The pipeline failed for all entities. Details: {0}".format(
+                    "; ".join(
+                        "{0}: {1}".format(result["object"], result.get("message"))
+                        for result in results
+                    )
+                ),
+            )
+
+        self.save_progress("Machine Leaning Outliers pipeline successful")
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _handle_component_get_entity(self, param):
         self.save_progress(
             "In action handler for: {0}".format(self.get_action_identifier())
         )
@@ -886,6 +2053,7 @@ class TrackmeConnector(BaseConnector):
         component = param["component"]
         filter_key = param.get("filter_key")
         filter_object = param.get("filter_object")
+        output_mode = param.get("output_mode", TRACKME_OUTPUT_MODE_DATA)
 
         # This endpoints expects params especially
         params = {
@@ -898,6 +2066,12 @@ class TrackmeConnector(BaseConnector):
         if filter_object:
             params["filter_object"] = filter_object
 
+        # aggregate mode: the records are added to the aggregator as they are decoded from the
+        # response, one at a time, only the compact statistics are returned
+        aggregator = None
+        if output_mode == TRACKME_OUTPUT_MODE_AGGREGATE:
+            aggregator = EntityStatsAggregator()
+
         # make rest call
         ret_val, response = self._make_rest_call(
             "/services/trackme/v2/component/load_component_data",
@@ -906,6 +2080,7 @@ class TrackmeConnector(BaseConnector):
             body=None,
             params=params,
             headers=None,
+            records=aggregator.add if aggregator else None,
         )
 
         if phantom.is_fail(ret_val):
@@ -916,19 +2091,81 @@ class TrackmeConnector(BaseConnector):
         # Add a dictionary that is made up of the most important values from data into the summary
         summary = action_result.update_summary({})
 
-        # resp_data
-        # self.debug_print(f'response: {response}')
-        summary["trackme_response"] = json.dumps(response)
+        if aggregator:
+            stats = aggregator.results()
+
+            summary["entity_count"] = stats["entity_count"]
+            summary["trackme_response"] = json_encode_text(stats)
+            action_result.add_data(stats)
 
-        # add data (response is a list)
+            self.save_progress("Get TrackMe entity aggregate statistics successful")
+            return action_result.set_status(phantom.APP_SUCCESS)
+
+        # add data (response is a list), or spill it to the vault
         data_response = response.get("data", [])
-        for item in data_response:
-            action_result.add_data(item)
+        ret_val, spill = self._add_records(
+            action_result, data_response, output_mode, "component_get_entity"
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # resp_data
+        # self.debug_print(f'response: {response}')
+        if spill:
+            summary["record_count"] = spill["record_count"]
+            summary["vault_id"] = spill["vault_id"]
+        else:
+            summary["trackme_response"] = json_encode_text(response)
 
         self.save_progress("Get TrackMe entity realtime data successful")
         return action_result.set_status(phantom.APP_SUCCESS)
 
-    def _handle_component_manage_entity(self, param):
+    def _lookup_entity(self, tenant_id, component, filter_object):
+        """
+        Look up an entity in a component of a tenant, returns the matching entity records and
+        the error message if the lookup failed
+        """
+
+        # each lookup has its own action result, lookups still running once the entity is found
+        # must not alter the status of the action
+        lookup_result = ActionResult()
+
+        # the matching records are converted as they are decoded from the response
+        records = []
+
+        def add_record(record):
+            if record.get("object") == filter_object:
+                records.append(EntityRecord.from_dict(record))
+
+        ret_val, response = self._make_rest_call(
+            "/services/trackme/v2/component/load_component_data",
+            lookup_result,
+            method="get",
+            body=None,
+            params={
+                "tenant_id": tenant_id,
+                "component": component,
+                "filter_object": filter_object,
+            },
+            headers=None,
+            records=add_record,
+        )
+
+        if phantom.is_fail(ret_val):
+            return [], lookup_result.get_message()
+
+        return records, None
+
+    def _entity_location(self, tenant_id, component, record):
+        return {
+            "tenant_id": tenant_id,
+            "component": component,
+            "object": record.object,
+            "key": record.key,
+            "object_state": record.object_state,
+        }
+
+    def _handle_locate_entity(self, param):
         self.save_progress(
             "In action handler for: {0}".format(self.get_action_identifier())
         )
@@ -936,83 +2173,462 @@ class TrackmeConnector(BaseConnector):
         # Add an action result object to self (BaseConnector) to represent the action for this param
         action_result = self.add_action_result(ActionResult(dict(param)))
 
-        # Access action parameters passed in the 'param' dictionary
-
-        # Required values can be accessed directly
+        # Parameters
         tenant_id = param["tenant_id"]
-        component = param["component"]
-        action = param["action"]
+        filter_object = param["filter_object"]
+        components = [
+            item.strip()
+            for item in (param.get("components") or ",".join(TRACKME_COMPONENTS)).split(
+                ","
+            )
+            if item.strip()
+        ]
 
-        # Optional values should use the .get() function
-        filter_object = param.get("filter_object", None)
-        filter_key = param.get("filter_key", None)
-        extra_attributes = param.get("extra_attributes", None)
-        update_comment = param.get("update_comment", None)
+        if not components:
+            return action_result.set_status(
+                phantom.APP_ERROR, "components must list at least one component"
+            )
 
-        # This endpoints expects params especially
-        params = {
-            "tenant_id": tenant_id,
-            "component": component,
-        }
+        # query all the components at once, the first match wins: the action returns right
+        # away, the lookups still in flight are abandoned and their results ignored
+        match = None
+        errors = []
+        executor = ThreadPoolExecutor(max_workers=len(components))
+        try:
+            pending = {
+                executor.submit(
+                    self._lookup_entity, tenant_id, component, filter_object
+                ): component
+                for component in components
+            }
+            while pending and not match:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    component = pending.pop(future)
+                    records, error = future.result()
+                    if error:
+                        errors.append("{0}: {1}".format(component, error))
+                    elif records and not match:
+                        match = (component, records[0])
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        skipped_count = len(pending)
+
+        # the entity was not found, and at least one component could not be searched
+        if not match and errors:
+            return action_result.set_status(
+                phantom.APP_ERROR,
+                "Unable to locate the entity, lookups failed. Details: {0}".format(
+                    "; ".join(errors)
+                ),
+            )
 
-        if filter_key:
-            params["filter_key"] = filter_key
-        if filter_object:
-            params["filter_object"] = filter_object
+        # Add a dictionary that is made up of the most important values from data into the summary
+        summary = action_result.update_summary({})
+        summary["found"] = bool(match)
+        summary["lookups_skipped"] = skipped_count
+
+        if not match:
+            self.save_progress("Entity not found")
+            return action_result.set_status(
+                phantom.APP_SUCCESS,
+                "Entity {0} not found in components {1}".format(
+                    filter_object, ",".join(components)
+                ),
+            )
 
-        # try to parse extra_attributes from JSON string to an object
-        try:
-            extra_attributes = json.loads(extra_attributes)
-        except Exception as e:
-            pass
+        component, record = match
+        location = self._entity_location(tenant_id, component, record)
 
-        # define the target endpoint depending on the requested action
-        target_endpoint = None
+        summary["component"] = component
+        summary["key"] = location["key"]
+        summary["trackme_response"] = json_encode_text(location)
 
-        # init the rest body
-        body = {
-            "tenant_id": tenant_id,
-        }
+        # add data
+        action_result.add_data(location)
 
-        # add filters
-        if filter_object:
-            body["object_list"] = filter_object
-        elif filter_key:
-            body["keys_list"] = filter_key
+        self.save_progress("Locate TrackMe entity successful")
+        return action_result.set_status(phantom.APP_SUCCESS)
 
-        # add update_comment
-        if update_comment:
-            body["update_comment"] = update_comment
+    def _get_tenants(self, action_result, refresh=False):
+        """
+        Return the enabled tenants and their enabled components, the list is cached in the state
+        for TRACKME_TENANTS_CACHE_TTL seconds
+        """
 
-        # handle action
-        allowd_actions = [
-            "enable",
-            "disable",
-            "delete",
-            "manage_dsm_sampling",
-            "update_hours_ranges",
-            "update_wdays",
-            "update_priority",
-            "update_lag_policy",
-            "update_dcount_host",
-            "update_manual_tags",
-        ]
+        cache = self._state.get("tenants_cache")
+        if (
+            not refresh
+            and cache
+            and time.time() - cache["updated"] < TRACKME_TENANTS_CACHE_TTL
+        ):
+            return RetVal(phantom.APP_SUCCESS, cache["tenants"])
 
-        if action not in allowd_actions:
-            raise Exception(
-                f"Invalid action={action}, valid actions are: {allowd_actions}"
-            )
+        ret_val, response = self._make_rest_call(
+            "/services/trackme/v2/vtenants/show_tenants",
+            action_result,
+            method="get",
+            body=None,
+            params=None,
+            headers=None,
+        )
 
-        if action in ("enable", "disable"):
+        if phantom.is_fail(ret_val):
+            return RetVal(ret_val, None)
 
-            # add action to the body, this is expected by these endpoints
-            body["action"] = action
+        if isinstance(response, dict):
+            response = response.get("data", [])
 
-            if component == "dsm":
-                target_endpoint = (
-                    f"/services/trackme/v2/splk_{component}/write/ds_monitoring"
-                )
-            elif component == "dhm":
+        tenants = []
+        for record in response:
+            if record.get("tenant_status", "enabled") != "enabled":
+                continue
+            tenants.append(
+                {
+                    "tenant_id": record.get("tenant_id"),
+                    "components": [
+                        component
+                        for component in TRACKME_COMPONENTS
+                        if str(
+                            record.get("tenant_{0}_enabled".format(component))
+                        ).lower()
+                        in ("1", "true")
+                    ],
+                }
+            )
+
+        self._state["tenants_cache"] = {"updated": time.time(), "tenants": tenants}
+        return RetVal(phantom.APP_SUCCESS, tenants)
+
+    def _handle_search_entity(self, param):
+        self.save_progress(
+            "In action handler for: {0}".format(self.get_action_identifier())
+        )
+
+        # Add an action result object to self (BaseConnector) to represent the action for this param
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        # Parameters
+        filter_object = param["filter_object"]
+        tenants_filter = [
+            item.strip()
+            for item in param.get("tenant_ids", "").split(",")
+            if item.strip()
+        ]
+        components_filter = [
+            item.strip()
+            for item in param.get("components", ",".join(TRACKME_COMPONENTS)).split(",")
+            if item.strip()
+        ]
+        refresh_tenants = param.get("refresh_tenants", False)
+
+        ret_val, tenants = self._get_tenants(action_result, refresh=refresh_tenants)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # one lookup per tenant and enabled component
+        lookups = [
+            (tenant["tenant_id"], component)
+            for tenant in tenants
+            if not tenants_filter or tenant["tenant_id"] in tenants_filter
+            for component in tenant["components"]
+            if component in components_filter
+        ]
+
+        def _lookup(lookup):
+            tenant_id, component = lookup
+            return self._lookup_entity(tenant_id, component, filter_object)
+
+        # fan out the lookups, results are merged and deduplicated
+        locations = {}
+        errors = []
+        for (tenant_id, component), (records, error) in zip(
+            lookups,
+            self._fan_out(
+                _lookup, lookups, default_concurrency=TRACKME_SEARCH_DEFAULT_CONCURRENCY
+            ),
+        ):
+            if error:
+                errors.append("{0}/{1}: {2}".format(tenant_id, component, error))
+                continue
+            for record in records:
+                location = self._entity_location(tenant_id, component, record)
+                locations.setdefault((tenant_id, component, location["key"]), location)
+
+        if errors and len(errors) == len(lookups):
+            return action_result.set_status(
+                phantom.APP_ERROR,
+                "All lookups failed. Details: {0}".format("; ".join(errors)),
+            )
+
+        # add data
+        for location in locations.values():
+            action_result.add_data(location)
+
+        # Add a dictionary that is made up of the most important values from data into the summary
+        summary = action_result.update_summary({})
+        summary["tenants_searched"] = len({tenant_id for tenant_id, _ in lookups})
+        summary["lookups_count"] = len(lookups)
+        summary["matches_count"] = len(locations)
+        summary["failed_lookups"] = errors
+
+        self.save_progress("Search TrackMe entity successful")
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _converge_value(self, value, field):
+        # normalize a value for comparison, lists may be stored as comma separated strings in records,
+        # the case is only ignored for the enumerated fields, a case change of free text is a change
+        if isinstance(value, (list, tuple)):
+            value = ",".join(str(item).strip() for item in value)
+        if value is None:
+            return ""
+        value = str(value).strip()
+        if field in TRACKME_CONVERGE_CASE_INSENSITIVE_FIELDS:
+            value = value.lower()
+        return value
+
+    def _converge_entities(
+        self,
+        action_result,
+        tenant_id,
+        component,
+        action,
+        body,
+        filter_object,
+        filter_key,
+    ):
+        """
+        Compare the desired state in body against the entity records and return the entities
+        which need to be updated and the entities which already have the requested values.
+        """
+
+        fields = TRACKME_CONVERGE_FIELDS[action]
+
+        params = {
+            "tenant_id": tenant_id,
+            "component": component,
+        }
+
+        if filter_object:
+            params["filter_object"] = filter_object
+            requested = [
+                item.strip() for item in filter_object.split(",") if item.strip()
+            ]
+            id_field = "object"
+        else:
+            params["filter_key"] = filter_key
+            requested = [item.strip() for item in filter_key.split(",") if item.strip()]
+            id_field = "_key"
+
+        # fetch the entity records, only the fields compared are retained from each record as
+        # it is decoded from the response
+        records = {}
+
+        def add_record(record):
+            record_id = record.get(id_field) or record.get("keyid")
+            records[record_id] = EntityRecord.from_dict(
+                record, extra_fields=fields.values()
+            )
+
+        ret_val, response = self._make_rest_call(
+            "/services/trackme/v2/component/load_component_data",
+            action_result,
+            method="get",
+            body=None,
+            params=params,
+            headers=None,
+            records=add_record,
+        )
+
+        if phantom.is_fail(ret_val):
+            return RetVal(ret_val, None)
+
+        changed = []
+        skipped = []
+
+        for entity in requested:
+            record = records.get(entity)
+
+            # unknown entities are always sent, TrackMe handles and reports them
+            if record is None:
+                changed.append(entity)
+                continue
+
+            is_changed = False
+            for body_field, record_field in fields.items():
+                if body_field not in body:
+                    continue
+
+                desired = body[body_field]
+                # enable/disable are compared against the monitored_state of the entity
+                if body_field == "action":
+                    desired = f"{desired}d"
+
+                if self._converge_value(desired, record_field) != self._converge_value(
+                    record.get(record_field), record_field
+                ):
+                    is_changed = True
+                    break
+
+            if is_changed:
+                changed.append(entity)
+            else:
+                skipped.append(entity)
+
+        return RetVal(phantom.APP_SUCCESS, (changed, skipped))
+
+    def _write_entities(
+        self,
+        action_result,
+        tenant_id,
+        component,
+        action,
+        body,
+        target_endpoint,
+        converge,
+        filter_object,
+        filter_key,
+    ):
+        """
+        Send a component_manage_entity write, returns the response and the entities skipped by
+        the converge mode, the response is None if all entities were already converged.
+        """
+
+        # converge mode: only send the writes for entities which do not have the requested values yet
+        skipped_entities = []
+        if (
+            converge
+            and action in TRACKME_CONVERGE_FIELDS
+            and (filter_object or filter_key)
+        ):
+            ret_val, converge_results = self._converge_entities(
+                action_result,
+                tenant_id,
+                component,
+                action,
+                body,
+                filter_object,
+                filter_key,
+            )
+
+            if phantom.is_fail(ret_val):
+                return RetVal(ret_val, None)
+
+            changed_entities, skipped_entities = converge_results
+            if filter_object:
+                body["object_list"] = ",".join(changed_entities)
+            else:
+                body["keys_list"] = ",".join(changed_entities)
+
+            if not changed_entities:
+                return RetVal(phantom.APP_SUCCESS, (None, skipped_entities))
+
+        # make rest call
+        ret_val, response = self._make_rest_call(
+            target_endpoint,
+            action_result,
+            method="post",
+            body=json_encode(body),
+            params=None,
+            headers=None,
+        )
+
+        if phantom.is_fail(ret_val):
+            return RetVal(ret_val, None)
+
+        return RetVal(phantom.APP_SUCCESS, (response, skipped_entities))
+
+    def _handle_component_manage_entity(self, param):
+        self.save_progress(
+            "In action handler for: {0}".format(self.get_action_identifier())
+        )
+
+        # Add an action result object to self (BaseConnector) to represent the action for this param
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        # Access action parameters passed in the 'param' dictionary
+
+        # Required values can be accessed directly
+        tenant_id = param["tenant_id"]
+        component = param["component"]
+        action = param["action"]
+
+        # Optional values should use the .get() function
+        filter_object = param.get("filter_object", None)
+        filter_key = param.get("filter_key", None)
+        extra_attributes = param.get("extra_attributes", None)
+        update_comment = param.get("update_comment", None)
+        converge = param.get("converge", False)
+        vault_id = param.get("vault_id", None)
+
+        ret_val, chunk_size = self._get_chunk_size(action_result, param)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # This endpoints expects params especially
+        params = {
+            "tenant_id": tenant_id,
+            "component": component,
+        }
+
+        if filter_key:
+            params["filter_key"] = filter_key
+        if filter_object:
+            params["filter_object"] = filter_object
+
+        # try to parse extra_attributes from JSON string to an object
+        try:
+            extra_attributes = json.loads(extra_attributes)
+        except Exception as e:
+            pass
+
+        # define the target endpoint depending on the requested action
+        target_endpoint = None
+
+        # init the rest body
+        body = {
+            "tenant_id": tenant_id,
+        }
+
+        # add filters
+        if filter_object:
+            body["object_list"] = filter_object
+        elif filter_key:
+            body["keys_list"] = filter_key
+
+        # add update_comment
+        if update_comment:
+            body["update_comment"] = update_comment
+
+        # handle action
+        allowd_actions = [
+            "enable",
+            "disable",
+            "delete",
+            "manage_dsm_sampling",
+            "update_hours_ranges",
+            "update_wdays",
+            "update_priority",
+            "update_lag_policy",
+            "update_dcount_host",
+            "update_manual_tags",
+        ]
+
+        if action not in allowd_actions:
+            raise Exception(
+                f"Invalid action={action}, valid actions are: {allowd_actions}"
+            )
+
+        if action in ("enable", "disable"):
+
+            # add action to the body, this is expected by these endpoints
+            body["action"] = action
+
+            if component == "dsm":
+                target_endpoint = (
+                    f"/services/trackme/v2/splk_{component}/write/ds_monitoring"
+                )
+            elif component == "dhm":
                 target_endpoint = (
                     f"/services/trackme/v2/splk_{component}/write/dh_monitoring"
                 )
@@ -1445,27 +3061,88 @@ class TrackmeConnector(BaseConnector):
                 f"/services/trackme/v2/splk_dsm/write/ds_update_manual_tags"
             )
 
-        # make rest call
-        ret_val, response = self._make_rest_call(
-            target_endpoint,
+        # entities read from a vault file are processed by chunks
+        if vault_id:
+            skipped_entities = []
+
+            def process_chunk(chunk_result, chunk):
+                chunk_object_list = ",".join(chunk)
+                ret_val, write_results = self._write_entities(
+                    chunk_result,
+                    tenant_id,
+                    component,
+                    action,
+                    dict(body, object_list=chunk_object_list),
+                    target_endpoint,
+                    converge,
+                    chunk_object_list,
+                    None,
+                )
+                if phantom.is_fail(ret_val):
+                    return RetVal(ret_val, None)
+
+                response, chunk_skipped_entities = write_results
+                skipped_entities.extend(chunk_skipped_entities)
+                return RetVal(ret_val, response)
+
+            ret_val, totals = self._run_vault_chunks(
+                action_result,
+                vault_id,
+                chunk_size,
+                process_chunk,
+                job_id=param.get("job_id"),
+            )
+
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+            summary = action_result.update_summary(totals)
+            summary["trackme_response"] = json_encode_text(totals)
+
+            # entities skipped by the converge mode
+            if converge:
+                summary["skipped_count"] = len(skipped_entities)
+                summary["skipped_entities"] = skipped_entities
+
+            self.save_progress("Manage TrackMe entity successful")
+            return action_result.set_status(phantom.APP_SUCCESS)
+
+        ret_val, write_results = self._write_entities(
             action_result,
-            method="post",
-            body=json.dumps(body),
-            params=None,
-            headers=None,
+            tenant_id,
+            component,
+            action,
+            body,
+            target_endpoint,
+            converge,
+            filter_object,
+            filter_key,
         )
 
         if phantom.is_fail(ret_val):
             return action_result.get_status()
 
         # Return success
+        response, skipped_entities = write_results
 
         # Add a dictionary that is made up of the most important values from data into the summary
         summary = action_result.update_summary({})
 
+        # entities skipped by the converge mode
+        if converge:
+            summary["skipped_count"] = len(skipped_entities)
+            summary["skipped_entities"] = skipped_entities
+
+        # nothing was written, there is no response to report
+        if response is None:
+            self.save_progress(
+                "Manage TrackMe entity successful, all entities already converged"
+            )
+            return action_result.set_status(phantom.APP_SUCCESS)
+
         # resp_data
         # self.debug_print(f'response: {response}')
-        summary["trackme_response"] = json.dumps(response)
+        summary["trackme_response"] = json_encode_text(response)
 
         # add data
         action_result.add_data(response)
@@ -1494,84 +3171,726 @@ class TrackmeConnector(BaseConnector):
             "object_group_min_green_percent", None
         )
         update_comment = param.get("update_comment", None)
+        vault_id = param.get("vault_id", None)
+        output_mode = param.get("output_mode", TRACKME_OUTPUT_MODE_DATA)
+
+        ret_val, chunk_size = self._get_chunk_size(action_result, param)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # init body
+        body = {
+            "tenant_id": tenant_id,
+        }
+
+        if object_group_min_green_percent:
+            body["object_group_min_green_percent"] = object_group_min_green_percent
+
+        # add update_comment
+        if update_comment:
+            body["update_comment"] = update_comment
+
+        # handle action
+        allowed_actions = [
+            "show",
+            "associate",
+            "unassociate",
+        ]
+
+        if action not in allowed_actions:
+            raise Exception(
+                f"Invalid action={action}, valid actions are: {allowed_actions}"
+            )
+
+        # set endpoint
+        if action == "show":
+            target_endpoint = (
+                "/services/trackme/v2/splk_logical_groups/logical_groups_collection"
+            )
+        elif action in ("associate", "unassociate"):
+
+            if action == "associate":
+                body["action"] = action
+                body["object_group_name"] = object_group_name
+                body["object_list"] = object_list
+                if object_group_min_green_percent:
+                    body["object_group_min_green_percent"] = (
+                        object_group_min_green_percent
+                    )
+
+            elif action == "unassociate":
+                body["action"] = action
+                body["object_group_name"] = object_group_name
+                body["object_list"] = object_list
+
+            target_endpoint = "/services/trackme/v2/splk_logical_groups/write/logical_groups_associate_group"
+
+            # entities read from a vault file are processed by chunks
+            if vault_id:
+
+                def process_chunk(chunk_result, chunk):
+                    return self._make_rest_call(
+                        target_endpoint,
+                        chunk_result,
+                        method="post",
+                        body=json_encode(dict(body, object_list=",".join(chunk))),
+                        params=None,
+                        headers=None,
+                    )
+
+                ret_val, totals = self._run_vault_chunks(
+                    action_result,
+                    vault_id,
+                    chunk_size,
+                    process_chunk,
+                    job_id=param.get("job_id"),
+                )
+
+                if phantom.is_fail(ret_val):
+                    return action_result.get_status()
+
+                summary = action_result.update_summary(totals)
+                summary["trackme_response"] = json_encode_text(totals)
+
+                self.save_progress("Manage TrackMe logical group successful")
+                return action_result.set_status(phantom.APP_SUCCESS)
+
+        # make rest call
+        ret_val, response = self._make_rest_call(
+            target_endpoint,
+            action_result,
+            method="post",
+            body=json_encode(body),
+            params=None,
+            headers=None,
+        )
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # Return success
+
+        # Add a dictionary that is made up of the most important values from data into the summary
+        summary = action_result.update_summary({})
+
+        # add data, or spill it to the vault
+        ret_val, spill = self._add_records(
+            action_result, response, output_mode, "logical_group_manage"
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # resp_data
+        # self.debug_print(f'response: {response}')
+        if spill:
+            summary["record_count"] = spill["record_count"]
+            summary["vault_id"] = spill["vault_id"]
+        else:
+            summary["trackme_response"] = json_encode_text(response)
+
+        self.save_progress("Manage TrackMe logical group successful")
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _handle_logical_group_get_group_for_entity(self, param):
+        self.save_progress(
+            "In action handler for: {0}".format(self.get_action_identifier())
+        )
+
+        # Add an action result object to self (BaseConnector) to represent the action for this param
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        # Access action parameters passed in the 'param' dictionary
+
+        # Required values can be accessed directly
+        tenant_id = param["tenant_id"]
+        filter_object = param["filter_object"]
+
+        # init body
+        body = {
+            "tenant_id": tenant_id,
+        }
+
+        # set endpoint
+        target_endpoint = (
+            "/services/trackme/v2/splk_logical_groups/logical_groups_collection"
+        )
+
+        # entities to look up, multiple entities can be specified as a comma separated list
+        requested_objects = [
+            item.strip() for item in filter_object.split(",") if item.strip()
+        ]
+        requested_objects_set = set(requested_objects)
+
+        # index the groups of the requested entities as they are decoded from the response,
+        # only the matching groups are retained in their compact form
+        entity_associated_logical_groups = {entity: [] for entity in requested_objects}
+
+        def add_group(item):
+            logical_group = GroupRecord.from_dict(item)
+
+            matched_objects = requested_objects_set.intersection(
+                logical_group.object_group_members
+            )
+            for entity in matched_objects:
+                entity_associated_logical_groups[entity].append(logical_group)
+
+        # make rest call, the collection is retrieved once for all entities
+        ret_val, response = self._make_rest_call(
+            target_endpoint,
+            action_result,
+            method="post",
+            body=json_encode(body),
+            params=None,
+            headers=None,
+            records=add_group,
+        )
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # Return success
+
+        # add data, records are converted to dictionaries here
+        group_items = []
+        for entity in requested_objects:
+            if entity_associated_logical_groups[entity]:
+                for logical_group in entity_associated_logical_groups[entity]:
+                    group_items.append(dict(logical_group.to_dict(), object=entity))
+                    action_result.add_data(group_items[-1])
+
+            else:  # entity has no group
+                action_result.add_data(
+                    {
+                        "object": entity,
+                        "object_group_name": None,
+                        "object_group_key": None,
+                        "object_group_members": [],
+                        "object_group_min_green_percent": None,
+                        "object_group_mtime": None,
+                        "object_group_mtime_human": None,
+                    }
+                )
+
+        # Add a dictionary that is made up of the most important values from data into the summary
+        summary = action_result.update_summary({})
+
+        # resp_data, the entities without a group are only reported in the data
+        # self.debug_print(f'response: {response}')
+        summary["trackme_response"] = json_encode_text(group_items)
+
+        # compact entity to groups mapping
+        summary["entity_groups"] = {
+            entity: [
+                logical_group.object_group_name
+                for logical_group in entity_associated_logical_groups[entity]
+            ]
+            for entity in requested_objects
+            if entity_associated_logical_groups[entity]
+        }
+
+        self.save_progress(
+            "Manage TrackMe get logical group information for TrackMe entity successful"
+        )
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _load_entity_states(self, action_result, tenant_id, components):
+        """
+        Load the entities of the components in bulk and return a hash index of their object_state
+        by component and object
+        """
+
+        entity_states = EntityStateIndex()
+        for component in components:
+            # the records are indexed as they are decoded from the response
+            ret_val, response = self._make_rest_call(
+                "/services/trackme/v2/component/load_component_data",
+                action_result,
+                method="get",
+                body=None,
+                params={"tenant_id": tenant_id, "component": component},
+                headers=None,
+                records=lambda record: entity_states.add(component, record),
+            )
+
+            if phantom.is_fail(ret_val):
+                return RetVal(ret_val, None)
+
+        return RetVal(phantom.APP_SUCCESS, entity_states)
+
+    def _handle_logical_group_evaluate(self, param):
+        self.save_progress(
+            "In action handler for: {0}".format(self.get_action_identifier())
+        )
+
+        # Add an action result object to self (BaseConnector) to represent the action for this param
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        # Required values can be accessed directly
+        tenant_id = param["tenant_id"]
+
+        # Optional values should use the .get() function
+        components = [
+            item.strip()
+            for item in param.get("components", ",".join(TRACKME_COMPONENTS)).split(",")
+            if item.strip()
+        ]
+        object_group_name = param.get("object_group_name", None)
+        output_mode = param.get("output_mode", TRACKME_OUTPUT_MODE_DATA)
+
+        # retrieve the logical groups collection, the groups are kept in their compact form
+        # as they are decoded from the response, while the entities are loaded
+        groups = []
+
+        def add_group(group):
+            if (
+                not object_group_name
+                or group.get("object_group_name") == object_group_name
+            ):
+                groups.append(GroupRecord.from_dict(group))
+
+        ret_val, response = self._make_rest_call(
+            "/services/trackme/v2/splk_logical_groups/logical_groups_collection",
+            action_result,
+            method="post",
+            body=json_encode({"tenant_id": tenant_id}),
+            params=None,
+            headers=None,
+            records=add_group,
+        )
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # retrieve the state of all entities at once, and index them by component and object
+        ret_val, entity_states = self._load_entity_states(
+            action_result, tenant_id, components
+        )
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # evaluate each group in one pass over its members
+        evaluations = []
+        breached_count = 0
+        for group in groups:
+            members = group.object_group_members
+
+            green_count = 0
+            unknown_count = 0
+            ambiguous_count = 0
+            for member in members:
+                state, ambiguous = entity_states.member_state(group.key, member)
+                if state == "green":
+                    green_count += 1
+                elif state is None:
+                    # members found in several components are only counted once resolved
+                    unknown_count += 1
+                    if ambiguous:
+                        ambiguous_count += 1
+
+            try:
+                min_green_percent = float(group.object_group_min_green_percent)
+            except (TypeError, ValueError):
+                min_green_percent = TRACKME_LOGICAL_GROUP_DEFAULT_MIN_GREEN_PERCENT
+
+            green_percent = (
+                round(green_count * 100 / len(members), 2) if members else 0.0
+            )
+            is_breached = green_percent < min_green_percent
+            if is_breached:
+                breached_count += 1
+
+            evaluations.append(
+                {
+                    "object_group_name": group.object_group_name,
+                    "object_group_key": group.key,
+                    "members_count": len(members),
+                    "green_count": green_count,
+                    "not_green_count": len(members) - green_count - unknown_count,
+                    "unknown_count": unknown_count,
+                    "ambiguous_count": ambiguous_count,
+                    "green_percent": green_percent,
+                    "object_group_min_green_percent": min_green_percent,
+                    "group_state": "red" if is_breached else "green",
+                }
+            )
+
+        # Add a dictionary that is made up of the most important values from data into the summary
+        summary = action_result.update_summary({})
+        summary["groups_count"] = len(evaluations)
+        summary["breached_count"] = breached_count
+
+        # add data, or spill it to the vault
+        ret_val, spill = self._add_records(
+            action_result, evaluations, output_mode, "logical_group_evaluate"
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        if spill:
+            summary["vault_id"] = spill["vault_id"]
+
+        self.save_progress("Evaluate TrackMe logical groups successful")
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _handle_smart_status(self, param):
+
+        self.save_progress(
+            "In action handler for: {0}".format(self.get_action_identifier())
+        )
+
+        # Add an action result object to self (BaseConnector) to represent the action for this param
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        # Parameters
+        tenant_id = param["tenant_id"]
+        component = param["component"]
+        object_value = param["object"]
+
+        # object accepts a comma separated list of entities
+        objects_list = [
+            item.strip() for item in object_value.split(",") if item.strip()
+        ]
+
+        # target_endpoint
+        target_endpoint = None
+        if component == "dsm":
+            target_endpoint = "/services/trackme/v2/splk_smart_status/ds_smart_status"
+        elif component == "dhm":
+            target_endpoint = "/services/trackme/v2/splk_smart_status/dh_smart_status"
+        elif component == "mhm":
+            target_endpoint = "/services/trackme/v2/splk_smart_status/mh_smart_status"
+        elif component == "wlk":
+            target_endpoint = "/services/trackme/v2/splk_smart_status/wlk_smart_status"
+        elif component == "flx":
+            target_endpoint = "/services/trackme/v2/splk_smart_status/flx_smart_status"
+
+        def _smart_status(object_name):
+            body = {
+                "tenant_id": tenant_id,
+                "object": object_name,
+            }
+
+            # make rest call
+            object_result = ActionResult()
+            ret_val, response = self._make_rest_call(
+                target_endpoint,
+                object_result,
+                method="post",
+                body=json_encode(body),
+                params=None,
+                headers=None,
+            )
+            return ret_val, response, object_result
+
+        # run the SmartStatus of each entity, concurrently if enabled
+        responses = []
+        for ret_val, response, object_result in self._fan_out(
+            _smart_status, objects_list
+        ):
+            self._fan_out_merge(action_result, object_result)
+            if phantom.is_fail(ret_val):
+                return self._fan_out_failure(action_result, object_result)
+            responses.append(response)
+
+        # Return success
+
+        # Add a dictionary that is made up of the most important values from data into the summary
+        summary = action_result.update_summary({})
+
+        # resp_data
+        # self.debug_print(f'response: {response}')
+        if len(responses) == 1:
+            summary["trackme_response"] = json_encode_text(responses[0])
+        else:
+            summary["trackme_response"] = json_encode_text(responses)
+
+        # add data
+        for response in responses:
+            action_result.add_data(response)
+
+        self.save_progress("SmartStatus run successful")
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _handle_on_poll(self, param):
+        self.save_progress(
+            "In action handler for: {0}".format(self.get_action_identifier())
+        )
+
+        # Add an action result object to self (BaseConnector) to represent the action for this param
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        config = self.get_config()
+
+        # Asset configuration for the ingestion
+        poll_tenants = [
+            item.strip()
+            for item in config.get("poll_tenants", "").split(",")
+            if item.strip()
+        ]
+        poll_components = [
+            item.strip()
+            for item in config.get(
+                "poll_components", ",".join(TRACKME_COMPONENTS)
+            ).split(",")
+            if item.strip()
+        ]
+        poll_states = [
+            item.strip()
+            for item in config.get("poll_states", TRACKME_POLL_DEFAULT_STATES).split(
+                ","
+            )
+            if item.strip()
+        ]
+        max_entities = int(
+            config.get("poll_max_entities", TRACKME_POLL_DEFAULT_MAX_ENTITIES)
+        )
+        container_label = config.get("ingest", {}).get("container_label")
+
+        push_mode = bool(self._alert_spool and self._alert_spool.is_enabled())
+        if not poll_tenants and not push_mode:
+            return action_result.set_status(
+                phantom.APP_ERROR,
+                "No tenants to poll, define poll_tenants or webhook_token in the asset configuration",
+            )
+
+        # poll now is limited to the number of containers requested
+        if self.is_poll_now():
+            max_entities = int(
+                param.get(phantom.APP_JSON_CONTAINER_COUNT, max_entities)
+            )
+
+        # per tenant checkpoint: the keys of the entities already ingested, every poll loads the
+        # full list of entities, an entity leaving the alerting states is removed and creates a new
+        # container if it alerts again
+        # poll now works on a copy of the checkpoints, it does not move them
+        checkpoints = self._state.setdefault("on_poll", {})
+        if self.is_poll_now():
+            checkpoints = copy.deepcopy(checkpoints)
+
+        # the checkpoint of an entity is only updated once its container is saved
+        containers = PollContainers(TRACKME_POLL_BATCH_SIZE)
+
+        for tenant_id in poll_tenants:
+            checkpoint = checkpoints.setdefault(tenant_id, {"ingested": {}})
+            # last poll time, kept by the previous versions and never used
+            checkpoint.pop("last_poll", None)
+            ingested = checkpoint["ingested"]
+
+            for component in poll_components:
+                ret_val, response = self._make_rest_call(
+                    "/services/trackme/v2/component/load_component_data",
+                    action_result,
+                    method="get",
+                    body=None,
+                    params={"tenant_id": tenant_id, "component": component},
+                    headers=None,
+                )
+
+                if phantom.is_fail(ret_val):
+                    return action_result.get_status()
+
+                alerting = set()
+                for record in response.get("data", []):
+                    if record.get("object_state") not in poll_states:
+                        continue
+                    if record.get("monitored_state", "enabled") != "enabled":
+                        continue
+
+                    entity_key = "{0}:{1}".format(
+                        component, record.get("_key") or record.get("keyid")
+                    )
+                    alerting.add(entity_key)
+
+                    if entity_key in ingested:
+                        continue
+                    if len(containers) >= max_entities:
+                        continue
+
+                    containers.add_entity(
+                        poll_container(
+                            tenant_id, component, entity_key, record, container_label
+                        ),
+                        ingested,
+                        entity_key,
+                        record.get("object_state"),
+                    )
+
+                # forget the entities of this component which are no longer alerting
+                for entity_key in list(ingested):
+                    if (
+                        entity_key.startswith(component + ":")
+                        and entity_key not in alerting
+                    ):
+                        del ingested[entity_key]
+
+        def _save_batch(batch):
+            ret_val, message, container_responses = self.save_containers(batch)
+            return phantom.is_success(ret_val), message
+
+        def _progress(saved_count, total_count):
+            self.save_progress(
+                "Ingested {0}/{1} TrackMe alerts".format(saved_count, total_count)
+            )
+
+        # push mode: the alerts received by the webhook are drained once TrackMe was polled, they
+        # are already deduplicated by the REST handler, poll now leaves them in the spool
+        # the alerts whose container is not saved go back to the spool, whatever the outcome
+        spool = self._alert_spool if push_mode and not self.is_poll_now() else None
+        with spooled_alerts(spool, containers) as alerts:
+            for alert in alerts:
+                containers.add_alert(alert_container(alert, container_label), alert)
+
+            # create the containers and their artifacts in batches
+            success, message = containers.save(_save_batch, _progress)
+
+        if not success:
+            return action_result.set_status(
+                phantom.APP_ERROR,
+                "Failed to save containers. Details: {0}".format(message),
+            )
+
+        summary = action_result.update_summary({})
+        summary["containers_created"] = containers.saved_count
+
+        self.save_progress("TrackMe alerts ingestion successful")
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _plan_request(self, endpoint, method, params, body):
+        """
+        Capture a write request into the plan, returns a description of the planned call
+        """
+
+        # plans are stored as JSON, request bodies are kept as text
+        if isinstance(body, bytes):
+            body = body.decode("utf-8")
 
-        # init body
-        body = {
-            "tenant_id": tenant_id,
-        }
+        entities_count = 0
+        try:
+            request_body = json.loads(body) if isinstance(body, str) else body or {}
+            entities = request_body.get("object_list") or request_body.get("keys_list")
+            if entities:
+                entities_count = len([item for item in entities.split(",") if item])
+        except (AttributeError, ValueError):
+            pass
 
-        if object_group_min_green_percent:
-            body["object_group_min_green_percent"] = object_group_min_green_percent
+        self._planned_requests.append(
+            {
+                "endpoint": endpoint,
+                "method": method,
+                "params": params,
+                "body": body,
+                "entities_count": entities_count,
+            }
+        )
 
-        # add update_comment
-        if update_comment:
-            body["update_comment"] = update_comment
+        return {
+            "planned": True,
+            "endpoint": endpoint,
+            "entities_count": entities_count,
+        }
 
-        # handle action
-        allowed_actions = [
-            "show",
-            "associate",
-            "unassociate",
-        ]
+    def _build_plan(self, param, requests_list):
+        """
+        Group the planned requests by endpoint and estimate their cost from the recorded latencies
+        """
 
-        if action not in allowed_actions:
-            raise Exception(
-                f"Invalid action={action}, valid actions are: {allowed_actions}"
+        config = self.get_config()
+        latency_stats = self._state.get("latency_stats", {})
+        write_rate = float(config.get("rate_limit_write", 0) or 0)
+
+        endpoints = {}
+        for request in requests_list:
+            endpoint = endpoints.setdefault(
+                request["endpoint"],
+                {"calls": 0, "entities": 0, "chunk_sizes": [], "estimated_duration": 0},
             )
+            endpoint["calls"] += 1
+            endpoint["entities"] += request["entities_count"]
+            endpoint["chunk_sizes"].append(request["entities_count"])
+
+        estimated_duration = 0
+        for endpoint_name, endpoint in endpoints.items():
+            latency = latency_stats.get(endpoint_name, {}).get(
+                "avg", TRACKME_PLAN_DEFAULT_LATENCY
+            )
+            endpoint["estimated_duration"] = endpoint["calls"] * latency
+            estimated_duration += endpoint["estimated_duration"]
 
-        # set endpoint
-        if action == "show":
-            target_endpoint = (
-                "/services/trackme/v2/splk_logical_groups/logical_groups_collection"
+        # the write rate limit bounds the duration of the plan
+        if write_rate > 0:
+            estimated_duration = max(
+                estimated_duration, len(requests_list) / write_rate
             )
-        elif action in ("associate", "unassociate"):
 
-            if action == "associate":
-                body["action"] = action
-                body["object_group_name"] = object_group_name
-                body["object_list"] = object_list
-                if object_group_min_green_percent:
-                    body["object_group_min_green_percent"] = (
-                        object_group_min_green_percent
-                    )
+        return {
+            "action": self.get_action_identifier(),
+            "parameters": dict(param),
+            "requests": requests_list,
+            "endpoints": endpoints,
+            "total_calls": len(requests_list),
+            "estimated_duration": round(estimated_duration, 3),
+        }
 
-            elif action == "unassociate":
-                body["action"] = action
-                body["object_group_name"] = object_group_name
-                body["object_list"] = object_list
+    def _handle_with_plan(self, param, handler):
+        """
+        Run a bulk action handler in execute, plan or apply mode.
 
-            target_endpoint = "/services/trackme/v2/splk_logical_groups/write/logical_groups_associate_group"
+        In plan mode, the handler runs with its writes captured: target entities are resolved
+        (reads are performed) but nothing is written. The plan is stored so that it can be
+        applied later, exactly as planned, with plan_mode=apply and its plan_id.
+        """
 
-        # make rest call
-        ret_val, response = self._make_rest_call(
-            target_endpoint,
-            action_result,
-            method="post",
-            body=json.dumps(body),
-            params=None,
-            headers=None,
-        )
+        plan_mode = param.get("plan_mode", TRACKME_PLAN_MODE_EXECUTE)
 
-        if phantom.is_fail(ret_val):
-            return action_result.get_status()
+        if plan_mode == TRACKME_PLAN_MODE_APPLY:
+            return self._apply_plan(param)
 
-        # Return success
+        if plan_mode != TRACKME_PLAN_MODE_PLAN:
+            return handler(param)
 
-        # Add a dictionary that is made up of the most important values from data into the summary
-        summary = action_result.update_summary({})
+        self._planned_requests = []
+        try:
+            ret_val = handler(param)
+            requests_list = self._planned_requests
+        finally:
+            self._planned_requests = None
 
-        # resp_data
-        # self.debug_print(f'response: {response}')
-        summary["trackme_response"] = json.dumps(response)
+        if phantom.is_fail(ret_val):
+            return ret_val
 
-        # add data
-        for item in response:
-            action_result.add_data(item)
+        action_result = self.get_action_results()[-1]
 
-        self.save_progress("Manage TrackMe logical group successful")
+        plan = self._build_plan(param, requests_list)
+        try:
+            plan_id = PlanStore(self.get_state_dir(), self.get_asset_id()).save(plan)
+        except Exception as e:
+            return action_result.set_status(
+                phantom.APP_ERROR,
+                "Unable to store the plan. Details: {0}".format(str(e)),
+            )
+
+        action_result.update_summary(
+            {
+                "plan_id": plan_id,
+                "total_calls": plan["total_calls"],
+                "estimated_duration": plan["estimated_duration"],
+                "endpoints": plan["endpoints"],
+            }
+        )
+
+        self.save_progress(
+            "Plan {0} stored: {1} calls, estimated duration {2} seconds".format(
+                plan_id, plan["total_calls"], plan["estimated_duration"]
+            )
+        )
         return action_result.set_status(phantom.APP_SUCCESS)
 
-    def _handle_logical_group_get_group_for_entity(self, param):
+    def _apply_plan(self, param):
+        """
+        Apply a stored plan: send its requests exactly as they were planned
+        """
+
         self.save_progress(
             "In action handler for: {0}".format(self.get_action_identifier())
         )
@@ -1579,94 +3898,204 @@ class TrackmeConnector(BaseConnector):
         # Add an action result object to self (BaseConnector) to represent the action for this param
         action_result = self.add_action_result(ActionResult(dict(param)))
 
-        # Access action parameters passed in the 'param' dictionary
+        plan_id = param.get("plan_id", None)
+        if not plan_id:
+            return action_result.set_status(
+                phantom.APP_ERROR, "plan_id must be provided when plan_mode=apply"
+            )
 
-        # Required values can be accessed directly
-        tenant_id = param["tenant_id"]
-        filter_object = param["filter_object"]
+        plan_store = PlanStore(self.get_state_dir(), self.get_asset_id())
+        try:
+            plan = plan_store.load(plan_id)
+        except Exception as e:
+            return action_result.set_status(
+                phantom.APP_ERROR,
+                "Unable to load the plan plan_id={0}. Details: {1}".format(
+                    plan_id, str(e)
+                ),
+            )
 
-        # init body
-        body = {
-            "tenant_id": tenant_id,
-        }
+        if plan.get("action") != self.get_action_identifier():
+            return action_result.set_status(
+                phantom.APP_ERROR,
+                "The plan plan_id={0} was computed for the action {1}".format(
+                    plan_id, plan.get("action")
+                ),
+            )
 
-        # set endpoint
-        target_endpoint = (
-            "/services/trackme/v2/splk_logical_groups/logical_groups_collection"
-        )
+        # the progress of the plan is checkpointed as a job, a failed apply resumes after the
+        # calls already sent
+        job = self._start_job(plan_id, {"action": plan["action"]})
+        completed_calls = set(job["completed_chunks"])
 
-        # we will first retrieve and parse the logical groups and seach for this entity
-        entity_associated_logical_groups = []
+        totals = {"plan_id": plan_id, "calls_processed": 0, "calls_skipped": 0}
+        for offset, request in enumerate(plan["requests"]):
+            if offset in completed_calls:
+                totals["calls_skipped"] += 1
+                continue
 
-        # make rest call
-        ret_val, response = self._make_rest_call(
-            target_endpoint,
-            action_result,
-            method="post",
-            body=json.dumps(body),
-            params=None,
-            headers=None,
-        )
+            ret_val, response = self._make_rest_call(
+                request["endpoint"],
+                action_result,
+                method=request["method"],
+                body=request["body"],
+                params=request["params"],
+                headers=None,
+            )
 
-        if phantom.is_fail(ret_val):
-            return action_result.get_status()
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
 
-        # Return success
+            self._checkpoint_job(job, offset)
+            totals["calls_processed"] += 1
+            if isinstance(response, list):
+                for item in response:
+                    action_result.add_data(item)
+            else:
+                action_result.add_data(response)
+                if isinstance(response, dict):
+                    for field in ("process_count", "success_count", "failures_count"):
+                        if isinstance(response.get(field), int):
+                            totals[field] = totals.get(field, 0) + response[field]
+
+            self.save_progress(
+                "Applied {0}/{1} planned calls".format(
+                    totals["calls_processed"], plan["total_calls"]
+                )
+            )
 
-        for item in response:
-            object_group_name = item.get("object_group_name")
-            object_group_key = item.get("_key")
-            object_group_members = item.get("object_group_members", [])
-
-            # loop through object_group_members
-            for member in object_group_members:
-                if member == filter_object:
-                    entity_associated_logical_groups.append(
-                        {
-                            "object_group_name": object_group_name,
-                            "object_group_key": object_group_key,
-                            "object_group_members": object_group_members,
-                            "object_group_min_green_percent": item.get(
-                                "object_group_min_green_percent"
-                            ),
-                            "object_group_mtime": item.get("object_group_mtime"),
-                            "object_group_mtime_human": item.get(
-                                "object_group_mtime_human"
-                            ),
-                        }
-                    )
+        # a plan is applied once
+        plan_store.delete(plan_id)
+        self._finish_job(plan_id)
 
-        # Add a dictionary that is made up of the most important values from data into the summary
-        summary = action_result.update_summary({})
+        summary = action_result.update_summary(totals)
+        summary["trackme_response"] = json_encode_text(totals)
 
-        # resp_data
-        # self.debug_print(f'response: {response}')
-        summary["trackme_response"] = json.dumps(entity_associated_logical_groups)
+        self.save_progress("Plan applied successfully")
+        return action_result.set_status(phantom.APP_SUCCESS)
 
-        # add data
-        if len(entity_associated_logical_groups) > 0:
-            for item in entity_associated_logical_groups:
-                action_result.add_data(item)
+    def _report_profile(self, profiler):
+        """
+        Attach the profile of the action run to the debug data, and optionally store
+        the pstats file in the vault of the container
+        """
 
-        else:  # entity has no group
-            action_result.add_data(
-                {
-                    "object_group_name": None,
-                    "object_group_key": None,
-                    "object_group_members": [],
-                    "object_group_min_green_percent": None,
-                    "object_group_mtime": None,
-                    "object_group_mtime_human": None,
-                }
+        config = self.get_config()
+
+        report = profiler.report()
+        self._debug("action profile: {0}", report)
+        for action_result in self.get_action_results():
+            action_result.add_debug_data({"profile": report})
+
+        if not config.get("profile_to_vault"):
+            return
+
+        container_id = self.get_container_id()
+        if not container_id:
+            self._debug("no container for this action run, pstats file not stored")
+            return
+
+        file_name = "trackme_{0}_{1}.pstats".format(
+            self.get_action_identifier(), int(time.time())
+        )
+        file_path = os.path.join(Vault.get_vault_tmp_dir(), file_name)
+
+        try:
+            profiler.dump_stats(file_path)
+            success, message, vault_id = ph_rules.vault_add(
+                container=container_id, file_location=file_path, file_name=file_name
+            )
+            self._debug(
+                "pstats file stored in vault, success={0}, vault_id={1}, message={2}",
+                success,
+                vault_id,
+                message,
             )
+        except Exception as e:
+            self._debug("failed to store the pstats file in vault: {0}", e)
+
+    def get_action_identifier(self):
+        # sub-operations of batch_execute run under their own action identifier
+        batch_action_id = getattr(self._batch_context, "action_id", None)
+        if batch_action_id:
+            return batch_action_id
+        return super(TrackmeConnector, self).get_action_identifier()
+
+    def add_action_result(self, action_result):
+        # the action results of batch_execute sub-operations are collected into the batch results
+        batch_results = getattr(self._batch_context, "results", None)
+        if batch_results is not None:
+            batch_results.append(action_result)
+            return action_result
+        return super(TrackmeConnector, self).add_action_result(action_result)
+
+    def _run_batch_operation(self, operation):
+        """
+        Run a sub-operation of batch_execute through the action dispatch, returns its result record
+        """
 
-        self.save_progress(
-            "Manage TrackMe get logical group information for TrackMe entity successful"
+        result = {
+            "id": operation["id"],
+            "action": operation["action"],
+            "status": "failed",
+            "message": None,
+            "summary": {},
+            "data": [],
+        }
+
+        # the platform applies the parameter defaults and required checks of the app JSON
+        # to action runs only, do the same for the sub-operation
+        action_parameters = self._get_action_parameters()
+        if operation["action"] not in action_parameters:
+            result["message"] = "Unknown action {0}".format(operation["action"])
+            return result
+        params, missing = apply_parameter_spec(
+            action_parameters[operation["action"]], operation.get("params", {})
         )
-        return action_result.set_status(phantom.APP_SUCCESS)
+        if missing:
+            result["message"] = "Missing required parameters: {0}".format(
+                ",".join(missing)
+            )
+            return result
 
-    def _handle_smart_status(self, param):
+        self._batch_context.action_id = operation["action"]
+        self._batch_context.results = []
+        try:
+            self._dispatch_action(params)
+            action_results = self._batch_context.results
+        except Exception as e:
+            result["message"] = "Operation failed. Details: {0}".format(str(e))
+            return result
+        finally:
+            self._batch_context.action_id = None
+            self._batch_context.results = None
+
+        if not action_results:
+            result["message"] = "Unknown action {0}".format(operation["action"])
+            return result
+
+        for operation_result in action_results:
+            result["data"].extend(operation_result.get_data())
+            result["summary"].update(operation_result.get_summary())
+        result["message"] = action_results[-1].get_message()
+        if all(
+            phantom.is_success(operation_result.get_status())
+            for operation_result in action_results
+        ):
+            result["status"] = "success"
+
+        return result
+
+    def _get_action_parameters(self):
+        # parameters of each action, as declared in the app JSON
+        if self._action_parameters is None:
+            self._action_parameters = {
+                action["identifier"]: action.get("parameters", {})
+                for action in self.get_app_json().get("actions", [])
+            }
+        return self._action_parameters
 
+    def _handle_batch_execute(self, param):
         self.save_progress(
             "In action handler for: {0}".format(self.get_action_identifier())
         )
@@ -1674,71 +4103,167 @@ class TrackmeConnector(BaseConnector):
         # Add an action result object to self (BaseConnector) to represent the action for this param
         action_result = self.add_action_result(ActionResult(dict(param)))
 
-        # Parameters
-        tenant_id = param["tenant_id"]
-        component = param["component"]
-        object_value = param["object"]
-
-        # body
-        body = {
-            "tenant_id": tenant_id,
-            "object": object_value,
-        }
+        try:
+            operations = json.loads(param["operations"])
+            if not isinstance(operations, list):
+                raise ValueError("operations must be a JSON array")
+            for index, operation in enumerate(operations):
+                if not isinstance(operation, dict) or not operation.get("action"):
+                    raise ValueError(
+                        "operation {0} must be an object with an action".format(index)
+                    )
+                if operation["action"] in TRACKME_BATCH_EXCLUDED_ACTIONS:
+                    raise ValueError(
+                        "the action {0} cannot run in a batch".format(
+                            operation["action"]
+                        )
+                    )
+                if (
+                    operation.get("params", {}).get(
+                        "plan_mode", TRACKME_PLAN_MODE_EXECUTE
+                    )
+                    != TRACKME_PLAN_MODE_EXECUTE
+                ):
+                    raise ValueError(
+                        "plan_mode is not supported in batch operations, operation {0}".format(
+                            index
+                        )
+                    )
+                operation["id"] = str(operation.get("id", index))
+                operation["depends_on"] = [
+                    str(item) for item in operation.get("depends_on", [])
+                ]
+        except Exception as e:
+            return action_result.set_status(
+                phantom.APP_ERROR,
+                "Invalid operations. Details: {0}".format(str(e)),
+            )
 
-        # target_endpoint
-        target_endpoint = None
-        if component == "dsm":
-            target_endpoint = "/services/trackme/v2/splk_smart_status/ds_smart_status"
-        elif component == "dhm":
-            target_endpoint = "/services/trackme/v2/splk_smart_status/dh_smart_status"
-        elif component == "mhm":
-            target_endpoint = "/services/trackme/v2/splk_smart_status/mh_smart_status"
-        elif component == "wlk":
-            target_endpoint = "/services/trackme/v2/splk_smart_status/wlk_smart_status"
-        elif component == "flx":
-            target_endpoint = "/services/trackme/v2/splk_smart_status/flx_smart_status"
+        operation_ids = [operation["id"] for operation in operations]
+        for operation in operations:
+            unknown = set(operation["depends_on"]) - set(operation_ids)
+            if unknown:
+                return action_result.set_status(
+                    phantom.APP_ERROR,
+                    "Operation {0} depends on unknown operations: {1}".format(
+                        operation["id"], ",".join(sorted(unknown))
+                    ),
+                )
 
-        # make rest call
-        ret_val, response = self._make_rest_call(
-            target_endpoint,
-            action_result,
-            method="post",
-            body=json.dumps(body),
-            params=None,
-            headers=None,
-        )
+        # run the operations by waves, the operations whose dependencies are complete run concurrently
+        results = {}
+        remaining = list(operations)
+        while remaining:
+            ready = [
+                operation
+                for operation in remaining
+                if all(dependency in results for dependency in operation["depends_on"])
+            ]
+            if not ready:
+                for operation in remaining:
+                    results[operation["id"]] = {
+                        "id": operation["id"],
+                        "action": operation["action"],
+                        "status": "skipped",
+                        "message": "Circular dependency between operations",
+                        "summary": {},
+                        "data": [],
+                    }
+                break
+
+            to_run = []
+            for operation in ready:
+                failed_dependencies = [
+                    dependency
+                    for dependency in operation["depends_on"]
+                    if results[dependency]["status"] != "success"
+                ]
+                if failed_dependencies:
+                    results[operation["id"]] = {
+                        "id": operation["id"],
+                        "action": operation["action"],
+                        "status": "skipped",
+                        "message": "Dependencies did not succeed: {0}".format(
+                            ",".join(failed_dependencies)
+                        ),
+                        "summary": {},
+                        "data": [],
+                    }
+                else:
+                    to_run.append(operation)
+
+            for operation, result in zip(
+                to_run,
+                self._fan_out(
+                    self._run_batch_operation,
+                    to_run,
+                    default_concurrency=TRACKME_BATCH_DEFAULT_CONCURRENCY,
+                ),
+            ):
+                results[operation["id"]] = result
 
-        if phantom.is_fail(ret_val):
-            return action_result.get_status()
+            remaining = [
+                operation for operation in remaining if operation["id"] not in results
+            ]
 
-        # Return success
+        # add data, one record per operation in the order of the operations
+        for operation_id in operation_ids:
+            action_result.add_data(results[operation_id])
 
         # Add a dictionary that is made up of the most important values from data into the summary
         summary = action_result.update_summary({})
+        summary["operations_count"] = len(operation_ids)
+        for status in ("success", "failed", "skipped"):
+            summary["{0}_count".format(status)] = len(
+                [result for result in results.values() if result["status"] == status]
+            )
 
-        # resp_data
-        # self.debug_print(f'response: {response}')
-        summary["trackme_response"] = json.dumps(response)
-
-        # add data
-        action_result.add_data(response)
+        # the batch fails if any of its operations did not succeed, the status of each
+        # operation is in the action results
+        if summary["success_count"] != len(operation_ids):
+            return action_result.set_status(
+                phantom.APP_ERROR,
+                "{0} operations failed and {1} were skipped, see the action results for details".format(
+                    summary["failed_count"], summary["skipped_count"]
+                ),
+            )
 
-        self.save_progress("SmartStatus run successful")
+        self.save_progress("Batch execute completed")
         return action_result.set_status(phantom.APP_SUCCESS)
 
     def handle_action(self, param):
+        config = self.get_config()
+
+        # Profile the action run when requested in the asset configuration
+        if not config.get("profile_actions"):
+            return self._dispatch_action(param)
+
+        profiler = ActionProfiler(
+            top_n=int(config.get("profile_top_n", TRACKME_PROFILE_DEFAULT_TOP_N))
+        )
+        profiler.start()
+        try:
+            return self._dispatch_action(param)
+        finally:
+            profiler.stop()
+            self._report_profile(profiler)
+
+    def _dispatch_action(self, param):
         ret_val = phantom.APP_SUCCESS
 
         # Get the action that we are supposed to execute for this App Run
         action_id = self.get_action_identifier()
 
-        self.debug_print("action_id", self.get_action_identifier())
+        self._debug("action_id: {0}", action_id)
 
         if action_id == "ack_get":
             ret_val = self._handle_ack_get(param)
 
+        if action_id == "ack_renew_expiring":
+            ret_val = self._handle_ack_renew_expiring(param)
+
         if action_id == "ack_manage":
-            ret_val = self._handle_ack_manage(param)
+            ret_val = self._handle_with_plan(param, self._handle_ack_manage)
 
         if action_id == "maintenance_status":
             ret_val = self._handle_maintenance_status(param)
@@ -1774,7 +4299,24 @@ class TrackmeConnector(BaseConnector):
             ret_val = self._handle_component_get_entity(param)
 
         if action_id == "component_manage_entity":
-            ret_val = self._handle_component_manage_entity(param)
+            ret_val = self._handle_with_plan(
+                param, self._handle_component_manage_entity
+            )
+
+        if action_id == "batch_execute":
+            ret_val = self._handle_batch_execute(param)
+
+        if action_id == "ml_outliers_bulk_add_period_exclusion":
+            ret_val = self._handle_ml_outliers_bulk_add_period_exclusion(param)
+
+        if action_id == "ml_outliers_pipeline":
+            ret_val = self._handle_ml_outliers_pipeline(param)
+
+        if action_id == "search_entity":
+            ret_val = self._handle_search_entity(param)
+
+        if action_id == "locate_entity":
+            ret_val = self._handle_locate_entity(param)
 
         if action_id == "logical_group_get_group_for_entity":
             ret_val = self._handle_logical_group_get_group_for_entity(param)
@@ -1782,9 +4324,15 @@ class TrackmeConnector(BaseConnector):
         if action_id == "logical_group_manage":
             ret_val = self._handle_logical_group_manage(param)
 
+        if action_id == "logical_group_evaluate":
+            ret_val = self._handle_logical_group_evaluate(param)
+
         if action_id == "smart_status":
             ret_val = self._handle_smart_status(param)
 
+        if action_id == "on_poll":
+            ret_val = self._handle_on_poll(param)
+
         if action_id == "test_connectivity":
             ret_val = self._handle_test_connectivity(param)
 
@@ -1808,16 +4356,144 @@ class TrackmeConnector(BaseConnector):
         """
 
         self._base_url = config.get("base_url")
-        self._splunk_url = config.get("splunk_url")
+        # Debug logging of payloads, truncated and sampled
+        self._debug_logger = LazyDebugLogger(
+            self.debug_print,
+            enabled=bool(config.get("debug_logging", True)),
+            max_payload=int(config.get("debug_max_payload", TRACKME_DEBUG_MAX_PAYLOAD)),
+            sample_every=int(
+                config.get("debug_sample_every", TRACKME_DEBUG_SAMPLE_EVERY)
+            ),
+        )
+
         self._verify_ssl = config.get("verify_ssl")
         self._splunk_token = config.get("splunk_token")
         self._headers = {"Authorization": f"Bearer {self._splunk_token}"}
 
+        # splunk_url accepts a comma separated list of splunkd members
+        splunk_urls = [
+            url.strip().rstrip("/")
+            for url in (config.get("splunk_url") or "").split(",")
+            if url.strip().rstrip("/")
+        ]
+        if not splunk_urls:
+            return self.set_status(
+                phantom.APP_ERROR,
+                "splunk_url must define at least one splunkd member",
+            )
+        self._splunk_url = splunk_urls[0]
+        self._splunkd_pool = SplunkdPool(
+            splunk_urls,
+            self._state.setdefault("splunkd_pool", {}),
+            lock=self._state_lock,
+        )
+
+        # Record/replay of the HTTP interactions into a cassette file
+        cassette_mode = config.get("cassette_mode", TRACKME_CASSETTE_MODE_OFF)
+        cassette_path = config.get("cassette_path")
+        if cassette_mode != TRACKME_CASSETTE_MODE_OFF and not cassette_path:
+            return self.set_status(
+                phantom.APP_ERROR,
+                "cassette_path must be set when cassette_mode={0}".format(
+                    cassette_mode
+                ),
+            )
+
+        if cassette_mode == TRACKME_CASSETTE_MODE_RECORD:
+            self._cassette_recorder = CassetteRecorder(
+                cassette_path, self._splunk_token, splunk_urls
+            )
+        elif cassette_mode == TRACKME_CASSETTE_MODE_REPLAY:
+            try:
+                self._cassette_player = CassettePlayer(
+                    cassette_path,
+                    time_scale=float(config.get("cassette_time_scale", 1)),
+                    token=self._splunk_token,
+                    urls=splunk_urls,
+                )
+            except Exception as e:
+                return self.set_status(
+                    phantom.APP_ERROR,
+                    "Unable to load the cassette {0}. Details: {1}".format(
+                        cassette_path, str(e)
+                    ),
+                )
+
+        # Probe the unhealthy members once their retry delay has elapsed, there is nothing to probe when replaying
+        if not self._cassette_player:
+            for url in self._splunkd_pool.due_for_probe():
+                self._probe_splunkd_node(url)
+
+        # Rate limiting, requests per second per endpoint class, 0 disables the limit for the class
+        rate_limiter = TokenBucketRateLimiter(
+            self.get_state_dir(),
+            self.get_asset_id(),
+            {
+                TRACKME_ENDPOINT_CLASS_READ: float(
+                    config.get("rate_limit_read", 0) or 0
+                ),
+                TRACKME_ENDPOINT_CLASS_WRITE: float(
+                    config.get("rate_limit_write", 0) or 0
+                ),
+                TRACKME_ENDPOINT_CLASS_ML: float(config.get("rate_limit_ml", 0) or 0),
+            },
+            policy=config.get("rate_limit_policy", TRACKME_RATE_LIMIT_POLICY_BLOCK),
+            max_wait=float(
+                config.get("rate_limit_max_wait", TRACKME_RATE_LIMIT_DEFAULT_MAX_WAIT)
+            ),
+        )
+        if rate_limiter.is_enabled():
+            self._rate_limiter = rate_limiter
+
+        # Adaptive concurrency of fan-out operations, the learned limit is kept in the state
+        concurrency = AdaptiveConcurrencyLimiter(
+            self._state.setdefault("adaptive_concurrency", {}),
+            max_limit=int(
+                config.get("max_concurrency", TRACKME_CONCURRENCY_DEFAULT_MAX)
+                or TRACKME_CONCURRENCY_DEFAULT_MAX
+            ),
+        )
+        if concurrency.is_enabled():
+            self._concurrency = concurrency
+
+        # Push mode, the webhook token is published (hashed) for the app REST handler
+        try:
+            self._alert_spool = AlertSpool(
+                self.get_asset_id(), webhook_dir(self.get_state_dir())
+            )
+            # with an automation user token, the REST handler creates the containers right away
+            delivery = None
+            if config.get("soar_api_token"):
+                delivery = {
+                    "base_url": self.get_phantom_base_url(),
+                    "auth_token": config["soar_api_token"],
+                    "asset_id": self.get_asset_id(),
+                    "container_label": config.get("ingest", {}).get("container_label"),
+                }
+            self._alert_spool.configure(config.get("webhook_token"), delivery)
+        except Exception as e:
+            self._debug("webhook spool unavailable: {0}", e)
+            self._alert_spool = None
+
+        # Coalescing of identical in-flight reads, results are shared with the waiting callers
+        if config.get("coalesce_reads"):
+            self._single_flight = SingleFlight(
+                self.get_state_dir(),
+                self.get_asset_id(),
+                ttl=float(config.get("coalesce_ttl", TRACKME_COALESCE_DEFAULT_TTL)),
+            )
+
         return phantom.APP_SUCCESS
 
     def finalize(self):
         # Save the state, this data is saved across actions and app upgrades
         self.save_state(self._state)
+        if self._cassette_recorder:
+            self._cassette_recorder.close()
+        with self._sessions_lock:
+            for session in self._all_sessions:
+                session.close()
+            self._all_sessions = []
         return phantom.APP_SUCCESS
 
 
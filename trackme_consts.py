@@ -1 +1,181 @@
 # Define your constants here
+
+# TrackMe REST API root
+TRACKME_API_ROOT = "/services/trackme/v2"
+
+# Endpoint classes, used to apply distinct rate limits toward splunkd
+TRACKME_ENDPOINT_CLASS_READ = "read"
+TRACKME_ENDPOINT_CLASS_WRITE = "write"
+TRACKME_ENDPOINT_CLASS_ML = "ml"
+
+# Endpoints which perform writes but are not located under a /write/ path
+TRACKME_WRITE_ENDPOINTS = (
+    "/services/trackme/v2/ack/ack_manage",
+    "/services/trackme/v2/maintenance/global_maintenance_enable",
+    "/services/trackme/v2/maintenance/maintenance_disable",
+)
+
+# Rate limiting
+TRACKME_RATE_LIMIT_POLICY_BLOCK = "block"
+TRACKME_RATE_LIMIT_POLICY_FAIL_FAST = "fail_fast"
+TRACKME_RATE_LIMIT_DEFAULT_MAX_WAIT = 10
+TRACKME_RATE_LIMIT_STATE_FILE = "{asset_id}_rate_limit.json"
+
+# Coalescing of identical in-flight reads
+TRACKME_COALESCE_DEFAULT_TTL = 5
+TRACKME_COALESCE_WAIT_TIMEOUT = 60
+TRACKME_COALESCE_STATE_DIR = "{asset_id}_inflight"
+
+# Converge mode of component_manage_entity, maps each action to the body attributes
+# to compare against the fields of the entity record, actions not listed are always sent
+TRACKME_CONVERGE_FIELDS = {
+    "enable": {"action": "monitored_state"},
+    "disable": {"action": "monitored_state"},
+    "update_priority": {"priority": "priority"},
+    "update_wdays": {"monitoring_wdays": "monitoring_wdays"},
+    "update_hours_ranges": {"monitoring_hours_ranges": "monitoring_hours_ranges"},
+    "update_lag_policy": {
+        "allow_adaptive_delay": "allow_adaptive_delay",
+        "data_lag_alert_kpis": "data_lag_alert_kpis",
+        "data_max_delay_allowed": "data_max_delay_allowed",
+        "data_max_lag_allowed": "data_max_lag_allowed",
+        "data_override_lagging_class": "data_override_lagging_class",
+        "future_tolerance": "future_tolerance",
+        "splk_dhm_alerting_policy": "splk_dhm_alerting_policy",
+    },
+    "update_dcount_host": {
+        "min_dcount_host": "min_dcount_host",
+        "min_dcount_field": "min_dcount_field",
+    },
+    "update_manual_tags": {"tags_manual": "tags_manual"},
+}
+# enumerated fields compared regardless of case, other fields such as tags are compared exactly
+TRACKME_CONVERGE_CASE_INSENSITIVE_FIELDS = (
+    "monitored_state",
+    "priority",
+    "allow_adaptive_delay",
+    "data_override_lagging_class",
+    "splk_dhm_alerting_policy",
+)
+
+# Splunkd members pool, health probing and routing
+TRACKME_HEALTH_ENDPOINT = "/services/trackme/v2/vtenants/show_tenants"
+TRACKME_HEALTH_PROBE_TIMEOUT = 5
+TRACKME_NODE_RETRY_AFTER = 60
+TRACKME_NODE_DEFAULT_LATENCY = 0.1
+TRACKME_NODE_LATENCY_ALPHA = 0.3
+TRACKME_FAILOVER_STATUS_CODES = (502, 503, 504)
+
+# on_poll ingestion of TrackMe alerts
+TRACKME_COMPONENTS = ("dsm", "dhm", "mhm", "wlk", "flx")
+TRACKME_POLL_DEFAULT_STATES = "red"
+TRACKME_POLL_DEFAULT_MAX_ENTITIES = 500
+TRACKME_POLL_BATCH_SIZE = 100
+TRACKME_POLL_SEVERITY = {
+    "high": "High",
+    "medium": "Medium",
+    "low": "Low",
+}
+TRACKME_POLL_CEF_FIELDS = (
+    "object",
+    "alias",
+    "object_state",
+    "priority",
+    "anomaly_reason",
+    "monitored_state",
+    "ack_state",
+    "isOutlier",
+    "isAnomaly",
+    "latest_flip_time",
+    "latest_flip_state",
+)
+
+# Record/replay of HTTP interactions
+TRACKME_CASSETTE_MODE_OFF = "off"
+TRACKME_CASSETTE_MODE_RECORD = "record"
+TRACKME_CASSETTE_MODE_REPLAY = "replay"
+TRACKME_CASSETTE_SCRUBBED_TOKEN = "<scrubbed-token>"
+TRACKME_CASSETTE_SCRUBBED_HOST = "scrubbed-host-{0}"
+TRACKME_CASSETTE_SCRUBBED_VALUE = "<scrubbed>"
+# params and JSON fields whose name contains one of these words are scrubbed from cassettes
+TRACKME_CASSETTE_SCRUBBED_FIELDS = ("password", "token", "secret", "api_key", "apikey")
+
+# Profiling of action runs
+TRACKME_PROFILE_DEFAULT_TOP_N = 20
+TRACKME_PROFILE_TRACEMALLOC_FRAMES = 5
+TRACKME_PROFILE_SAMPLE_INTERVAL = 0.05
+TRACKME_PROFILE_PEAK_GROWTH = 1.05
+
+# Debug logging
+TRACKME_DEBUG_MAX_PAYLOAD = 2048
+TRACKME_DEBUG_SAMPLE_EVERY = 100
+
+# Vault backed input of object lists
+TRACKME_VAULT_DEFAULT_CHUNK_SIZE = 500
+
+# Output of read actions: action data or compressed NDJSON vault file
+TRACKME_OUTPUT_MODE_DATA = "data"
+TRACKME_OUTPUT_MODE_VAULT = "vault"
+TRACKME_SPILL_SUMMARY_FIELDS = ("object_state", "priority", "monitored_state")
+TRACKME_OUTPUT_MODE_AGGREGATE = "aggregate"
+
+# Aggregate statistics of component_get_entity
+TRACKME_STATS_COUNT_FIELDS = ("object_state", "priority", "monitored_state")
+TRACKME_STATS_LAG_FIELDS = ("data_last_lag_seen", "data_last_ingestion_lag_seen")
+TRACKME_STATS_PERCENTILES = (50, 90, 95, 99)
+
+# Logical groups
+TRACKME_LOGICAL_GROUP_DEFAULT_MIN_GREEN_PERCENT = 50
+
+# Dry-run planning of bulk changes
+TRACKME_PLAN_MODE_EXECUTE = "execute"
+TRACKME_PLAN_MODE_PLAN = "plan"
+TRACKME_PLAN_MODE_APPLY = "apply"
+TRACKME_PLAN_STATE_DIR = "{asset_id}_plans"
+TRACKME_PLAN_DEFAULT_LATENCY = 1.0
+TRACKME_LATENCY_STATS_ALPHA = 0.2
+
+# Adaptive (AIMD) concurrency of fan-out operations
+TRACKME_CONCURRENCY_DEFAULT_MAX = 1
+TRACKME_CONCURRENCY_MIN = 1
+TRACKME_CONCURRENCY_INCREASE = 1.0
+TRACKME_CONCURRENCY_DECREASE = 0.5
+TRACKME_CONCURRENCY_LATENCY_TOLERANCE = 2.0
+TRACKME_CONCURRENCY_BASELINE_DRIFT = 0.01
+TRACKME_CONCURRENCY_PRESSURE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Resumable bulk jobs, checkpoints of jobs not resumed within 7 days are purged
+TRACKME_JOB_MAX_AGE = 604800
+
+# Cross-tenant entity search
+TRACKME_TENANTS_CACHE_TTL = 300
+TRACKME_SEARCH_DEFAULT_CONCURRENCY = 8
+
+# Bulk Machine Learning period exclusions
+TRACKME_ML_MODELS_CACHE_TTL = 600
+TRACKME_ML_BULK_DEFAULT_CONCURRENCY = 4
+
+# Machine Learning pipeline, polling of the training with an exponential backoff
+TRACKME_ML_PIPELINE_DEFAULT_TIMEOUT = 900
+TRACKME_ML_POLL_INITIAL_DELAY = 1
+TRACKME_ML_POLL_MAX_DELAY = 30
+
+# Composite batch action
+TRACKME_BATCH_DEFAULT_CONCURRENCY = 4
+TRACKME_BATCH_EXCLUDED_ACTIONS = ("batch_execute", "on_poll", "test_connectivity")
+
+# Push mode, TrackMe alert webhooks received by the app REST handler
+# the spool lives in the state directory of the app, <PHANTOM_HOME>/local_data/app_states/<appid>
+TRACKME_APP_ID = "dce19fec-9c3e-4bec-914e-8230ac80a417"
+TRACKME_WEBHOOK_DIR = "webhook"
+TRACKME_WEBHOOK_REQUIRED_FIELDS = ("tenant_id", "component", "object_state")
+TRACKME_WEBHOOK_MAX_ALERTS = 1000
+# an alert for the same entity, state and flip time is a duplicate for this long, in seconds
+TRACKME_WEBHOOK_DEDUP_TTL = 86400
+# timeout of the container creation requests of the REST handler, in seconds
+TRACKME_WEBHOOK_DELIVERY_TIMEOUT = 10
+
+# Renewal of the acknowledgements about to expire
+TRACKME_ACK_RENEW_DEFAULT_WINDOW = 3600
+TRACKME_ACK_RENEW_DEFAULT_PERIOD = 86400
+TRACKME_ACK_RENEW_DEFAULT_COMMENT = "Acknowledgement renewed before its expiration"
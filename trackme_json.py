@@ -0,0 +1,146 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Python 3 Compatibility imports
+from __future__ import print_function, unicode_literals
+
+__author__ = "TrackMe Limited"
+__copyright__ = "Copyright 2024, TrackMe Limited, U.K."
+__credits__ = "TrackMe Limited, U.K."
+__license__ = "TrackMe Limited, all rights reserved"
+__version__ = "0.1.0"
+__maintainer__ = "TrackMe Limited, U.K."
+__email__ = "support@trackme-solutions.com"
+__status__ = "PRODUCTION"
+
+import json
+import re
+
+# orjson is used when installed, it is significantly faster than the standard library on large
+# entity and logical group payloads, the standard library is used otherwise
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = "orjson" if orjson else "json"
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _stdlib_encode(obj):
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def json_encode(obj):
+    """
+    Encode an object to JSON bytes, ready to be sent as a request body
+    """
+
+    if orjson:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # types orjson does not handle, such as integers larger than 64 bits
+            pass
+    return _stdlib_encode(obj)
+
+
+def json_encode_text(obj):
+    """
+    Encode an object to a JSON string, for the action summaries
+
+    The summaries keep the format of the standard library, which orjson cannot produce.
+    """
+
+    return json.dumps(obj)
+
+
+def json_decode(data):
+    """
+    Decode JSON bytes or string, such as a response body
+    """
+
+    if orjson:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # content orjson rejects but the standard library accepts, such as NaN and Infinity
+            pass
+    return json.loads(data)
+
+
+def json_decode_items(data, key, consumer):
+    """
+    Decode a JSON object, passing the items of its array under key to consumer one at a time
+    instead of building the whole array, returns the object without key.
+
+    The items are decoded by the standard library one after the other, so that only one of
+    them is held at a time. A top level array has its items passed to consumer the same way,
+    and an empty list is returned. Anything else is decoded in full.
+    """
+
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+
+    skip = _WHITESPACE.match
+    index = skip(data, 0).end()
+    if data.startswith("[", index):
+        index = _decode_array_items(data, index, consumer)
+        if skip(data, index).end() != len(data):
+            raise json.JSONDecodeError("Extra data", data, index)
+        return []
+    if not data.startswith("{", index):
+        return json_decode(data)
+
+    obj = {}
+    index = skip(data, index + 1).end()
+    if data.startswith("}", index):
+        index += 1
+    else:
+        while True:
+            name, index = _DECODER.raw_decode(data, index)
+            if not isinstance(name, str):
+                raise json.JSONDecodeError("Expecting property name", data, index)
+            index = skip(data, index).end()
+            if not data.startswith(":", index):
+                raise json.JSONDecodeError("Expecting ':' delimiter", data, index)
+            index = skip(data, index + 1).end()
+
+            if name == key and data.startswith("[", index):
+                index = _decode_array_items(data, index, consumer)
+            else:
+                obj[name], index = _DECODER.raw_decode(data, index)
+
+            index = skip(data, index).end()
+            if data.startswith(",", index):
+                index = skip(data, index + 1).end()
+            elif data.startswith("}", index):
+                index += 1
+                break
+            else:
+                raise json.JSONDecodeError("Expecting ',' delimiter", data, index)
+
+    if skip(data, index).end() != len(data):
+        raise json.JSONDecodeError("Extra data", data, index)
+    return obj
+
+
+def _decode_array_items(data, index, consumer):
+    # index is the opening bracket of the array, returns the index after its closing bracket
+    skip = _WHITESPACE.match
+    index = skip(data, index + 1).end()
+    if data.startswith("]", index):
+        return index + 1
+
+    while True:
+        item, index = _DECODER.raw_decode(data, index)
+        consumer(item)
+        index = skip(data, index).end()
+        if data.startswith(",", index):
+            index = skip(data, index + 1).end()
+        elif data.startswith("]", index):
+            return index + 1
+        else:
+            raise json.JSONDecodeError("Expecting ',' delimiter", data, index)
@@ -0,0 +1,83 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Python 3 Compatibility imports
+from __future__ import print_function, unicode_literals
+
+__author__ = "TrackMe Limited"
+__copyright__ = "Copyright 2024, TrackMe Limited, U.K."
+__credits__ = "TrackMe Limited, U.K."
+__license__ = "TrackMe Limited, all rights reserved"
+__version__ = "0.1.0"
+__maintainer__ = "TrackMe Limited, U.K."
+__email__ = "support@trackme-solutions.com"
+__status__ = "PRODUCTION"
+
+import collections
+import reprlib
+import threading
+
+from trackme_consts import *
+
+
+class LazyDebugLogger(object):
+    """
+    Debug logger which checks the level before doing any work.
+
+    Messages are templates formatted with str.format only when debug logging is enabled,
+    arguments are rendered with bounded depth and length so that large payloads are
+    truncated, and repeated messages (same template) are sampled.
+    """
+
+    def __init__(
+        self,
+        print_func,
+        enabled=True,
+        max_payload=TRACKME_DEBUG_MAX_PAYLOAD,
+        sample_every=TRACKME_DEBUG_SAMPLE_EVERY,
+    ):
+        self._print_func = print_func
+        self.enabled = enabled
+        self._max_payload = max_payload
+        self._sample_every = max(int(sample_every), 1)
+        self._counts = collections.Counter()
+        self._lock = threading.Lock()
+
+        self._repr = reprlib.Repr()
+        self._repr.maxlevel = 4
+        self._repr.maxdict = 25
+        self._repr.maxlist = 25
+        self._repr.maxtuple = 25
+        self._repr.maxset = 25
+        self._repr.maxstring = max_payload
+        self._repr.maxother = max_payload
+
+    def _render(self, value):
+        if isinstance(value, str):
+            rendered = value
+        else:
+            rendered = self._repr.repr(value)
+
+        if len(rendered) > self._max_payload:
+            rendered = "{0}... ({1} chars truncated)".format(
+                rendered[: self._max_payload], len(rendered) - self._max_payload
+            )
+        return rendered
+
+    def debug(self, template, *args):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._counts[template] += 1
+            count = self._counts[template]
+
+        # log the first occurrence of a message, then one every sample_every occurrences
+        if count > 1 and count % self._sample_every:
+            return
+
+        message = template.format(*[self._render(arg) for arg in args])
+        if count > 1:
+            message = "{0} (repeated {1} times)".format(message, count)
+
+        self._print_func(message)
@@ -0,0 +1,60 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Python 3 Compatibility imports
+from __future__ import print_function, unicode_literals
+
+__author__ = "TrackMe Limited"
+__copyright__ = "Copyright 2024, TrackMe Limited, U.K."
+__credits__ = "TrackMe Limited, U.K."
+__license__ = "TrackMe Limited, all rights reserved"
+__version__ = "0.1.0"
+__maintainer__ = "TrackMe Limited, U.K."
+__email__ = "support@trackme-solutions.com"
+__status__ = "PRODUCTION"
+
+import json
+import os
+import time
+import uuid
+
+from trackme_consts import *
+
+
+class PlanStore(object):
+    """
+    Store of the plans computed by the dry-run mode, one JSON file per plan in the app state directory
+    """
+
+    def __init__(self, state_dir, asset_id):
+        self._dir = os.path.join(
+            state_dir, TRACKME_PLAN_STATE_DIR.format(asset_id=asset_id)
+        )
+        if not os.path.isdir(self._dir):
+            os.makedirs(self._dir, exist_ok=True)
+
+    def _path(self, plan_id):
+        # plan ids are generated uuids, anything else is rejected to stay within the store
+        return os.path.join(self._dir, str(uuid.UUID(plan_id)) + ".json")
+
+    def save(self, plan):
+        plan_id = plan.get("plan_id") or str(uuid.uuid4())
+        plan["plan_id"] = plan_id
+        plan.setdefault("created", time.time())
+
+        file_path = self._path(plan_id)
+        tmp_path = file_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(plan, f)
+        os.replace(tmp_path, file_path)
+        return plan_id
+
+    def load(self, plan_id):
+        with open(self._path(plan_id)) as f:
+            return json.load(f)
+
+    def delete(self, plan_id):
+        try:
+            os.remove(self._path(plan_id))
+        except OSError:
+            pass
@@ -0,0 +1,156 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Python 3 Compatibility imports
+from __future__ import print_function, unicode_literals
+
+__author__ = "TrackMe Limited"
+__copyright__ = "Copyright 2024, TrackMe Limited, U.K."
+__credits__ = "TrackMe Limited, U.K."
+__license__ = "TrackMe Limited, all rights reserved"
+__version__ = "0.1.0"
+__maintainer__ = "TrackMe Limited, U.K."
+__email__ = "support@trackme-solutions.com"
+__status__ = "PRODUCTION"
+
+import collections
+import contextlib
+
+from trackme_consts import *
+
+PendingContainer = collections.namedtuple(
+    "PendingContainer", ("container", "ingested", "entity_key", "object_state", "alert")
+)
+
+
+def poll_container(tenant_id, component, entity_key, record, container_label):
+    """
+    Build a SOAR container and its artifact for an alerting TrackMe entity
+    """
+
+    severity = TRACKME_POLL_SEVERITY.get(record.get("priority"), "Medium")
+    source_data_identifier = "{0}:{1}:{2}".format(
+        tenant_id, entity_key, record.get("latest_flip_time", "")
+    )
+
+    cef = {
+        field: record.get(field)
+        for field in TRACKME_POLL_CEF_FIELDS
+        if record.get(field) is not None
+    }
+    cef["tenant_id"] = tenant_id
+    cef["component"] = component
+    cef["keyid"] = record.get("_key") or record.get("keyid")
+
+    return {
+        "name": "TrackMe alert - tenant={0} component={1} object={2}".format(
+            tenant_id, component, record.get("object")
+        ),
+        "description": "TrackMe entity in state={0}, anomaly_reason={1}".format(
+            record.get("object_state"), record.get("anomaly_reason")
+        ),
+        "label": container_label,
+        "severity": severity,
+        "source_data_identifier": source_data_identifier,
+        "run_automation": False,
+        "artifacts": [
+            {
+                "name": "TrackMe entity",
+                "label": "trackme",
+                "severity": severity,
+                "source_data_identifier": source_data_identifier,
+                "cef": cef,
+                "run_automation": True,
+            }
+        ],
+    }
+
+
+def alert_container(alert, container_label):
+    """
+    Build the container of an alert pushed to the webhook, the same as if the entity was polled
+    """
+
+    entity_key = "{0}:{1}".format(
+        alert["component"],
+        alert.get("_key") or alert.get("keyid") or alert.get("object"),
+    )
+    return poll_container(
+        alert["tenant_id"], alert["component"], entity_key, alert, container_label
+    )
+
+
+class PollContainers(object):
+    """
+    Containers built by an ingestion run, saved in batches.
+
+    The checkpoint of a polled entity is only updated once its container is saved, so that the
+    entities of a batch which could not be saved are ingested again by the next poll. Containers
+    of alerts received by the webhook keep their alert, to put it back in the spool if unsaved.
+    """
+
+    def __init__(self, batch_size=TRACKME_POLL_BATCH_SIZE):
+        self._batch_size = batch_size
+        self._pending = []
+        self._saved_alerts = set()
+        self.saved_count = 0
+
+    def __len__(self):
+        return self.saved_count + len(self._pending)
+
+    def add_entity(self, container, ingested, entity_key, object_state):
+        # ingested is the checkpoint of the tenant, updated once the container is saved
+        self._pending.append(
+            PendingContainer(container, ingested, entity_key, object_state, None)
+        )
+
+    def add_alert(self, container, alert):
+        self._pending.append(PendingContainer(container, None, None, None, alert))
+
+    def save(self, save_batch, progress=None):
+        """
+        Save the pending containers by batches with save_batch, which is called with a list of
+        containers and returns a (success, message) tuple. Stops at the first batch which fails,
+        returns (False, message) in this case, the containers of the batch and of the next
+        batches remain pending.
+        """
+
+        while self._pending:
+            batch = self._pending[: self._batch_size]
+            success, message = save_batch([entry.container for entry in batch])
+            if not success:
+                return False, message
+
+            del self._pending[: len(batch)]
+            self.saved_count += len(batch)
+            for entry in batch:
+                if entry.ingested is not None:
+                    entry.ingested[entry.entity_key] = entry.object_state
+                if entry.alert is not None:
+                    self._saved_alerts.add(id(entry.alert))
+
+            if progress:
+                progress(self.saved_count, len(self))
+
+        return True, None
+
+    def unsaved_alerts(self, alerts):
+        # the alerts whose container was not saved, whether or not it was added
+        return [alert for alert in alerts if id(alert) not in self._saved_alerts]
+
+
+@contextlib.contextmanager
+def spooled_alerts(spool, containers):
+    """
+    Drain the alerts of the webhook spool for an ingestion run, nothing is drained if spool is
+    None. When the block exits, on every exit path, the alerts whose container was not saved
+    are put back into the spool.
+    """
+
+    alerts = spool.drain() if spool else []
+    try:
+        yield alerts
+    finally:
+        unsaved_alerts = containers.unsaved_alerts(alerts)
+        if unsaved_alerts:
+            spool.requeue(unsaved_alerts)
@@ -0,0 +1,150 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Python 3 Compatibility imports
+from __future__ import print_function, unicode_literals
+
+__author__ = "TrackMe Limited"
+__copyright__ = "Copyright 2024, TrackMe Limited, U.K."
+__credits__ = "TrackMe Limited, U.K."
+__license__ = "TrackMe Limited, all rights reserved"
+__version__ = "0.1.0"
+__maintainer__ = "TrackMe Limited, U.K."
+__email__ = "support@trackme-solutions.com"
+__status__ = "PRODUCTION"
+
+import cProfile
+import pstats
+import threading
+import time
+import tracemalloc
+
+from trackme_consts import *
+
+
+class ActionProfiler(object):
+    """
+    Profile an action run with cProfile (CPU) and tracemalloc (memory allocations).
+
+    Threads started during the run, such as the fan-out workers, are profiled as well, each
+    with its own profile merged into the report. The memory is sampled during the run, and a
+    snapshot is taken each time it reaches a new high, so that the allocation sites reported
+    are the ones live at the peak rather than the ones still retained at the end of the run.
+    """
+
+    def __init__(
+        self,
+        top_n=TRACKME_PROFILE_DEFAULT_TOP_N,
+        sample_interval=TRACKME_PROFILE_SAMPLE_INTERVAL,
+    ):
+        self._top_n = top_n
+        self._sample_interval = sample_interval
+        self._profile = cProfile.Profile()
+        self._thread_profiles = []
+        self._lock = threading.Lock()
+        self._started = None
+        self._elapsed = None
+        self._snapshot = None
+        self._peak = None
+        self._peak_snapshot = None
+        self._peak_snapshot_size = 0
+        self._sampler = None
+        self._sampling = threading.Event()
+
+    def _profile_thread(self, frame, event, arg):
+        # installed by threading.setprofile, runs once in each new thread and replaces itself
+        # with a profile of the thread
+        profile = cProfile.Profile()
+        with self._lock:
+            self._thread_profiles.append(profile)
+        profile.enable()
+
+    def _sample_memory(self):
+        # snapshot the allocations each time the traced memory grows past the last snapshot
+        current = tracemalloc.get_traced_memory()[0]
+        if current > self._peak_snapshot_size * TRACKME_PROFILE_PEAK_GROWTH:
+            self._peak_snapshot = tracemalloc.take_snapshot()
+            self._peak_snapshot_size = current
+
+    def _run_sampler(self):
+        while not self._sampling.wait(self._sample_interval):
+            self._sample_memory()
+
+    def start(self):
+        tracemalloc.start(TRACKME_PROFILE_TRACEMALLOC_FRAMES)
+        self._started = time.time()
+
+        # the sampler is started before the thread profiling hook, it is not profiled
+        self._sampler = threading.Thread(target=self._run_sampler, daemon=True)
+        self._sampler.start()
+
+        threading.setprofile(self._profile_thread)
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+        threading.setprofile(None)
+        self._elapsed = time.time() - self._started
+
+        self._sampling.set()
+        self._sampler.join()
+        self._sample_memory()
+
+        self._snapshot = tracemalloc.take_snapshot()
+        self._peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    def _stats(self):
+        stats = pstats.Stats(self._profile)
+        with self._lock:
+            for profile in self._thread_profiles:
+                stats.add(profile)
+        return stats
+
+    def dump_stats(self, file_path):
+        self._stats().dump_stats(file_path)
+
+    def _allocations(self, snapshot):
+        if snapshot is None:
+            return []
+        snapshot = snapshot.filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        return [
+            {
+                "site": str(statistic.traceback[0]),
+                "size_kb": round(statistic.size / 1024, 1),
+                "count": statistic.count,
+            }
+            for statistic in snapshot.statistics("lineno")[: self._top_n]
+        ]
+
+    def report(self):
+        """
+        Return the top N functions by cumulative time, across the threads of the run, the top N
+        allocation sites at the memory peak and the top N allocation sites retained at the end
+        """
+
+        stats = self._stats()
+        functions = []
+        for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+            filename, line, name = func
+            functions.append(
+                {
+                    "function": "{0}:{1}({2})".format(filename, line, name),
+                    "ncalls": nc,
+                    "tottime": round(tt, 6),
+                    "cumtime": round(ct, 6),
+                }
+            )
+        functions.sort(key=lambda item: item["cumtime"], reverse=True)
+
+        return {
+            "elapsed": round(self._elapsed, 6),
+            "threads_profiled": len(self._thread_profiles) + 1,
+            "peak_memory_kb": round(self._peak / 1024, 1),
+            "peak_snapshot_kb": round(self._peak_snapshot_size / 1024, 1),
+            "top_functions": functions[: self._top_n],
+            "peak_allocations": self._allocations(self._peak_snapshot),
+            "retained_allocations": self._allocations(self._snapshot),
+        }
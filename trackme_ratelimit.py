@@ -0,0 +1,114 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Python 3 Compatibility imports
+from __future__ import print_function, unicode_literals
+
+__author__ = "TrackMe Limited"
+__copyright__ = "Copyright 2024, TrackMe Limited, U.K."
+__credits__ = "TrackMe Limited, U.K."
+__license__ = "TrackMe Limited, all rights reserved"
+__version__ = "0.1.0"
+__maintainer__ = "TrackMe Limited, U.K."
+__email__ = "support@trackme-solutions.com"
+__status__ = "PRODUCTION"
+
+import os
+import time
+
+from trackme_consts import *
+from trackme_utils import locked_json_file
+
+
+def get_endpoint_class(endpoint):
+    """
+    Return the class of a TrackMe endpoint: read, write or ml. Only the writes of the Machine
+    Learning engine (training, reset, ...) are ml, its reads are reads like any other
+    """
+
+    if "/write/" in endpoint or endpoint in TRACKME_WRITE_ENDPOINTS:
+        if "/splk_outliers_engine/" in endpoint:
+            return TRACKME_ENDPOINT_CLASS_ML
+        return TRACKME_ENDPOINT_CLASS_WRITE
+    return TRACKME_ENDPOINT_CLASS_READ
+
+
+class TokenBucketRateLimiter(object):
+    """
+    Token bucket rate limiter shared across connector processes.
+
+    Buckets are stored per asset in a JSON file of the app state directory, the file is
+    locked while tokens are refilled and consumed so that concurrent action runs
+    share the same budget toward splunkd.
+
+    rates is a dictionary of endpoint class to a number of requests per second, a class
+    with no rate (or a rate of 0) is not limited. The bucket capacity is one second
+    worth of requests, which allows for short bursts.
+    """
+
+    def __init__(
+        self,
+        state_dir,
+        asset_id,
+        rates,
+        policy=TRACKME_RATE_LIMIT_POLICY_BLOCK,
+        max_wait=TRACKME_RATE_LIMIT_DEFAULT_MAX_WAIT,
+    ):
+        self._file_path = os.path.join(
+            state_dir, TRACKME_RATE_LIMIT_STATE_FILE.format(asset_id=asset_id)
+        )
+        self._rates = rates
+        self._policy = policy
+        self._max_wait = max_wait
+
+    def is_enabled(self):
+        return any(rate > 0 for rate in self._rates.values())
+
+    def _try_consume(self, endpoint_class, rate):
+        """
+        Refill and attempt to consume a token, returns the number of seconds to wait
+        before a token becomes available, 0 if the token was consumed.
+        """
+
+        capacity = max(float(rate), 1.0)
+
+        with locked_json_file(self._file_path) as buckets:
+            now = time.time()
+            bucket = buckets.get(endpoint_class, {"tokens": capacity, "ts": now})
+
+            tokens = min(capacity, bucket["tokens"] + (now - bucket["ts"]) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / rate
+
+            buckets[endpoint_class] = {"tokens": tokens, "ts": now}
+
+        return wait
+
+    def acquire(self, endpoint_class):
+        """
+        Acquire a token for the endpoint class.
+
+        Depending on the policy, either blocks until a token is available (up to max_wait
+        seconds) or fails immediately, returns True if the request can proceed.
+        """
+
+        rate = self._rates.get(endpoint_class) or 0
+        if rate <= 0:
+            return True
+
+        waited = 0
+        while True:
+            wait = self._try_consume(endpoint_class, rate)
+            if not wait:
+                return True
+
+            if self._policy == TRACKME_RATE_LIMIT_POLICY_FAIL_FAST:
+                return False
+            if waited + wait > self._max_wait:
+                return False
+
+            time.sleep(wait)
+            waited += wait
@@ -0,0 +1,199 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Python 3 Compatibility imports
+from __future__ import print_function, unicode_literals
+
+__author__ = "TrackMe Limited"
+__copyright__ = "Copyright 2024, TrackMe Limited, U.K."
+__credits__ = "TrackMe Limited, U.K."
+__license__ = "TrackMe Limited, all rights reserved"
+__version__ = "0.1.0"
+__maintainer__ = "TrackMe Limited, U.K."
+__email__ = "support@trackme-solutions.com"
+__status__ = "PRODUCTION"
+
+
+class EntityRecord(object):
+    """
+    Compact representation of a TrackMe entity record, holding only the fields used by the
+    connector instead of the dozens of fields of the records returned by load_component_data.
+
+    Additional fields can be retained with extra_fields, they are kept in a small dictionary.
+    """
+
+    __slots__ = (
+        "object",
+        "key",
+        "object_state",
+        "priority",
+        "monitored_state",
+        "extra",
+    )
+
+    def __init__(
+        self,
+        object=None,
+        key=None,
+        object_state=None,
+        priority=None,
+        monitored_state=None,
+        extra=None,
+    ):
+        self.object = object
+        self.key = key
+        self.object_state = object_state
+        self.priority = priority
+        self.monitored_state = monitored_state
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, record, extra_fields=()):
+        extra = None
+        if extra_fields:
+            extra = {
+                field: record[field]
+                for field in extra_fields
+                if field not in cls.__slots__ and field in record
+            }
+
+        return cls(
+            object=record.get("object"),
+            key=record.get("_key") or record.get("keyid"),
+            object_state=record.get("object_state"),
+            priority=record.get("priority"),
+            monitored_state=record.get("monitored_state"),
+            extra=extra or None,
+        )
+
+    def get(self, field, default=None):
+        # same lookup as on the original record, the key is stored once for _key and keyid
+        if field in ("_key", "keyid"):
+            field = "key"
+        if field in self.__slots__ and field != "extra":
+            value = getattr(self, field)
+            return default if value is None else value
+        if self.extra:
+            return self.extra.get(field, default)
+        return default
+
+    def to_dict(self):
+        record = {
+            "object": self.object,
+            "_key": self.key,
+            "object_state": self.object_state,
+            "priority": self.priority,
+            "monitored_state": self.monitored_state,
+        }
+        if self.extra:
+            record.update(self.extra)
+        return record
+
+
+class GroupRecord(object):
+    """
+    Compact representation of a TrackMe logical group record, the members are kept as a tuple
+    """
+
+    __slots__ = (
+        "key",
+        "object_group_name",
+        "object_group_members",
+        "object_group_min_green_percent",
+        "object_group_mtime",
+        "object_group_mtime_human",
+    )
+
+    def __init__(
+        self,
+        key=None,
+        object_group_name=None,
+        object_group_members=(),
+        object_group_min_green_percent=None,
+        object_group_mtime=None,
+        object_group_mtime_human=None,
+    ):
+        self.key = key
+        self.object_group_name = object_group_name
+        self.object_group_members = object_group_members
+        self.object_group_min_green_percent = object_group_min_green_percent
+        self.object_group_mtime = object_group_mtime
+        self.object_group_mtime_human = object_group_mtime_human
+
+    @classmethod
+    def from_dict(cls, record):
+        # a group with a single member may have its members stored as a string
+        members = record.get("object_group_members") or ()
+        if isinstance(members, str):
+            members = (members,)
+
+        return cls(
+            key=record.get("_key"),
+            object_group_name=record.get("object_group_name"),
+            object_group_members=tuple(members),
+            object_group_min_green_percent=record.get("object_group_min_green_percent"),
+            object_group_mtime=record.get("object_group_mtime"),
+            object_group_mtime_human=record.get("object_group_mtime_human"),
+        )
+
+    def to_dict(self):
+        return {
+            "object_group_name": self.object_group_name,
+            "object_group_key": self.key,
+            "object_group_members": list(self.object_group_members),
+            "object_group_min_green_percent": self.object_group_min_green_percent,
+            "object_group_mtime": self.object_group_mtime,
+            "object_group_mtime_human": self.object_group_mtime_human,
+        }
+
+
+class EntityStateIndex(object):
+    """
+    Hash index of the state of the entities of several components, by component and object.
+
+    The same object name may exist in several components, a logical group member is resolved to
+    the component whose entity is bound to the group (object_group_key of the entity record),
+    or to the only component having this object.
+    """
+
+    __slots__ = ("_states", "_components", "_bindings")
+
+    def __init__(self):
+        self._states = {}
+        self._components = {}
+        self._bindings = {}
+
+    def add(self, component, record):
+        object_value = record.get("object")
+        self._states[(component, object_value)] = record.get("object_state")
+
+        components = self._components.setdefault(object_value, [])
+        if component not in components:
+            components.append(component)
+
+        group_key = record.get("object_group_key")
+        if group_key:
+            self._bindings[(group_key, object_value)] = component
+
+    def get(self, component, object_value):
+        return self._states.get((component, object_value))
+
+    def member_state(self, group_key, member):
+        """
+        Return the state of a logical group member and whether the member is ambiguous: it exists
+        in several components and none of its entities is bound to the group, its state is None
+        in this case, as it is for members which were not found
+        """
+
+        components = self._components.get(member)
+        if not components:
+            return None, False
+
+        if len(components) == 1:
+            return self._states[(components[0], member)], False
+
+        component = self._bindings.get((group_key, member))
+        if component:
+            return self._states[(component, member)], False
+
+        return None, True
@@ -0,0 +1,240 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Python 3 Compatibility imports
+from __future__ import print_function, unicode_literals
+
+__author__ = "TrackMe Limited"
+__copyright__ = "Copyright 2024, TrackMe Limited, U.K."
+__credits__ = "TrackMe Limited, U.K."
+__license__ = "TrackMe Limited, all rights reserved"
+__version__ = "0.1.0"
+__maintainer__ = "TrackMe Limited, U.K."
+__email__ = "support@trackme-solutions.com"
+__status__ = "PRODUCTION"
+
+import json
+import os
+import tempfile
+import time
+import uuid
+
+from trackme_consts import *
+from trackme_utils import request_fingerprint
+
+
+class SingleFlight(object):
+    """
+    Coalesce identical requests issued by concurrent connector processes.
+
+    For a given request fingerprint, the first caller becomes the leader: it marks the
+    request as pending, performs it and publishes the result in the app state directory.
+    Other callers with the same fingerprint wait for the result and reuse it instead of
+    calling splunkd.
+
+    Only the callers which joined while the request was in flight share its result: each
+    flight has its own identifier, a result is only served to the callers which saw the
+    pending marker of its flight. A caller arriving once the result is published performs
+    its own request, so a read following a write never gets a result older than the write.
+    Published results are kept ttl seconds for the waiters to pick them up, then purged.
+
+    If the leader fails or disappears, the pending marker is released and one of the
+    waiting callers takes over.
+    """
+
+    def __init__(
+        self,
+        state_dir,
+        asset_id,
+        ttl=TRACKME_COALESCE_DEFAULT_TTL,
+        wait_timeout=TRACKME_COALESCE_WAIT_TIMEOUT,
+    ):
+        self._dir = os.path.join(
+            state_dir, TRACKME_COALESCE_STATE_DIR.format(asset_id=asset_id)
+        )
+        self._ttl = ttl
+        self._wait_timeout = wait_timeout
+        # flight identifier of the requests led by this process, by fingerprint
+        self._flights = {}
+
+        if not os.path.isdir(self._dir):
+            os.makedirs(self._dir, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(method, endpoint, params=None, body=None):
+        return request_fingerprint(method, endpoint, params, body)
+
+    def _result_path(self, key, flight):
+        return os.path.join(self._dir, "{0}.{1}.json".format(key, flight))
+
+    def _pending_path(self, key):
+        return os.path.join(self._dir, key + ".pending")
+
+    def _read_result(self, key, flight):
+        try:
+            with open(self._result_path(key, flight)) as f:
+                return True, json.load(f)
+        except (OSError, ValueError):
+            return False, None
+
+    def _read_flight(self, key):
+        # flight identifier of the pending marker, None if there is none or it is unreadable
+        try:
+            with open(self._pending_path(key)) as f:
+                return json.load(f).get("flight")
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _is_stale(self, key):
+        """
+        A pending marker is stale if its owner process is gone or if it is too old
+        """
+
+        pending_path = self._pending_path(key)
+        try:
+            with open(pending_path) as f:
+                pending = json.load(f)
+        except FileNotFoundError:
+            # released in the meantime, the caller tries again to become the leader
+            return False
+        except (OSError, ValueError):
+            # unreadable marker, only stale once older than the wait timeout
+            try:
+                return time.time() - os.path.getmtime(pending_path) > self._wait_timeout
+            except OSError:
+                return False
+
+        if time.time() - pending.get("ts", 0) > self._wait_timeout:
+            return True
+
+        try:
+            os.kill(pending.get("pid"), 0)
+        except PermissionError:
+            return False
+        except (OSError, TypeError):
+            return True
+
+        return False
+
+    def join(self, key):
+        """
+        Join the flight for this fingerprint.
+
+        Returns (True, result) if the result of a flight joined while it was pending is
+        published, (False, None) if the caller must perform the request itself, in which case
+        it must call publish() or abandon() once done.
+        """
+
+        started = time.time()
+        delay = 0.05
+        flights = set()
+
+        while True:
+            for flight in flights:
+                found, result = self._read_result(key, flight)
+                if found:
+                    return True, result
+
+            # attempt to become the leader
+            if self._create_pending(key):
+                return False, None
+
+            # the flight in progress, its result can be shared with this caller
+            flight = self._read_flight(key)
+            if flight:
+                flights.add(flight)
+
+            if self._is_stale(key):
+                self._remove_pending(key)
+                continue
+
+            # give up waiting and perform the request
+            if time.time() - started > self._wait_timeout:
+                return False, None
+
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    def _create_pending(self, key):
+        """
+        Create the pending marker if it does not exist yet, returns True if it was created.
+
+        The marker is written to a temporary file first and then linked to its final name, so
+        that waiters never read a marker whose content is not written yet.
+        """
+
+        flight = uuid.uuid4().hex
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(
+                    json.dumps(
+                        {"pid": os.getpid(), "ts": time.time(), "flight": flight}
+                    )
+                )
+            os.link(tmp_path, self._pending_path(key))
+            self._flights[key] = flight
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.remove(tmp_path)
+
+    def publish(self, key, result):
+        """
+        Publish the result for the waiters of this fingerprint and release the pending marker
+        """
+
+        flight = self._flights.get(key)
+        if not flight:
+            return
+        result_path = self._result_path(key, flight)
+        tmp_path = "{0}.{1}.tmp".format(result_path, os.getpid())
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(result, f)
+            os.replace(tmp_path, result_path)
+        except (OSError, TypeError, ValueError):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        finally:
+            self.abandon(key)
+            self._purge()
+
+    def abandon(self, key):
+        """
+        Release the pending marker without publishing, a waiting caller takes over. Does
+        nothing if this process does not lead the flight, or no longer does (released already)
+        """
+
+        flight = self._flights.pop(key, None)
+        if flight and self._read_flight(key) == flight:
+            self._remove_pending(key)
+
+    def _remove_pending(self, key):
+        try:
+            os.remove(self._pending_path(key))
+        except OSError:
+            pass
+
+    def _purge(self):
+        """
+        Remove the results published more than ttl seconds ago
+        """
+
+        now = time.time()
+        try:
+            entries = list(os.scandir(self._dir))
+        except OSError:
+            return
+
+        for entry in entries:
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                if now - entry.stat().st_mtime > self._ttl:
+                    os.remove(entry.path)
+            except OSError:
+                pass
@@ -0,0 +1,142 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Python 3 Compatibility imports
+from __future__ import print_function, unicode_literals
+
+__author__ = "TrackMe Limited"
+__copyright__ = "Copyright 2024, TrackMe Limited, U.K."
+__credits__ = "TrackMe Limited, U.K."
+__license__ = "TrackMe Limited, all rights reserved"
+__version__ = "0.1.0"
+__maintainer__ = "TrackMe Limited, U.K."
+__email__ = "support@trackme-solutions.com"
+__status__ = "PRODUCTION"
+
+import random
+import threading
+import time
+
+from trackme_consts import *
+
+
+class SplunkdPool(object):
+    """
+    Pool of splunkd members, typically the members of a search head cluster.
+
+    - reads are routed to a healthy member, randomly weighted by the inverse of its latency
+    - writes are sticky, they go to the same healthy member for as long as it stays healthy
+    - members failing a request are marked as unhealthy and are only tried again as a last
+      resort, or once probed successfully after TRACKME_NODE_RETRY_AFTER seconds
+
+    The health information is kept in the connector state, so that later action runs skip
+    dead members right away. lock is the lock of the connector state, it is held while the
+    health information is updated so that the state is never saved in the middle of a change.
+    """
+
+    def __init__(self, urls, state, retry_after=TRACKME_NODE_RETRY_AFTER, lock=None):
+        self._urls = urls
+        self._retry_after = retry_after
+        self._lock = lock or threading.Lock()
+
+        # state is the dictionary persisted in the connector state, drop members which are no longer configured
+        self._state = state
+        nodes = self._state.setdefault("nodes", {})
+        for url in list(nodes):
+            if url not in urls:
+                del nodes[url]
+        for url in urls:
+            nodes.setdefault(
+                url,
+                {"healthy": True, "latency": None, "down_since": None},
+            )
+        self._nodes = nodes
+
+    @property
+    def urls(self):
+        return list(self._urls)
+
+    def is_healthy(self, url):
+        return self._nodes[url]["healthy"]
+
+    def _latency(self, url):
+        latency = self._nodes[url]["latency"]
+        if latency is None:
+            return TRACKME_NODE_DEFAULT_LATENCY
+        return max(latency, 0.001)
+
+    def candidates(self, endpoint_class):
+        """
+        Return the members to try for a request, in order of preference
+        """
+
+        with self._lock:
+            healthy = [url for url in self._urls if self._nodes[url]["healthy"]]
+            unhealthy = [url for url in self._urls if not self._nodes[url]["healthy"]]
+            healthy.sort(key=self._latency)
+
+            if not healthy:
+                return unhealthy
+
+            if endpoint_class == TRACKME_ENDPOINT_CLASS_READ:
+                first = random.choices(
+                    healthy, weights=[1 / self._latency(url) for url in healthy]
+                )[0]
+            else:
+                first = self._state.get("write_node")
+                if first not in healthy:
+                    first = healthy[0]
+                    self._state["write_node"] = first
+
+            return [first] + [url for url in healthy if url != first] + unhealthy
+
+    def mark_success(self, url, latency):
+        with self._lock:
+            node = self._nodes[url]
+            if node["latency"] is None:
+                node["latency"] = latency
+            else:
+                node["latency"] = (
+                    TRACKME_NODE_LATENCY_ALPHA * latency
+                    + (1 - TRACKME_NODE_LATENCY_ALPHA) * node["latency"]
+                )
+            node["healthy"] = True
+            node["down_since"] = None
+
+    def mark_failure(self, url):
+        with self._lock:
+            node = self._nodes[url]
+            if node["healthy"]:
+                node["healthy"] = False
+                node["down_since"] = time.time()
+
+    def mark_probe_failure(self, url):
+        # the member stays unhealthy, wait for a full retry delay before probing it again
+        with self._lock:
+            self._nodes[url]["healthy"] = False
+            self._nodes[url]["down_since"] = time.time()
+
+    def due_for_probe(self):
+        """
+        Return the unhealthy members for which the retry delay has elapsed
+        """
+
+        now = time.time()
+        with self._lock:
+            return [
+                url
+                for url in self._urls
+                if not self._nodes[url]["healthy"]
+                and now - (self._nodes[url]["down_since"] or 0) >= self._retry_after
+            ]
+
+    def status(self):
+        with self._lock:
+            return [
+                {
+                    "url": url,
+                    "healthy": self._nodes[url]["healthy"],
+                    "latency": self._nodes[url]["latency"],
+                }
+                for url in self._urls
+            ]
@@ -0,0 +1,89 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Python 3 Compatibility imports
+from __future__ import print_function, unicode_literals
+
+__author__ = "TrackMe Limited"
+__copyright__ = "Copyright 2024, TrackMe Limited, U.K."
+__credits__ = "TrackMe Limited, U.K."
+__license__ = "TrackMe Limited, all rights reserved"
+__version__ = "0.1.0"
+__maintainer__ = "TrackMe Limited, U.K."
+__email__ = "support@trackme-solutions.com"
+__status__ = "PRODUCTION"
+
+import array
+import collections
+
+from trackme_consts import *
+
+
+class EntityStatsAggregator(object):
+    """
+    Compute aggregate statistics of TrackMe entities in a single pass.
+
+    Records are not retained: categorical fields are counted, and numeric lag fields are
+    accumulated into compact arrays of doubles from which percentiles are computed. Records can
+    be added as they are decoded from the response (see json_decode_items).
+    """
+
+    def __init__(
+        self,
+        count_fields=TRACKME_STATS_COUNT_FIELDS,
+        lag_fields=TRACKME_STATS_LAG_FIELDS,
+        percentiles=TRACKME_STATS_PERCENTILES,
+    ):
+        self._count_fields = count_fields
+        self._lag_fields = lag_fields
+        self._percentiles = percentiles
+        self._entity_count = 0
+        self._counts = {field: collections.Counter() for field in count_fields}
+        self._lags = {field: array.array("d") for field in lag_fields}
+
+    def add(self, record):
+        self._entity_count += 1
+
+        for field in self._count_fields:
+            self._counts[field][str(record.get(field))] += 1
+
+        for field in self._lag_fields:
+            value = record.get(field)
+            if value is None or value == "":
+                continue
+            try:
+                self._lags[field].append(float(value))
+            except (TypeError, ValueError):
+                continue
+
+    def add_all(self, records):
+        for record in records:
+            self.add(record)
+        return self
+
+    def _lag_stats(self, values):
+        if not values:
+            return {"count": 0}
+
+        values = sorted(values)
+        count = len(values)
+        stats = {
+            "count": count,
+            "min": values[0],
+            "max": values[-1],
+            "avg": round(sum(values) / count, 3),
+        }
+        # nearest rank percentiles
+        for percentile in self._percentiles:
+            rank = max(int(-(-percentile * count // 100)), 1)
+            stats["p{0}".format(percentile)] = values[rank - 1]
+        return stats
+
+    def results(self):
+        results = {"entity_count": self._entity_count}
+        for field in self._count_fields:
+            results[field] = dict(self._counts[field])
+        results["lag"] = {
+            field: self._lag_stats(self._lags[field]) for field in self._lag_fields
+        }
+        return results
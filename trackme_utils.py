@@ -0,0 +1,107 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Python 3 Compatibility imports
+from __future__ import print_function, unicode_literals
+
+__author__ = "TrackMe Limited"
+__copyright__ = "Copyright 2024, TrackMe Limited, U.K."
+__credits__ = "TrackMe Limited, U.K."
+__license__ = "TrackMe Limited, all rights reserved"
+__version__ = "0.1.0"
+__maintainer__ = "TrackMe Limited, U.K."
+__email__ = "support@trackme-solutions.com"
+__status__ = "PRODUCTION"
+
+import contextlib
+import fcntl
+import hashlib
+import itertools
+import json
+import os
+
+
+@contextlib.contextmanager
+def locked_json_file(file_path):
+    """
+    Open a JSON file under an exclusive lock, shared by all connector processes.
+
+    Yields a dictionary loaded from the file (empty if the file does not exist yet
+    or cannot be parsed), it is written back when the block exits if it was changed.
+    """
+
+    fd = os.open(file_path, os.O_RDWR | os.O_CREAT, 0o600)
+    with os.fdopen(fd, "r+") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            text = f.read()
+            try:
+                content = json.loads(text or "{}")
+            except ValueError:
+                content = {}
+
+            yield content
+
+            new_text = json.dumps(content)
+            if new_text != text:
+                f.seek(0)
+                f.truncate()
+                f.write(new_text)
+                f.flush()
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def request_fingerprint(method, endpoint, params=None, body=None):
+    """
+    Return the fingerprint of a request, from its method, endpoint and parameters
+    """
+
+    if isinstance(body, bytes):
+        body = body.decode("utf-8")
+
+    if isinstance(body, str):
+        try:
+            body = json.loads(body)
+        except ValueError:
+            pass
+
+    request = json.dumps(
+        [method.lower(), endpoint, params or {}, body or {}], sort_keys=True
+    )
+    return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+
+def chunked(iterable, size):
+    """
+    Yield lists of up to size items from iterable, without loading it entirely
+    """
+
+    if size < 1:
+        raise ValueError("chunk size must be at least 1, got {0}".format(size))
+
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def apply_parameter_spec(parameters, params):
+    """
+    Apply the parameters of an action, as declared in the app JSON, to the params of a run.
+
+    Returns the params completed with the declared defaults, and the list of the required
+    parameters which are missing.
+    """
+
+    params = dict(params)
+    missing = []
+    for name, spec in parameters.items():
+        if params.get(name) in (None, ""):
+            if spec.get("default") not in (None, ""):
+                params[name] = spec["default"]
+            elif spec.get("required"):
+                missing.append(name)
+    return params, missing
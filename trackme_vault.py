@@ -0,0 +1,101 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Python 3 Compatibility imports
+from __future__ import print_function, unicode_literals
+
+__author__ = "TrackMe Limited"
+__copyright__ = "Copyright 2024, TrackMe Limited, U.K."
+__credits__ = "TrackMe Limited, U.K."
+__license__ = "TrackMe Limited, all rights reserved"
+__version__ = "0.1.0"
+__maintainer__ = "TrackMe Limited, U.K."
+__email__ = "support@trackme-solutions.com"
+__status__ = "PRODUCTION"
+
+import csv
+import gzip
+import itertools
+import json
+
+
+def iter_vault_objects(file_path, field="object"):
+    """
+    Stream the entity identifiers of a CSV or NDJSON file.
+
+    NDJSON lines are either JSON strings or JSON objects, in which case the identifier
+    is read from field. CSV files use the column named field if the first row is a header
+    containing it, otherwise the first column. Empty values are ignored.
+    """
+
+    with open(file_path, "r", encoding="utf-8", newline="") as f:
+        first_line = f.readline()
+        lines = itertools.chain([first_line], f)
+
+        if first_line.lstrip().startswith(("{", '"')):
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if isinstance(record, dict):
+                    record = record.get(field)
+                if record is not None and str(record).strip():
+                    yield str(record).strip()
+
+        else:
+            reader = csv.reader(lines)
+            header = next(reader, None)
+            if header is None:
+                return
+
+            header = [column.strip() for column in header]
+            if field in header:
+                index = header.index(field)
+            else:
+                index = 0
+                reader = itertools.chain([header], reader)
+
+            for row in reader:
+                if len(row) > index and row[index].strip():
+                    yield row[index].strip()
+
+
+class NdjsonVaultWriter(object):
+    """
+    Write records incrementally to a gzip compressed NDJSON file.
+
+    Alongside the file, a small summary is computed: the number of records and the count
+    of each value of summary_fields.
+    """
+
+    def __init__(self, file_path, summary_fields=()):
+        self.file_path = file_path
+        self.record_count = 0
+        self._summary_fields = summary_fields
+        self._aggregates = {}
+        self._file = gzip.open(file_path, "wt", encoding="utf-8")
+
+    def write(self, record):
+        self._file.write(json.dumps(record, separators=(",", ":")))
+        self._file.write("\n")
+        self.record_count += 1
+
+        if isinstance(record, dict):
+            for field in self._summary_fields:
+                value = record.get(field)
+                if isinstance(value, (str, int)):
+                    counts = self._aggregates.setdefault(field, {})
+                    counts[str(value)] = counts.get(str(value), 0) + 1
+
+    def close(self):
+        self._file.close()
+
+    def summary(self):
+        return {"record_count": self.record_count, "aggregates": self._aggregates}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,312 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Python 3 Compatibility imports
+from __future__ import print_function, unicode_literals
+
+__author__ = "TrackMe Limited"
+__copyright__ = "Copyright 2024, TrackMe Limited, U.K."
+__credits__ = "TrackMe Limited, U.K."
+__license__ = "TrackMe Limited, all rights reserved"
+__version__ = "0.1.0"
+__maintainer__ = "TrackMe Limited, U.K."
+__email__ = "support@trackme-solutions.com"
+__status__ = "PRODUCTION"
+
+import hashlib
+import hmac
+import json
+import os
+import re
+import time
+
+from trackme_consts import *
+from trackme_json import json_decode, json_encode
+from trackme_poll import alert_container
+from trackme_utils import locked_json_file
+
+_ASSET_ID_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def webhook_dir(state_dir=None):
+    """
+    Directory of the webhook spools, in the state directory of the app which survives upgrades.
+
+    The connector passes its state directory, the REST handler runs outside of the connector
+    and computes the same directory.
+    """
+
+    if state_dir is None:
+        state_dir = os.path.join(
+            os.environ.get("PHANTOM_HOME", "/opt/phantom"),
+            "local_data",
+            "app_states",
+            TRACKME_APP_ID,
+        )
+    return os.path.join(state_dir, TRACKME_WEBHOOK_DIR)
+
+
+def _token_hash(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def alert_entity_key(alert):
+    return "{0}:{1}:{2}".format(
+        alert.get("tenant_id"),
+        alert.get("component"),
+        alert.get("_key") or alert.get("keyid") or alert.get("object"),
+    )
+
+
+class AlertSpool(object):
+    """
+    Spool of the TrackMe alerts pushed to the app REST handler, for an asset.
+
+    Alerts are deduplicated by entity key, state and latest flip time: an alert is only kept
+    if its entity changed state since the last alert received for it, or if that alert is older
+    than dedup_ttl seconds. Entries older than dedup_ttl are pruned. The REST handler creates
+    the containers of the alerts right away when the delivery is configured, the alerts it
+    could not deliver are spooled, the connector drains the spool and creates their containers
+    in batches.
+    """
+
+    def __init__(self, asset_id, spool_dir, dedup_ttl=TRACKME_WEBHOOK_DEDUP_TTL):
+        if not _ASSET_ID_RE.match(str(asset_id)):
+            raise ValueError("Invalid asset id {0}".format(asset_id))
+
+        self._config_path = os.path.join(spool_dir, "{0}_config.json".format(asset_id))
+        self._state_path = os.path.join(spool_dir, "{0}_state.json".format(asset_id))
+        self._spool_path = os.path.join(spool_dir, "{0}_spool.ndjson".format(asset_id))
+        self._dedup_ttl = dedup_ttl
+
+        if not os.path.isdir(spool_dir):
+            os.makedirs(spool_dir, exist_ok=True)
+
+    def configure(self, token, delivery=None):
+        """
+        Enable the webhook with this bearer token, only a hash of the token is stored, or
+        disable it if token is empty.
+
+        delivery, if set, lets the REST handler create the containers itself: a dictionary
+        with the base_url of the platform REST API, the auth_token of its automation user, and
+        the asset_id and container_label of the containers. The configuration file is only
+        readable by the platform user.
+        """
+
+        if not token:
+            if os.path.exists(self._config_path):
+                os.remove(self._config_path)
+            return
+
+        config = {"token_sha256": _token_hash(token)}
+        if delivery:
+            config["delivery"] = delivery
+        with locked_json_file(self._config_path) as content:
+            if content != config:
+                content.clear()
+                content.update(config)
+
+    def is_enabled(self):
+        return os.path.exists(self._config_path)
+
+    def _config(self):
+        try:
+            with open(self._config_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def check_token(self, token):
+        if not token or not self.is_enabled():
+            return False
+        expected = self._config().get("token_sha256", "")
+        return hmac.compare_digest(_token_hash(token), expected)
+
+    def delivery(self):
+        return self._config().get("delivery")
+
+    def deduplicate(self, alerts):
+        """
+        Return the alerts whose entity changed state, and the number of duplicates
+        """
+
+        fresh = []
+        duplicates = 0
+        now = time.time()
+
+        # the state file is only written when an entry is added or pruned
+        with locked_json_file(self._state_path) as state:
+            seen = state.setdefault("seen", {})
+            for entity_key in [
+                entity_key
+                for entity_key, entry in seen.items()
+                if now - entry["time"] >= self._dedup_ttl
+            ]:
+                del seen[entity_key]
+
+            for alert in alerts:
+                entity_key = alert_entity_key(alert)
+                entry = seen.get(entity_key)
+                if entry and [entry["object_state"], entry["latest_flip_time"]] == [
+                    alert.get("object_state"),
+                    alert.get("latest_flip_time"),
+                ]:
+                    duplicates += 1
+                    continue
+
+                seen[entity_key] = {
+                    "object_state": alert.get("object_state"),
+                    "latest_flip_time": alert.get("latest_flip_time"),
+                    "time": now,
+                }
+                fresh.append(alert)
+
+        return fresh, duplicates
+
+    def append(self, alerts):
+        """
+        Spool the alerts, their containers are created by the next ingestion of the asset
+        """
+
+        # the state file lock also serializes the writers and the reader of the spool
+        with locked_json_file(self._state_path):
+            with open(self._spool_path, "ab") as f:
+                f.writelines(json_encode(alert) + b"\n" for alert in alerts)
+
+    def drain(self):
+        """
+        Return and remove the spooled alerts
+        """
+
+        with locked_json_file(self._state_path):
+            if not os.path.exists(self._spool_path):
+                return []
+            with open(self._spool_path, "rb") as f:
+                alerts = [json_decode(line) for line in f if line.strip()]
+            os.remove(self._spool_path)
+
+        return alerts
+
+    def requeue(self, alerts):
+        """
+        Put drained alerts back into the spool, when their containers could not be created
+        """
+
+        self.append(alerts)
+
+
+def deliver_alerts(alerts, delivery, post=None):
+    """
+    Create the containers of the alerts through the platform REST API, returns the alerts
+    which could not be delivered. post defaults to requests.post.
+    """
+
+    if post is None:
+        import requests
+
+        post = requests.post
+
+    url = "{0}/rest/container".format(delivery["base_url"].rstrip("/"))
+    headers = {"ph-auth-token": delivery["auth_token"]}
+    undelivered = []
+    for index, alert in enumerate(alerts):
+        container = alert_container(alert, delivery.get("container_label"))
+        container["asset_id"] = delivery["asset_id"]
+        try:
+            r = post(
+                url,
+                data=json_encode(container),
+                headers=headers,
+                verify=delivery.get("verify_ssl", False),
+                timeout=TRACKME_WEBHOOK_DELIVERY_TIMEOUT,
+            )
+            delivered = 200 <= r.status_code < 300 and json_decode(r.content).get(
+                "success"
+            )
+        except Exception:
+            delivered = False
+        if not delivered:
+            # the platform is unavailable, the next alerts would fail the same way
+            undelivered.extend(alerts[index:])
+            break
+
+    return undelivered
+
+
+def _response(payload, status):
+    from django.http import JsonResponse
+
+    return JsonResponse(payload, status=status)
+
+
+def handle_request(request, path_parts):
+    """
+    REST handler of the app, receives the TrackMe alerts pushed to
+    /rest/handler/<app>/<asset_id> with the webhook bearer token of the asset.
+
+    The body is a JSON object, or an array of objects, describing entities with at least their
+    tenant_id, component, object_state and _key (or keyid / object). The containers of the
+    alerts are created right away through the platform REST API when the delivery is
+    configured, the alerts which could not be delivered are spooled for the ingestion of the
+    asset.
+    """
+
+    if request.method != "POST":
+        return _response({"error": "Method not allowed"}, 405)
+
+    # the asset id is the last part of the path
+    path_parts = [part for part in path_parts or [] if part]
+    try:
+        spool = AlertSpool(path_parts[-1] if path_parts else "", webhook_dir())
+    except ValueError:
+        return _response({"error": "Unknown asset"}, 404)
+
+    if not spool.is_enabled():
+        return _response({"error": "Webhook not enabled for this asset"}, 404)
+
+    authorization = request.META.get("HTTP_AUTHORIZATION", "")
+    token = (
+        authorization[len("Bearer ") :] if authorization.startswith("Bearer ") else ""
+    )
+    if not spool.check_token(token):
+        return _response({"error": "Unauthorized"}, 401)
+
+    try:
+        alerts = json_decode(request.body)
+        if isinstance(alerts, dict):
+            alerts = [alerts]
+        if not isinstance(alerts, list) or len(alerts) > TRACKME_WEBHOOK_MAX_ALERTS:
+            raise ValueError(
+                "expected an object or an array of up to {0} objects".format(
+                    TRACKME_WEBHOOK_MAX_ALERTS
+                )
+            )
+        for alert in alerts:
+            if not isinstance(alert, dict) or any(
+                field not in alert for field in TRACKME_WEBHOOK_REQUIRED_FIELDS
+            ):
+                raise ValueError(
+                    "alerts must define {0}".format(
+                        ", ".join(TRACKME_WEBHOOK_REQUIRED_FIELDS)
+                    )
+                )
+    except ValueError as e:
+        return _response({"error": "Invalid alerts: {0}".format(str(e))}, 400)
+
+    fresh, duplicates = spool.deduplicate(alerts)
+    undelivered = fresh
+    delivery = spool.delivery()
+    if fresh and delivery:
+        undelivered = deliver_alerts(fresh, delivery)
+    if undelivered:
+        spool.append(undelivered)
+
+    return _response(
+        {
+            "accepted": len(fresh),
+            "created": len(fresh) - len(undelivered),
+            "spooled": len(undelivered),
+            "duplicates": duplicates,
+        },
+        202,
+    )